@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Замер времени запуска: сколько стоит импорт модулей приложения и какие зависимости
+вносят наибольший вклад. Каждый модуль импортируется в отдельном процессе с python -X importtime.
+
+    python -m benchmarks.startup                      # из папки src
+    python -m benchmarks.startup --top 15 -o startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Что импортируется на пути запуска: главное окно, окно классификации, ядро и командная строка
+DEFAULT_MODULES = ["gui.gui", "gui.classificationWindow", "domain.calc", "infrastructure.fileparser", "cli"]
+
+
+def measure_import(module: str, repeat: int = 3) -> dict:
+    """
+    Возвращает общее время импорта модуля (лучшее из repeat запусков, мс)
+    и собственное/накопленное время каждого импортированного модуля в лучшем запуске.
+    """
+    best = None
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=SRC_DIR, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"Не удалось импортировать {module}:\n{completed.stderr}")
+        modules = parse_importtime(completed.stderr)
+        total = modules[module]["cumulative_ms"] if module in modules else 0.0
+        if best is None or total < best["total_ms"]:
+            best = {"total_ms": total, "modules": modules}
+    return best
+
+
+def parse_importtime(output: str) -> dict:
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = {
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        }
+    return modules
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Время импорта модулей Enose")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="сколько самых дорогих зависимостей показать")
+    parser.add_argument("-o", "--output", default=None, help="файл JSON с результатами")
+    args = parser.parse_args(argv)
+
+    report = {"python": sys.version.split()[0], "modules": {}}
+    for module in args.modules:
+        result = measure_import(module, args.repeat)
+        heaviest = sorted(result["modules"].items(), key=lambda item: item[1]["self_ms"], reverse=True)
+        report["modules"][module] = {
+            "total_ms": round(result["total_ms"], 1),
+            "top_self_ms": {name: round(times["self_ms"], 1) for name, times in heaviest[:args.top]},
+        }
+        print(f"{module}: {result['total_ms']:.1f} мс")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Замеры разбора, обучения, классификации и загрузки модели на синтетических данных.
+Результат — JSON, который можно сравнивать между запусками.
+Те же замеры моделей на своих файлах выполняет python cli.py benchmark.
+
+    python -m benchmarks.suite -o run.json                    # из папки src
+    python -m benchmarks.suite --rows 20000 --models knn svm --repeat 5
+    python -m benchmarks.suite --compare baseline.json -o run.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import FORMAT_VARIANTS, generate_dataset
+from domain.calc import Classifier
+from domain.models import MODEL_SPECS, DEFAULT_FEATURE_COLUMNS, DEFAULT_TARGET_COLUMN
+from infrastructure.encoding import EncodingDetector
+from infrastructure.fileparser import FileParser
+from infrastructure.modelstore import save_classifier, load_classifier
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def timed(func, repeat: int) -> tuple[dict, object]:
+    """
+    Выполняет func repeat раз. Возвращает лучшее и медианное время (с) и результат последнего вызова.
+    """
+    runs, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - started)
+    return {"best": round(min(runs), 4), "median": round(statistics.median(runs), 4), "runs": [round(r, 4) for r in runs]}, result
+
+
+def cold_parser(sep: str, decimal: str) -> FileParser:
+    # Каждый замер разбора — с пустыми кэшами: без кэша файлов и без сохранённых кодировок
+    file_parser = FileParser()
+    file_parser.encoding_detector = EncodingDetector(cache_path=None)
+    file_parser.set_file_params(sep=sep, decimal=decimal)
+    file_parser.set_columns(DEFAULT_FEATURE_COLUMNS, DEFAULT_TARGET_COLUMN)
+    return file_parser
+
+
+def warm_up(models: list[str]) -> None:
+    # sklearn импортируется лениво; без прогрева первый замер обучения включал бы время импорта
+    import domain.neighbors  # noqa: F401
+    import domain.search  # noqa: F401
+    for model_type in models:
+        MODEL_SPECS[model_type].factory()
+        MODEL_SPECS[model_type].distributions
+
+
+def measure_models(df: pd.DataFrame, models: list[str], make_classifier, feature_columns: list[str],
+                   target_column: str, directory: str, repeat: int) -> tuple[dict, dict]:
+    """
+    Обучение, классификация, сохранение и загрузка каждой модели на готовом наборе данных.
+    make_classifier() возвращает настроенный Classifier. Возвращает замеры и точность подбора по моделям.
+    """
+    timings, accuracy = {}, {}
+    for model_type in models:
+        def train():
+            classifier = make_classifier()
+            classifier.train(model_type, df, feature_columns, target_column)
+            return classifier
+
+        # Обучение дорогое, поэтому повторяется не больше двух раз
+        timings[f"train_{model_type}"], classifier = timed(train, min(repeat, 2))
+        accuracy[model_type] = classifier.best_score
+        timings[f"classify_batch_{model_type}"], _ = timed(lambda: classifier.classify_batch(df), repeat)
+
+        model_path = os.path.join(directory, f"{model_type}.joblib")
+        timings[f"save_{model_type}"], _ = timed(lambda: save_classifier(classifier, model_path), repeat)
+        timings[f"load_{model_type}"], _ = timed(lambda: load_classifier(model_path), repeat)
+        timings[f"load_{model_type}_no_mmap"], _ = timed(lambda: load_classifier(model_path, mmap_mode=None), repeat)
+    return timings, accuracy
+
+
+def run_suite(directory: str, files: int, rows: int, n_classes: int, models: list[str],
+              repeat: int, jobs: int, noise: float) -> dict:
+    timings = {}
+    warm_up(models)
+
+    paths_by_variant = {}
+    for variant, (encoding, sep, decimal) in FORMAT_VARIANTS.items():
+        paths = generate_dataset(
+            os.path.join(directory, variant), files, rows, n_classes, encoding, sep, decimal, noise=noise
+        )
+        paths_by_variant[variant] = paths
+        timings[f"parse_{variant}"], _ = timed(lambda: cold_parser(sep, decimal).load_multiple_csvs(paths), repeat)
+
+    # Обучение и классификация — на данных основного формата
+    df = cold_parser(";", ",").load_multiple_csvs(paths_by_variant["cp1251_semicolon"])
+
+    def make_classifier():
+        classifier = Classifier()
+        classifier.set_search_params(n_jobs=jobs)
+        return classifier
+
+    model_timings, accuracy = measure_models(
+        df, models, make_classifier, DEFAULT_FEATURE_COLUMNS, DEFAULT_TARGET_COLUMN, directory, repeat
+    )
+    timings.update(model_timings)
+    return {"timings": timings, "cv_accuracy": accuracy, "rows": len(df)}
+
+
+def environment() -> dict:
+    import sklearn
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SRC_DIR, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(report: dict, baseline: dict) -> None:
+    """
+    Печатает отношение лучшего времени к базовому запуску: меньше 1 — быстрее.
+    """
+    for name, current in report["timings"].items():
+        previous = baseline.get("timings", {}).get(name)
+        if previous is None or not previous["best"]:
+            continue
+        ratio = current["best"] / previous["best"]
+        print(f"{name}: {previous['best']:.4f} → {current['best']:.4f} с (×{ratio:.2f})")
+
+
+def write_report(report: dict, output: str | None, baseline_path: str | None = None) -> None:
+    """Сравнивает с прошлым запуском, если он указан, и записывает JSON в файл или в консоль."""
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Замеры производительности Enose на синтетических данных")
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=2000, help="строк в каждом файле")
+    parser.add_argument("--classes", type=int, default=4)
+    parser.add_argument("--noise", type=float, default=1.0)
+    parser.add_argument("-m", "--models", nargs="+", choices=list(MODEL_SPECS), default=list(MODEL_SPECS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="параллельных задач подбора")
+    parser.add_argument("--data-dir", default=None, help="папка для данных (по умолчанию временная)")
+    parser.add_argument("--compare", default=None, help="JSON прошлого запуска для сравнения")
+    parser.add_argument("-o", "--output", default=None, help="файл JSON с результатами")
+    args = parser.parse_args(argv)
+
+    params = {key: getattr(args, key) for key in ("files", "rows", "classes", "noise", "models", "repeat", "jobs")}
+    with tempfile.TemporaryDirectory(prefix="enose-bench-") as tmp_dir:
+        result = run_suite(
+            args.data_dir or tmp_dir, args.files, args.rows, args.classes, args.models, args.repeat, args.jobs, args.noise
+        )
+    report = {"environment": environment(), "params": params, **result}
+    write_report(report, args.output, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
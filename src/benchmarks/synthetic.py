@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Генератор синтетических данных электронного носа в схеме реальных файлов:
+Датчик1..8, Влажность, Температура, Материал.
+
+    python -m benchmarks.synthetic out_dir --files 4 --rows 5000 --classes 6
+    python -m benchmarks.synthetic out_dir --encoding utf-8 --sep , --decimal .
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from domain.models import DEFAULT_FEATURE_COLUMNS, DEFAULT_TARGET_COLUMN, HUMIDITY_COLUMN, TEMPERATURE_COLUMN
+
+# Кириллица в названиях классов проверяет работу с cp1251
+CLASS_NAMES = ["воздух", "ацетон", "этанол", "аммиак", "бензол", "толуол", "метанол", "изопропанол"]
+
+# Варианты формата файлов: (кодировка, разделитель, десятичный знак)
+FORMAT_VARIANTS = {
+    "cp1251_semicolon": ("cp1251", ";", ","),
+    "utf8_semicolon": ("utf-8", ";", ","),
+    "utf8_comma": ("utf-8", ",", "."),
+}
+
+
+def class_names(n_classes: int) -> list[str]:
+    # Больше классов, чем названий, — добавляются номера, как у похожих классов в реальных данных (air_001)
+    if n_classes <= len(CLASS_NAMES):
+        return CLASS_NAMES[:n_classes]
+    return [f"{CLASS_NAMES[i % len(CLASS_NAMES)]}_{i // len(CLASS_NAMES) + 1:03d}" for i in range(n_classes)]
+
+
+def generate_frame(rows: int, n_classes: int, rng: np.random.Generator, noise: float = 1.0) -> pd.DataFrame:
+    """
+    Показания: у каждого класса свой отклик датчиков, к нему добавляются шум
+    и линейное влияние влажности и температуры, одинаковое для всех классов.
+    """
+    names = class_names(n_classes)
+    sensors = [col for col in DEFAULT_FEATURE_COLUMNS if col not in (HUMIDITY_COLUMN, TEMPERATURE_COLUMN)]
+
+    signatures = rng.uniform(50, 500, size=(n_classes, len(sensors)))
+    env_effect = rng.normal(0, 1.5, size=(2, len(sensors)))
+
+    labels = rng.integers(0, n_classes, size=rows)
+    humidity = np.clip(rng.normal(45, 10, size=rows), 0, 100)
+    temperature = rng.normal(22, 3, size=rows)
+    environment = np.column_stack([humidity - 45, temperature - 22])
+
+    readings = signatures[labels] + environment @ env_effect + rng.normal(0, noise * 10, size=(rows, len(sensors)))
+
+    df = pd.DataFrame(np.round(readings, 3), columns=sensors)
+    df[HUMIDITY_COLUMN] = np.round(humidity, 2)
+    df[TEMPERATURE_COLUMN] = np.round(temperature, 2)
+    df[DEFAULT_TARGET_COLUMN] = np.asarray(names, dtype=object)[labels]
+    return df
+
+
+def write_csv(df: pd.DataFrame, path: str, encoding: str = "cp1251", sep: str = ";", decimal: str = ",") -> None:
+    df.to_csv(path, sep=sep, decimal=decimal, encoding=encoding, index=False)
+
+
+def generate_dataset(directory: str, files: int = 4, rows: int = 5000, n_classes: int = 4,
+                     encoding: str = "cp1251", sep: str = ";", decimal: str = ",",
+                     seed: int = 0, noise: float = 1.0) -> list[str]:
+    """
+    Записывает files файлов по rows строк. Отклики классов общие для всех файлов одного запуска.
+    Возвращает пути к файлам.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    frames = generate_frame(rows * files, n_classes, rng, noise)
+
+    paths = []
+    for i in range(files):
+        path = os.path.join(directory, f"synthetic_{i:03d}.csv")
+        write_csv(frames.iloc[i * rows:(i + 1) * rows], path, encoding, sep, decimal)
+        paths.append(path)
+    return paths
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Синтетические CSV-файлы электронного носа")
+    parser.add_argument("directory")
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=5000, help="строк в каждом файле")
+    parser.add_argument("--classes", type=int, default=4)
+    parser.add_argument("--encoding", default="cp1251")
+    parser.add_argument("--sep", default=";")
+    parser.add_argument("--decimal", default=",")
+    parser.add_argument("--noise", type=float, default=1.0, help="уровень шума: больше — классы труднее различить")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    paths = generate_dataset(
+        args.directory, args.files, args.rows, args.classes,
+        args.encoding, args.sep, args.decimal, args.seed, args.noise
+    )
+    print(f"Записано файлов: {len(paths)} в {args.directory}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
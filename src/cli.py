@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+"""
+Командная строка Enose: обучение, классификация, проверка и замеры без графического интерфейса.
+Не импортирует tkinter и matplotlib, поэтому подходит для запуска по расписанию и на серверах.
+
+Примеры:
+    python cli.py train -m knn -o model.joblib "data/**/*.csv"
+    python cli.py update -M model.joblib "data/session_12/*.csv"
+    python cli.py classify -M model.joblib -o results.csv "measurements/*.csv"
+    python cli.py classify -M model.joblib --follow live.csv
+    python cli.py evaluate -M model.joblib "validation/*.csv"
+    python cli.py benchmark -m knn svm "data/*.csv"
+    python cli.py serve --port 8765 --preload model.joblib --model-dir models
+    python cli.py --timings --debug-dir debug train -m svm -o model.joblib "data/*.csv"
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from domain.calc import Classifier, SEARCH_STRATEGIES, DEFAULT_SEARCH_SEED
+from domain.incremental import UPDATE_MODES
+from domain.models import MODEL_SPECS, DEFAULT_FEATURE_COLUMNS, DEFAULT_TARGET_COLUMN, DEFAULT_VALUE_RANGES
+from domain.profiling import profiler
+from domain.quality import parse_value_ranges, format_value_ranges
+from infrastructure.batch import iter_classify_files, write_results
+from infrastructure.encoding import EncodingDetector
+from infrastructure.fileparser import FileParser
+from infrastructure.modelstore import save_classifier, load_classifier
+from infrastructure.updates import update_from_files
+
+
+def expand_paths(patterns: list[str]) -> list[str]:
+    paths = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            paths.extend(path for path in sorted(glob.glob(pattern, recursive=True)) if os.path.isfile(path))
+        else:
+            # Явно указанный файл оставляем, даже если его нет: ошибка попадёт в результаты
+            paths.append(pattern)
+    paths = list(dict.fromkeys(paths))
+    if not paths:
+        raise SystemExit(f"Не найдено ни одного файла: {' '.join(patterns)}")
+    return paths
+
+
+def make_parser(args, feature_columns: list[str], target_column: str) -> FileParser:
+    file_parser = FileParser()
+    file_parser.set_file_params(sep=args.sep, decimal=args.decimal)
+    file_parser.set_columns(feature_columns, target_column)
+    file_parser.set_parallel_params(args.workers)
+    file_parser.set_number_format("float32" if args.float32 else "float64", engine=args.engine)
+    file_parser.set_value_ranges(args.ranges)
+    return file_parser
+
+
+def make_classifier(args) -> Classifier:
+    classifier = Classifier()
+    classifier.set_search_params(n_jobs=args.jobs, backend=args.backend, max_memory_mb=args.memory_mb)
+    classifier.set_search_strategy(args.strategy, n_iter=args.n_iter, time_budget=args.time_budget, random_state=args.seed)
+    classifier.set_preprocessing(
+        standardize=args.standardize, baseline_quantile=args.baseline,
+        compensate_environment=args.compensate, window=args.rolling_window
+    )
+    return classifier
+
+
+def cmd_train(args) -> int:
+    file_paths = expand_paths(args.files)
+    file_parser = make_parser(args, args.features, args.target)
+    classifier = make_classifier(args)
+
+    started = time.perf_counter()
+    df = file_parser.load_dataset(file_paths)
+    quality = file_parser.check_quality(df, args.features)
+    classifier.train(args.model, df, args.features, args.target, quality=quality)
+    classifier.set_training_files(file_paths)
+    save_classifier(classifier, args.output, file_parser=file_parser)
+
+    print(f"Файлов: {len(file_paths)}")
+    print("\n".join(quality.summary_lines()))
+    print(f"Модель: {classifier.best_estimator_str}")
+    print(f"Точность на кросс-валидации: {classifier.best_score}")
+    print(f"Время: {time.perf_counter() - started:.2f} с, сохранено в {args.output}")
+    return 0
+
+
+def cmd_update(args) -> int:
+    # Файл модели перезаписывается, поэтому массивы читаются целиком, а не отображаются в память
+    classifier = load_classifier(args.model_path, mmap_mode=None)
+    file_parser = make_parser(args, classifier.feature_names, classifier.target_name)
+
+    started = time.perf_counter()
+    try:
+        mode, new_files = update_from_files(file_parser, classifier, expand_paths(args.files))
+    except ValueError as e:
+        raise SystemExit(str(e))
+    output = args.output or args.model_path
+    save_classifier(classifier, output, file_parser=file_parser)
+
+    print(f"Новых файлов: {len(new_files)}, способ: {UPDATE_MODES[mode]}")
+    print("\n".join(classifier.training_quality.summary_lines()))
+    print(f"Время: {time.perf_counter() - started:.2f} с, сохранено в {output}")
+    return 0
+
+
+def cmd_classify(args) -> int:
+    classifier = load_classifier(args.model_path)
+    if args.follow:
+        return follow_classify(args, classifier)
+    file_paths = expand_paths(args.files)
+    file_parser = make_parser(args, classifier.feature_names, classifier.target_name)
+
+    order = {path: i for i, path in enumerate(file_paths)}
+    results = sorted(
+        iter_classify_files(file_parser, classifier, file_paths, max_workers=args.workers, use_processes=True),
+        key=lambda result: order[result["file"]]
+    )
+    write_results(results, args.output)
+    return 1 if any(result["error"] for result in results) else 0
+
+
+def follow_classify(args, classifier: Classifier) -> int:
+    """
+    Классификация строк, дописываемых в файл (или приходящих в stdin при пути '-'),
+    со статистикой по скользящему окну последних строк.
+    """
+    from infrastructure.follow import CsvFollower
+
+    if len(args.files) != 1:
+        raise SystemExit("В режиме --follow указывается один файл или '-' для stdin")
+    file_parser = make_parser(args, classifier.feature_names, classifier.target_name)
+
+    with CsvFollower(file_parser, args.files[0], poll_interval=args.poll) as follower:
+        try:
+            windows = classifier.classify_window(
+                follower.follow(), window_rows=args.window, quality_check=lambda chunk: file_parser.check_quality(chunk, classifier.feature_names)
+            )
+            for window in windows:
+                confidence = f" ({window.avg_proba.max() * 100:.1f}%)" if window.avg_proba is not None else ""
+                print(f"Строк: {window.total_rows}, в окне: {window.rows} — {window.majority_class}{confidence}", flush=True)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def cmd_evaluate(args) -> int:
+    classifier = load_classifier(args.model_path)
+    file_paths = expand_paths(args.files)
+    file_parser = make_parser(args, classifier.feature_names, classifier.target_name)
+
+    def evaluate_file(path):
+        try:
+            return path, classifier.evaluate(file_parser.parse_csv(path)), None
+        except Exception as e:
+            return path, None, e
+
+    correct, total, failed = 0.0, 0, 0
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        for path, outcome, error in executor.map(evaluate_file, file_paths):
+            if error is not None:
+                print(f"{path}: ошибка: {error}")
+                failed += 1
+                continue
+            accuracy, rows = outcome
+            print(f"{path}: точность {accuracy:.3f} ({rows} строк)")
+            correct += accuracy * rows
+            total += rows
+
+    if total:
+        print(f"Итого: точность {correct / total:.3f} на {total} строках")
+    return 1 if failed or not total else 0
+
+
+def cmd_benchmark(args) -> int:
+    # Замеры общие с benchmarks.suite, только данные — файлы пользователя, а не синтетические
+    import tempfile
+    from benchmarks import suite
+
+    file_paths = expand_paths(args.files)
+    suite.warm_up(args.models)
+
+    def cold_parser():
+        # Как cold_parser в benchmarks.suite: без кэша разобранных файлов и без сохранённых кодировок
+        file_parser = make_parser(args, args.features, args.target)
+        file_parser.encoding_detector = EncodingDetector(cache_path=None)
+        return file_parser
+
+    timings = {}
+    timings["parse"], df = suite.timed(lambda: cold_parser().load_multiple_csvs(file_paths), args.repeat)
+    with tempfile.TemporaryDirectory(prefix="enose-bench-") as tmp_dir:
+        model_timings, accuracy = suite.measure_models(
+            df, args.models, lambda: make_classifier(args), args.features, args.target, tmp_dir, args.repeat
+        )
+    timings.update(model_timings)
+
+    report = {
+        "environment": suite.environment(),
+        "files": len(file_paths),
+        "rows": len(df),
+        "timings": timings,
+        "cv_accuracy": accuracy,
+    }
+    suite.write_report(report, args.output, args.compare)
+    return 0
+
+
+def cmd_serve(args) -> int:
+    from infrastructure import server
+
+    if not args.preload and not args.model_dir:
+        raise SystemExit("Укажите модели для сервера: --preload или --model-dir")
+    model_cache = server.ModelCache(
+        args.cache_size, max_batch_rows=args.max_batch_rows, max_wait_ms=args.max_wait_ms, model_dir=args.model_dir
+    )
+    for path in args.preload:
+        try:
+            print(f"Модель {model_cache.register(path)}: {os.path.abspath(path)}")
+        except ValueError as e:
+            raise SystemExit(str(e))
+
+    if args.unix:
+        if not hasattr(server, "UnixClassificationServer"):
+            raise SystemExit("Unix-сокеты не поддерживаются в этой системе")
+        try:
+            httpd = server.UnixClassificationServer(args.unix, model_cache, quiet=args.quiet)
+        except ValueError as e:
+            model_cache.close()
+            raise SystemExit(str(e))
+        print(f"Сервер классификации: unix:{args.unix}")
+    else:
+        httpd = server.ClassificationServer((args.host, args.port), model_cache, quiet=args.quiet)
+        print(f"Сервер классификации: http://{args.host}:{httpd.server_address[1]}")
+
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        model_cache.close()
+        if args.unix:
+            server.remove_stale_socket(args.unix)
+    return 0
+
+
+def ranges_argument(value: str) -> dict:
+    try:
+        return parse_value_ranges(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="enose", description="Enose без графического интерфейса")
+    parser.add_argument("--timings", action="store_true", help="вывести время и память по этапам в stderr")
+    parser.add_argument("--debug-dir", default=None, help="журнал замеров (JSON lines) и дампы cProfile в эту папку")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    csv_options = argparse.ArgumentParser(add_help=False)
+    csv_options.add_argument("--sep", default=";", help="разделитель CSV (по умолчанию ';')")
+    csv_options.add_argument("--decimal", default=",", help="десятичный знак (по умолчанию ',')")
+    csv_options.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="параллельная обработка файлов")
+    csv_options.add_argument("--float32", action="store_true", help="читать признаки как float32 (вдвое меньше памяти)")
+    csv_options.add_argument("--engine", choices=["c", "pyarrow"], default="c",
+                             help="движок read_csv; без установленного pyarrow используется 'c'")
+    csv_options.add_argument("--ranges", type=ranges_argument, default=DEFAULT_VALUE_RANGES,
+                             help="допустимые диапазоны признаков: строки вне них отбрасываются "
+                                  f"(по умолчанию '{format_value_ranges(DEFAULT_VALUE_RANGES)}', '' — без диапазонов)")
+
+    columns_options = argparse.ArgumentParser(add_help=False)
+    columns_options.add_argument("--features", type=lambda value: [col.strip() for col in value.split(",")],
+                                 default=DEFAULT_FEATURE_COLUMNS, help="столбцы признаков через запятую")
+    columns_options.add_argument("--target", default=DEFAULT_TARGET_COLUMN, help="целевой столбец")
+
+    search_options = argparse.ArgumentParser(add_help=False)
+    search_options.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="параллельных задач подбора")
+    search_options.add_argument("--backend", choices=["loky", "threading"], default="loky")
+    search_options.add_argument("--memory-mb", type=int, default=None, help="лимит памяти подбора, МБ")
+    search_options.add_argument("--strategy", choices=SEARCH_STRATEGIES, default="grid")
+    search_options.add_argument("--n-iter", type=int, default=10, help="кандидатов случайного поиска")
+    search_options.add_argument("--time-budget", type=float, default=None, help="лимит времени подбора, с")
+    search_options.add_argument("--seed", type=int, default=DEFAULT_SEARCH_SEED,
+                                help="зерно случайного поиска и последовательного деления")
+
+    preprocessing_options = argparse.ArgumentParser(add_help=False)
+    preprocessing_options.add_argument("--standardize", action="store_true", help="стандартизировать признаки")
+    preprocessing_options.add_argument("--baseline", type=float, default=None, metavar="QUANTILE",
+                                       help="вычесть базовую линию датчиков (квантиль показаний, например 0.05)")
+    preprocessing_options.add_argument("--compensate", action="store_true", help="компенсировать влажность и температуру")
+    preprocessing_options.add_argument("--rolling-window", type=int, default=0, help="окно скользящих признаков, строк")
+
+    train = subparsers.add_parser("train", parents=[csv_options, columns_options, search_options, preprocessing_options],
+                                  help="обучить модель")
+    train.add_argument("-m", "--model", choices=list(MODEL_SPECS), default="knn")
+    train.add_argument("-o", "--output", required=True, help="файл модели (.joblib)")
+    train.add_argument("files", nargs="+", help="CSV-файлы или шаблоны (поддерживается **)")
+    train.set_defaults(handler=cmd_train)
+
+    update = subparsers.add_parser("update", parents=[csv_options], help="дообучить модель на новых файлах")
+    update.add_argument("-M", "--model-path", required=True, help="файл модели (.joblib), обновляется на месте")
+    update.add_argument("-o", "--output", default=None, help="сохранить обновлённую модель в другой файл")
+    update.add_argument("files", nargs="+", help="CSV-файлы или шаблоны; уже использованные в модели пропускаются")
+    update.set_defaults(handler=cmd_update)
+
+    classify = subparsers.add_parser("classify", parents=[csv_options], help="классифицировать файлы")
+    classify.add_argument("-M", "--model-path", required=True, help="файл модели (.joblib)")
+    classify.add_argument("-o", "--output", default=None, help="CSV с результатами (по умолчанию — вывод в консоль)")
+    classify.add_argument("-f", "--follow", action="store_true",
+                          help="следить за дописываемым файлом ('-' — stdin) и классифицировать новые строки")
+    classify.add_argument("--window", type=int, default=1000, help="строк в скользящем окне режима --follow")
+    classify.add_argument("--poll", type=float, default=0.5, help="период проверки файла в режиме --follow, с")
+    classify.add_argument("files", nargs="+")
+    classify.set_defaults(handler=cmd_classify)
+
+    evaluate = subparsers.add_parser("evaluate", parents=[csv_options], help="проверить модель на размеченных файлах")
+    evaluate.add_argument("-M", "--model-path", required=True, help="файл модели (.joblib)")
+    evaluate.add_argument("files", nargs="+")
+    evaluate.set_defaults(handler=cmd_evaluate)
+
+    benchmark = subparsers.add_parser("benchmark", parents=[csv_options, columns_options, search_options, preprocessing_options],
+                                      help="замерить время разбора, обучения и классификации")
+    benchmark.add_argument("-m", "--models", nargs="+", choices=list(MODEL_SPECS), default=list(MODEL_SPECS))
+    benchmark.add_argument("--repeat", type=int, default=3)
+    benchmark.add_argument("--compare", default=None, help="JSON прошлого запуска для сравнения")
+    benchmark.add_argument("-o", "--output", default=None, help="файл JSON с результатами")
+    benchmark.add_argument("files", nargs="+")
+    benchmark.set_defaults(handler=cmd_benchmark)
+
+    serve = subparsers.add_parser("serve", help="сервер классификации с загруженными в память моделями")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--unix", default=None, help="путь к Unix-сокету вместо TCP-порта")
+    serve.add_argument("--cache-size", type=int, default=4, help="сколько моделей держать в памяти")
+    serve.add_argument("--max-batch-rows", type=int, default=4096, help="строк в одном вызове модели")
+    serve.add_argument("--max-wait-ms", type=float, default=5.0, help="ожидание соседних запросов для объединения, мс")
+    serve.add_argument("--preload", nargs="*", default=[],
+                       help="файлы моделей, загружаемые при старте; клиент выбирает модель по имени файла без расширения")
+    serve.add_argument("--model-dir", default=None,
+                       help="папка, из которой по запросу загружаются модели <имя>.joblib; другие файлы недоступны")
+    serve.add_argument("--quiet", action="store_true", help="не выводить журнал запросов")
+    serve.set_defaults(handler=cmd_serve)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    if args.debug_dir:
+        profiler.enable_debug(args.debug_dir)
+    try:
+        return args.handler(args)
+    finally:
+        if args.timings:
+            print("\n".join(profiler.report_lines()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+# Тесты импортируют модули из src (domain, infrastructure) так же, как cli.py и main.py
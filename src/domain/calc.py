@@ -1,10 +1,25 @@
+import datetime
+import os
+
 import numpy as np
 import pandas as pd
-from sklearn.neighbors import KNeighborsClassifier as KNN
-from sklearn.model_selection import GridSearchCV
-from sklearn.svm import SVC
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.linear_model import LogisticRegression
+
+from domain.labels import LabelIndex
+from domain.models import MODEL_SPECS
+from domain.profiling import profiler
+from domain.quality import check_quality
+from domain.streaming import SlidingWindow
+
+# sklearn и joblib импортируются при первом обучении (см. _search), а не при загрузке модуля
+
+# Стратегии подбора гиперпараметров
+SEARCH_STRATEGIES = ('grid', 'random', 'halving')
+
+# Оценка памяти одного процесса подбора в размерах обучающей выборки
+WORKER_MEMORY_FACTOR = 4
+
+# Зерно случайного поиска и последовательного деления по умолчанию: результаты подбора воспроизводимы
+DEFAULT_SEARCH_SEED = 0
 
 class Classifier:
     def __init__(self):
@@ -13,132 +28,444 @@ class Classifier:
         self.target_name = None
         self.best_score = None
         self.best_estimator_str = ""
-    
-    def set_model(self, model, feature_columns: list[str], target_column: str):
+
+        # Метаданные файла модели (см. infrastructure.modelstore)
+        self.metadata = {}
+
+        # Классы модели, сгруппированные по префиксу (air_001, air_002): строится при смене модели
+        self.label_index = None
+
+        # Файлы, на которых обучена модель, и журнал дообучений (см. update)
+        self.training_files = []
+        self.updates = []
+
+        # Параметры параллельного подбора гиперпараметров
+        self.n_jobs = os.cpu_count() or 1
+        self.search_backend = 'loky'
+        self.max_memory_mb = None
+
+        # Стратегия подбора: полный перебор, случайный поиск или последовательное деление
+        self.search_strategy = 'grid'
+        self.search_n_iter = 10
+        self.search_time_budget = None
+        self.search_random_state = DEFAULT_SEARCH_SEED
+
+        # Предобработка показаний (параметры SensorPreprocessor); None — признаки подаются в модель как есть
+        self.preprocessing = None
+
+        # Окно признаков, с которым обучена текущая модель (строк); 0 — модель получает только признаки
+        self.rolling_window = 0
+
+        # Проверка качества строк последней обучающей выборки (QualityReport)
+        self.training_quality = None
+
+        # Наблюдатель за прогрессом обучения (TrainingMonitor) — задаётся при фоновом обучении
+        self.monitor = None
+
+    def __getstate__(self):
+        # Для пула процессов: наблюдатель не передаётся
+        state = self.__dict__.copy()
+        state['monitor'] = None
+        return state
+
+    def set_monitor(self, monitor):
+        self.monitor = monitor
+
+    def set_search_params(self, n_jobs: int, backend: str = 'loky', max_memory_mb: int | None = None):
+        """
+        n_jobs — число параллельных обучений, backend — 'loky' (процессы) или 'threading' (потоки),
+        max_memory_mb — ограничение памяти: число процессов уменьшается так, чтобы копии данных в них уместились.
+        """
+        if backend not in ('loky', 'threading'):
+            raise ValueError(f"Неизвестный способ распараллеливания: {backend}")
+        self.n_jobs = max(1, int(n_jobs))
+        self.search_backend = backend
+        self.max_memory_mb = max_memory_mb
+
+    def set_search_strategy(self, strategy: str = 'grid', n_iter: int = 10, time_budget: float | None = None,
+                            random_state: int | None = DEFAULT_SEARCH_SEED):
+        """
+        strategy — 'grid', 'random' или 'halving'; n_iter — число кандидатов случайного поиска;
+        time_budget — лимит времени поиска в секундах (для 'grid' и 'random');
+        random_state — зерно случайного поиска и деления, None — новый выбор при каждом запуске.
+        """
+        if strategy not in SEARCH_STRATEGIES:
+            raise ValueError(f"Неизвестная стратегия подбора: {strategy}")
+        self.search_strategy = strategy
+        self.search_n_iter = max(1, int(n_iter))
+        self.search_time_budget = time_budget
+        self.search_random_state = random_state
+
+    def set_preprocessing(self, standardize: bool = False, baseline_quantile: float | None = None,
+                          compensate_environment: bool = False, window: int = 0):
+        """
+        Параметры SensorPreprocessor для следующего обучения. Если все преобразования выключены,
+        модель обучается на исходных признаках.
+        """
+        if baseline_quantile is not None and not 0 <= baseline_quantile <= 1:
+            raise ValueError("Квантиль базовой линии должен быть от 0 до 1")
+        if window < 0:
+            raise ValueError("Длина окна не может быть отрицательной")
+        config = dict(standardize=standardize, baseline_quantile=baseline_quantile,
+                      compensate_environment=compensate_environment, window=window)
+        enabled = standardize or baseline_quantile is not None or compensate_environment or window > 1
+        self.preprocessing = config if enabled else None
+
+    def set_training_files(self, file_paths: list[str]):
+        self.training_files = [os.path.abspath(path) for path in file_paths]
+
+    def set_model(self, model, feature_columns: list[str], target_column: str, label_index: LabelIndex | None = None,
+                  rolling_window: int = 0):
         self.model = model
         self.feature_names = feature_columns
         self.target_name = target_column
+        self.rolling_window = rolling_window
+        self.label_index = label_index or LabelIndex(getattr(model, "classes_", []))
+
+    def train(self, model_type: str, df: pd.DataFrame, feature_columns: list[str], target_column: str, quality=None):
+        """
+        Общий конвейер обучения для всех моделей из MODEL_SPECS: данные проверяются и
+        извлекаются в непрерывный массив, который живёт только на время обучения.
+        quality — QualityReport из FileParser.check_quality: строки берутся по его маске.
+        """
+        spec = MODEL_SPECS.get(model_type)
+        if spec is None:
+            raise ValueError(f"Неподдерживаемый тип модели: {model_type}")
+
+        with profiler.profile("Обучение"):
+            return self._train(spec, df, feature_columns, target_column, quality)
+
+    def _train(self, spec, df: pd.DataFrame, feature_columns: list[str], target_column: str, quality=None):
+        config = dict(self.preprocessing or {})
+        window = config.pop("window", 0)
+        window = window if window > 1 else 0
+        with profiler.stage("Обучение: подготовка выборки"):
+            x, y = self.training_matrix(df, feature_columns, target_column, quality, window=window)
+
+        # Обучаемая предобработка — первый шаг перебираемого Pipeline: на каждом блоке кросс-валидации
+        # она обучается только по обучающей части, и best_score не завышается
+        preprocessor = None
+        if config.get("standardize") or config.get("baseline_quantile") is not None or config.get("compensate_environment"):
+            from domain.preprocessing import SensorPreprocessor
+            preprocessor = SensorPreprocessor(feature_columns, **config)
+
+        with profiler.stage("Обучение: подбор параметров", model=spec.label, strategy=self.search_strategy, rows=len(x)):
+            if preprocessor is None and spec.search is not None and self.search_strategy in ('grid', 'random'):
+                searcher, best_estimator = self._custom_search(spec, x, y)
+            elif preprocessor is None:
+                searcher, best_estimator = self._search(
+                    spec.factory(), spec.params, spec.distributions, x, y,
+                    final_params=spec.final_params, **spec.search_kwargs
+                )
+            else:
+                from sklearn.pipeline import Pipeline
+                searcher, best_estimator = self._search(
+                    Pipeline([("prep", preprocessor), ("model", spec.factory())]),
+                    _step_params(spec.params, "model"), _step_params(spec.distributions, "model"), x, y,
+                    final_params=_step_params(spec.final_params, "model"), **spec.search_kwargs
+                )
+
+        self.model = best_estimator
+        self.rolling_window = window
+        self.feature_names = feature_columns
+        self.target_name = target_column
+        self.best_score = round(searcher.best_score_, 3)
+        self.best_estimator_str = str(best_estimator)
+        self.label_index = LabelIndex(self.model.classes_)
+        self.updates = []
 
-    def train_knn(self, df: pd.DataFrame, feature_columns: list[str], target_column: str):
-        for col in feature_columns:
-            if col not in df.columns:
-                raise ValueError(f"Отсутствует поле с признаком: {col}")
-        if target_column not in df.columns:
-            raise ValueError(f"Отсутствует поле: {target_column}")
+        return self.model
 
-        x = df[feature_columns].select_dtypes(include=['number']).dropna()
-        y = df[target_column].loc[x.index]
+    @property
+    def updates_incrementally(self) -> bool:
+        """
+        True, если для update() достаточно новых строк (KNN и модели с partial_fit),
+        False — если update() нужны все данные обучения.
+        """
+        from domain.incremental import update_mode
+        return self.model is not None and update_mode(self.model) != 'refit'
+
+    def update(self, df: pd.DataFrame, quality=None) -> str:
+        """
+        Дообучение текущей модели без подбора гиперпараметров.
+        KNN дописывает строки df в опорную выборку, модели с partial_fit обновляются на них же;
+        остальные модели обучаются заново на df с найденными параметрами — тогда df должен
+        содержать все данные обучения (см. updates_incrementally).
+        Возвращает способ обновления из domain.incremental.UPDATE_MODES.
+        """
+        if self.model is None:
+            raise ValueError("Классификатор не был обучен")
 
-        if x.empty or y.empty:
-            raise ValueError("Данные для обучения пусты или содержат пропущенные поля.")
+        from domain.incremental import update_model
 
-        params = {'n_neighbors': range(2, 8), 'weights': ['uniform', 'distance']}
-        grid_searcher = GridSearchCV(KNN(), param_grid=params, cv=5, scoring='accuracy', n_jobs=1, error_score='raise')
-        grid_searcher.fit(x, y)
+        with profiler.profile("Дообучение"):
+            with profiler.stage("Обучение: подготовка выборки"):
+                x, y = self.training_matrix(df, self.feature_names, self.target_name, quality, window=self.rolling_window)
+            if self.monitor is not None:
+                self.monitor.set_stage("Дообучение модели")
+            self.model, mode = update_model(self.model, x, y)
 
-        self.model = grid_searcher.best_estimator_
-        self.feature_names = feature_columns
-        self.target_name = target_column
-        self.best_score = round(grid_searcher.best_score_, 3)
-        self.best_estimator_str = str(grid_searcher.best_estimator_)
+        self.best_estimator_str = str(self.model)
+        self.label_index = LabelIndex(self.model.classes_)
+        self.updates.append({
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "mode": mode,
+            "rows": len(x),
+        })
+        return mode
 
-        return self.model
+    def train_knn(self, df: pd.DataFrame, feature_columns: list[str], target_column: str):
+        return self.train("knn", df, feature_columns, target_column)
 
     def train_svm(self, df: pd.DataFrame, feature_columns: list[str], target_column: str):
+        return self.train("svm", df, feature_columns, target_column)
+
+    def train_decision_tree(self, df: pd.DataFrame, feature_columns: list[str], target_column: str):
+        return self.train("decision_tree", df, feature_columns, target_column)
+
+    def train_logistic_regression(self, df: pd.DataFrame, feature_columns: list[str], target_column: str):
+        return self.train("logistic_regression", df, feature_columns, target_column)
+
+    def training_matrix(self, df: pd.DataFrame, feature_columns: list[str], target_column: str, quality=None,
+                        window: int = 0):
+        """
+        Признаки и метки пригодных строк. Без quality строки проверяются здесь же (только пропуски),
+        итог проверки сохраняется в training_quality.
+        window > 1 — дописать признаки скользящего окна, отдельно для каждого файла
+        (границы файлов — df.attrs["file_rows"] из FileParser; без них весь df считается одним файлом).
+        """
         for col in feature_columns:
             if col not in df.columns:
                 raise ValueError(f"Отсутствует поле с признаком: {col}")
         if target_column not in df.columns:
             raise ValueError(f"Отсутствует поле: {target_column}")
 
-        x = df[feature_columns].select_dtypes(include=['number']).dropna()
-        y = df[target_column].loc[x.index]
+        non_numeric = [col for col in feature_columns if not pd.api.types.is_numeric_dtype(df[col])]
+        if non_numeric:
+            raise ValueError(f"Поля признаков не являются числовыми: {non_numeric}")
 
-        if x.empty or y.empty:
+        # Одна копия данных: непрерывный массив признаков без отброшенных строк
+        features = df[feature_columns]
+        dtype = np.float32 if all(features.dtypes == np.float32) else np.float64
+        x = features.to_numpy(dtype=dtype)
+        report = quality if quality is not None else check_quality(
+            ((col, x[:, i]) for i, col in enumerate(feature_columns)), rows=len(x)
+        )
+        if report.rows != len(x):
+            raise ValueError("Маска проверки качества не соответствует числу строк данных")
+        # Отчёт мог быть построен по другому списку признаков: пропуски в остальных тоже отбрасываются
+        report = report.covering((col, x[:, i]) for i, col in enumerate(feature_columns))
+        complete = report.valid
+        x = np.ascontiguousarray(x) if complete.all() else x[complete]
+        y = np.asarray(df[target_column])[complete]
+
+        if window > 1:
+            from domain.preprocessing import add_rolling_features, sensor_columns
+            file_rows = df.attrs.get("file_rows")
+            segments = None
+            if file_rows and sum(file_rows) == len(df):
+                segments = np.repeat(np.arange(len(file_rows)), file_rows)[complete]
+            x = add_rolling_features(x, window, sensor_columns(feature_columns), segments)
+
+        if x.size == 0 or y.size == 0:
             raise ValueError("Данные для обучения пусты или содержат пропущенные поля.")
 
-        params = {
-            'C': [0.1, 1, 10],
-            'kernel': ['linear', 'rbf', 'poly'],
-            'probability': [True]
-        }
+        # Массив не запоминается: копия выборки не должна жить в окне или сервере после обучения
+        self.training_quality = report
+        return x, y
+
+    def _search(self, estimator, params, distributions, x, y, final_params=None, **kwargs):
+        """
+        Подбор гиперпараметров выбранной стратегией. Возвращает объект поиска и итоговую модель;
+        final_params применяются только к итоговой модели, обученной на всех данных.
+        """
+        from joblib import parallel_config
+        from sklearn.base import clone
+        from domain.search import make_search
+
+        n_jobs = self._effective_jobs(x)
+        searcher = make_search(
+            self.search_strategy,
+            estimator,
+            params,
+            distributions,
+            n_iter=self.search_n_iter,
+            time_budget=self.search_time_budget,
+            monitor=self.monitor,
+            random_state=self.search_random_state,
+            cv=5,
+            scoring='accuracy',
+            n_jobs=n_jobs,
+            pre_dispatch='n_jobs',
+            refit=final_params is None,
+            **kwargs
+        )
+        if self.monitor is not None:
+            self.monitor.set_stage("Подбор параметров")
+        with parallel_config(backend=self.search_backend, n_jobs=n_jobs):
+            searcher.fit(x, y)
+
+        if final_params is None:
+            return searcher, searcher.best_estimator_
+
+        if self.monitor is not None:
+            self.monitor.set_stage("Обучение итоговой модели")
+        best_estimator = clone(estimator).set_params(**searcher.best_params_, **final_params)
+        with profiler.stage("Обучение: итоговая модель"):
+            best_estimator.fit(x, y)
+        return searcher, best_estimator
+
+    def _custom_search(self, spec, x, y):
+        from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+        if self.search_strategy == 'random':
+            candidates = list(ParameterSampler(
+                spec.distributions, n_iter=self.search_n_iter, random_state=self.search_random_state
+            ))
+        else:
+            candidates = list(ParameterGrid(spec.params))
+        if self.monitor is not None:
+            self.monitor.set_stage("Подбор параметров")
+        return spec.search(
+            x, y, candidates, monitor=self.monitor, time_budget=self.search_time_budget,
+            n_jobs=self._effective_jobs(x), backend=self.search_backend
+        )
 
-        grid_searcher = GridSearchCV(SVC(), param_grid=params, cv=5, scoring='accuracy', n_jobs=1, error_score='raise')
-        grid_searcher.fit(x, y)
+    def _effective_jobs(self, x) -> int:
+        if not self.max_memory_mb or self.search_backend != 'loky':
+            return self.n_jobs
+        # Каждый процесс держит копию обучающей выборки и промежуточные массивы модели
+        per_worker = max(1, x.nbytes * WORKER_MEMORY_FACTOR)
+        return max(1, min(self.n_jobs, int(self.max_memory_mb * 1024 * 1024 // per_worker)))
+
+    def predict(self, x, with_proba: bool = True):
+        """
+        Один проход модели: метки берутся как argmax вероятностей по model.classes_,
+        поэтому метки и вероятности всегда согласованы.
+        При with_proba=False (или если модель не умеет predict_proba) вероятности не считаются.
+        """
+        # Модели, обученные на массиве, получают массив: имена столбцов проверены в _classification_matrix
+        if isinstance(x, pd.DataFrame) and not hasattr(self.model, "feature_names_in_"):
+            x = x.to_numpy()
+        elif not isinstance(x, pd.DataFrame) and hasattr(self.model, "feature_names_in_"):
+            x = pd.DataFrame(x, columns=self.model.feature_names_in_)
+
+        with profiler.stage("Классификация: модель", rows=len(x)):
+            if with_proba and hasattr(self.model, "predict_proba"):
+                probs = self.model.predict_proba(x)
+                preds = self.model.classes_[np.argmax(probs, axis=1)]
+                return preds, probs
+            return self.model.predict(x), None
+
+    def rolling_state(self):
+        """Состояние окна для одного файла или потока (RollingWindow) или None, если модель обучена без окна."""
+        if not self.rolling_window:
+            return None
+        from domain.preprocessing import RollingWindow, sensor_columns
+        return RollingWindow(self.rolling_window, sensor_columns(self.feature_names))
+
+    def model_input(self, x, rolling=None):
+        """
+        Вход модели для строк одного файла по порядку. Если модель обучена с окном, дописываются
+        его признаки; rolling — состояние окна потока (rolling_state), без него окно начинается с первой строки x.
+        Строки разных файлов или запросов передаются отдельными вызовами.
+        """
+        if not self.rolling_window:
+            return x
+        if rolling is None:
+            rolling = self.rolling_state()
+        return rolling.transform(x.to_numpy(dtype=float) if isinstance(x, pd.DataFrame) else np.asarray(x, dtype=float))
+
+    def classify_batch(self, df: pd.DataFrame, with_proba: bool = True, quality=None):
+        """
+        quality — QualityReport из FileParser.check_quality: классифицируются строки по его маске.
+        """
+        with profiler.stage("Классификация: подготовка данных"):
+            x = self._classification_matrix(df, quality)
 
-        self.model = grid_searcher.best_estimator_
-        self.feature_names = feature_columns
-        self.target_name = target_column
-        self.best_score = round(grid_searcher.best_score_, 3)
-        self.best_estimator_str = str(grid_searcher.best_estimator_)
+        if x.empty:
+            raise ValueError("В файле с данными нет строк, подходящих для классификации")
 
-        return self.model
+        preds, probs = self.predict(self.model_input(x), with_proba)
 
-    def train_decision_tree(self, df: pd.DataFrame, feature_columns: list[str], target_column: str):
-        for col in feature_columns:
-            if col not in df.columns:
-                raise ValueError(f"Отсутствует поле с признаком: {col}")
-        if target_column not in df.columns:
-            raise ValueError(f"Отсутствует поле: {target_column}")
+        values, counts = np.unique(preds, return_counts=True)
+        majority_class = values[np.argmax(counts)]
+        avg_proba = np.round(np.mean(probs, axis=0), 3) if probs is not None else None
 
-        x = df[feature_columns].select_dtypes(include=['number']).dropna()
-        y = df[target_column].loc[x.index]
+        return majority_class, avg_proba, preds, probs
 
-        if x.empty or y.empty:
-            raise ValueError("Данные для обучения пусты или содержат пропущенные поля.")
+    def evaluate(self, df: pd.DataFrame):
+        """
+        Проверка на размеченных данных: возвращает долю верных ответов и число проверенных строк.
+        """
+        x = self._classification_matrix(df)
+        if self.target_name not in df.columns:
+            raise ValueError(f"Отсутствует поле: {self.target_name}")
 
-        params = {
-            'max_depth': [3, 5, 10, None],
-            'criterion': ['gini', 'entropy']
-        }
+        x = x[df.loc[x.index, self.target_name].notna()]
+        if x.empty:
+            raise ValueError("В файле с данными нет строк, подходящих для классификации")
 
-        grid_searcher = GridSearchCV(DecisionTreeClassifier(), param_grid=params, cv=5, scoring='accuracy', n_jobs=1)
-        grid_searcher.fit(x, y)
+        preds, probs = self.predict(self.model_input(x), with_proba=False)
+        expected = np.asarray(df.loc[x.index, self.target_name]).astype(str)
+        accuracy = float(np.mean(preds.astype(str) == expected))
+        return accuracy, len(x)
+
+    def classify_chunks(self, chunks, with_proba: bool = True, quality_check=None):
+        """
+        Потоковая классификация: принимает итератор частей файла и после каждой части
+        возвращает промежуточный результат (класс большинства, средние вероятности,
+        число голосов по классам, число обработанных строк).
+        Память ограничена размером одной части.
+        quality_check — функция DataFrame -> QualityReport (FileParser.check_quality) для каждой части.
+        """
+        if self.model is None:
+            raise ValueError("Классификатор не был обучен")
 
-        self.model = grid_searcher.best_estimator_
-        self.feature_names = feature_columns
-        self.target_name = target_column
-        self.best_score = round(grid_searcher.best_score_, 3)
-        self.best_estimator_str = str(grid_searcher.best_estimator_)
+        classes = self.model.classes_
+        votes = np.zeros(len(classes), dtype=np.int64)
+        proba_sum = np.zeros(len(classes))
+        total_rows = 0
+        rolling = self.rolling_state()
 
-        return self.model
-    
-    def train_logistic_regression(self, df: pd.DataFrame, feature_columns: list[str], target_column: str):
-        for col in feature_columns:
-            if col not in df.columns:
-                raise ValueError(f"Отсутствует поле с признаком: {col}")
-        if target_column not in df.columns:
-            raise ValueError(f"Отсутствует поле: {target_column}")
+        for chunk in chunks:
+            x = self._classification_matrix(chunk, quality_check(chunk) if quality_check is not None else None)
+            if x.empty:
+                continue
 
-        x = df[feature_columns].select_dtypes(include=['number']).dropna()
-        y = df[target_column].loc[x.index]
+            preds, probs = self.predict(self.model_input(x, rolling), with_proba)
 
-        if x.empty or y.empty:
-            raise ValueError("Данные для обучения пусты или содержат пропущенные поля.")
+            votes += np.bincount(np.searchsorted(classes, preds), minlength=len(classes))
+            if probs is not None:
+                proba_sum += probs.sum(axis=0)
+            total_rows += len(x)
 
-        params = {
-            'C': [0.01, 0.1, 1, 10],
-            'solver': ['lbfgs', 'liblinear']
-        }
+            majority_class = classes[np.argmax(votes)]
+            avg_proba = np.round(proba_sum / total_rows, 3) if probs is not None else None
+            yield majority_class, avg_proba, votes.copy(), total_rows
 
-        grid_searcher = GridSearchCV(
-            LogisticRegression(max_iter=1000), 
-            param_grid=params, 
-            cv=5, 
-            scoring='accuracy',
-            n_jobs=1
-        )
-        grid_searcher.fit(x, y)
+        if total_rows == 0:
+            raise ValueError("В файле с данными нет строк, подходящих для классификации")
 
-        self.model = grid_searcher.best_estimator_
-        self.feature_names = feature_columns
-        self.target_name = target_column
-        self.best_score = round(grid_searcher.best_score_, 3)
-        self.best_estimator_str = str(grid_searcher.best_estimator_)
+    def classify_window(self, chunks, window_rows: int = 1000, with_proba: bool = True, quality_check=None):
+        """
+        Классификация непрерывного потока: каждая строка классифицируется один раз,
+        после каждой части возвращается SlidingWindow со статистикой по последним window_rows строкам.
+        quality_check — как в classify_chunks.
+        """
+        if self.model is None:
+            raise ValueError("Классификатор не был обучен")
 
-        return self.model
+        window = SlidingWindow(self.model.classes_, window_rows)
+        rolling = self.rolling_state()
+        for chunk in chunks:
+            x = self._classification_matrix(chunk, quality_check(chunk) if quality_check is not None else None)
+            if x.empty:
+                continue
+            window.update(*self.predict(self.model_input(x, rolling), with_proba))
+            yield window
 
-    def classify_batch(self, df: pd.DataFrame):
+    def _classification_matrix(self, df: pd.DataFrame, quality=None) -> pd.DataFrame:
         if self.model is None:
             raise ValueError("Классификатор не был обучен")
 
@@ -148,17 +475,25 @@ class Classifier:
         if missing:
             raise ValueError(f"Отсутствуют необходимые поля признаков: {missing}")
 
-        x = df[self.feature_names].apply(pd.to_numeric, errors='coerce')
-        x = x.dropna()
-
-        if x.empty:
-            raise ValueError("В файле с данными нет строк, подходящих для классификации")
-
-        preds = self.model.predict(x)
-        probs = self.model.predict_proba(x)
-
-        values, counts = np.unique(preds, return_counts=True)
-        majority_class = values[np.argmax(counts)]
-        avg_proba = np.round(np.mean(probs, axis=0), 3)
-
-        return majority_class, avg_proba, preds, probs
+        # Столбцы из FileParser уже числовые; преобразование нужно только для других источников
+        x = df[self.feature_names]
+        if not all(pd.api.types.is_numeric_dtype(x[col]) for col in self.feature_names):
+            x = x.apply(pd.to_numeric, errors='coerce')
+
+        if quality is None:
+            quality = check_quality(((col, x[col].to_numpy(dtype=float)) for col in self.feature_names), rows=len(x))
+        elif quality.rows != len(x):
+            raise ValueError("Маска проверки качества не соответствует числу строк данных")
+        else:
+            # Пропуски в признаках модели, которые отчёт не проверял, не должны дойти до predict
+            quality = quality.covering((col, x[col].to_numpy(dtype=float)) for col in self.feature_names)
+        return x[quality.valid]
+
+
+def _step_params(params, step: str):
+    """Параметры оценщика как параметры шага step в Pipeline: {'C': ...} -> {'model__C': ...}."""
+    if params is None:
+        return None
+    if isinstance(params, list):
+        return [_step_params(grid, step) for grid in params]
+    return {f"{step}__{name}": values for name, values in params.items()}
@@ -0,0 +1,93 @@
+import copy
+
+import numpy as np
+
+# Способы дообучения (см. update_model) и их подписи для окна и командной строки
+UPDATE_MODES = {
+    'append': "добавление строк в опорную выборку KNN",
+    'partial_fit': "онлайн-обновление (partial_fit)",
+    'refit': "переобучение с найденными параметрами",
+}
+
+
+def pipeline_steps(model) -> list:
+    """Шаги модели по порядку, включая вложенные Pipeline; последний — оценщик."""
+    if hasattr(model, "steps"):
+        steps = []
+        for _, step in model.steps:
+            steps.extend(pipeline_steps(step))
+        return steps
+    return [model]
+
+
+def update_mode(model) -> str:
+    from sklearn.neighbors import KNeighborsClassifier
+
+    estimator = pipeline_steps(model)[-1]
+    if isinstance(estimator, KNeighborsClassifier):
+        return 'append'
+    if hasattr(estimator, "partial_fit"):
+        return 'partial_fit'
+    return 'refit'
+
+
+def update_model(model, x: np.ndarray, y: np.ndarray):
+    """
+    Дообучение без подбора параметров. Для 'append' и 'partial_fit' x, y — только новые строки,
+    преобразования перед оценщиком (предобработка, шкала) не меняются.
+    Для 'refit' x, y — все данные: преобразования и оценщик обучаются заново с прежними параметрами.
+    Обновляется копия модели: при ошибке исходная модель не меняется, а копия не ссылается
+    на отображённый в память файл, который затем перезаписывается.
+    Возвращает обновлённую модель и способ обновления.
+    """
+    mode = update_mode(model)
+    model = copy.deepcopy(model)
+    steps = pipeline_steps(model)
+    transforms, estimator = steps[:-1], steps[-1]
+
+    if mode == 'refit':
+        for transform in transforms:
+            x = transform.fit_transform(x, y)
+        _warm_refit(estimator, x, y)
+        return model, mode
+
+    for transform in transforms:
+        x = transform.transform(x)
+    if mode == 'append':
+        _append_neighbors(estimator, x, y)
+    else:
+        _partial_fit(estimator, x, y)
+    return model, mode
+
+
+def _append_neighbors(estimator, x, y) -> None:
+    # Опорная выборка KNN — это и есть модель: новые строки дописываются, индекс строится заново
+    x_old = np.asarray(estimator._fit_X)
+    y_old = estimator.classes_[estimator._y]
+    dtype = np.result_type(x_old.dtype, x.dtype)
+    estimator.fit(np.concatenate([x_old, x]).astype(dtype, copy=False), np.concatenate([y_old, y]))
+
+
+def _partial_fit(estimator, x, y) -> None:
+    unknown = np.setdiff1d(np.unique(y), estimator.classes_)
+    if len(unknown):
+        raise ValueError(
+            f"Новые классы {[str(label) for label in unknown]} нельзя добавить дообучением — нужно полное обучение"
+        )
+    estimator.partial_fit(x, y)
+
+
+def _warm_refit(estimator, x, y) -> None:
+    # Линейные модели начинают с текущих коэффициентов. У ансамблей warm_start означает
+    # добавление деревьев к прежним, поэтому он используется только при наличии coef_
+    # и только если набор классов не изменился
+    if "warm_start" not in estimator.get_params() or not hasattr(estimator, "coef_"):
+        estimator.fit(x, y)
+        return
+
+    warm_start = estimator.warm_start
+    estimator.set_params(warm_start=np.array_equal(np.unique(y), estimator.classes_))
+    try:
+        estimator.fit(x, y)
+    finally:
+        estimator.set_params(warm_start=warm_start)
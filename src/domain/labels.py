@@ -0,0 +1,61 @@
+import re
+
+# Похожие классы — варианты одного вещества с числовым суффиксом: air_001, air_002
+SUFFIX_PATTERN = re.compile(r"^(.*)_\d+$")
+
+
+def label_prefix(label) -> str | None:
+    match = SUFFIX_PATTERN.match(str(label))
+    return match.group(1) if match else None
+
+
+class LabelIndex:
+    """
+    Классы модели, сгруппированные по префиксу. Строится один раз за O(n) и хранится в файле модели;
+    проверка «есть ли у класса похожие» и поиск группы — обращения к словарю.
+    Пример: ['air_001', 'air_002', 'ethanol'] → группа 'air' из двух классов, 'ethanol' без группы.
+    """
+
+    def __init__(self, labels=(), groups: dict | None = None):
+        """
+        groups — готовые группы {префикс: [классы]} из файла модели; без них группы строятся по labels.
+        """
+        self.labels = [str(label) for label in labels]
+        if groups is None:
+            groups = {}
+            for label in self.labels:
+                prefix = label_prefix(label)
+                if prefix is not None:
+                    groups.setdefault(prefix, []).append(label)
+        self.groups = {prefix: list(members) for prefix, members in groups.items()}
+        self._prefix_of = {label: prefix for prefix, members in self.groups.items() for label in members}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LabelIndex":
+        return cls(data.get("labels", []), groups=data.get("groups", {}))
+
+    def to_dict(self) -> dict:
+        return {"labels": list(self.labels), "groups": {prefix: list(members) for prefix, members in self.groups.items()}}
+
+    def has_similar(self, label) -> bool:
+        prefix = self._prefix_of.get(str(label))
+        return prefix is not None and len(self.groups[prefix]) > 1
+
+    @property
+    def has_conflicts(self) -> bool:
+        return any(len(members) > 1 for members in self.groups.values())
+
+    def group_of(self, label) -> str:
+        """Имя группы для объединения на диаграмме: префикс, если у класса есть похожие, иначе сам класс."""
+        label = str(label)
+        return self._prefix_of[label] if self.has_similar(label) else label
+
+    def merge(self, labels, values) -> tuple[list[str], list[float]]:
+        """
+        Складывает значения (доли, голоса) похожих классов. Группы идут в порядке первого появления.
+        """
+        merged = {}
+        for label, value in zip(labels, values):
+            group = self.group_of(label)
+            merged[group] = merged.get(group, 0) + value
+        return list(merged), list(merged.values())
@@ -0,0 +1,150 @@
+# Модуль не импортирует sklearn и scipy при загрузке: оценщики и распределения создаются
+# только при обучении, чтобы окно приложения открывалось быстро
+
+# Схема данных электронного носа по умолчанию
+HUMIDITY_COLUMN = "Влажность"
+TEMPERATURE_COLUMN = "Температура"
+DEFAULT_FEATURE_COLUMNS = [
+    "Датчик1", "Датчик2", "Датчик3", "Датчик4", "Датчик5", "Датчик6", "Датчик7", "Датчик8",
+    HUMIDITY_COLUMN, TEMPERATURE_COLUMN
+]
+DEFAULT_TARGET_COLUMN = "Материал"
+
+# Допустимые значения по умолчанию для проверки качества строк (см. domain.quality)
+DEFAULT_VALUE_RANGES = {HUMIDITY_COLUMN: (0.0, 100.0)}
+
+
+class ModelSpec:
+    """
+    Описание модели для Classifier.train: как создать оценщик, какую сетку перебирать
+    при полном переборе и делении, из каких распределений брать кандидатов при случайном поиске.
+    final_params применяются только к итоговой модели, search_kwargs передаются в объект поиска.
+    distributions можно задать функцией, возвращающей словарь, — тогда scipy импортируется только при поиске.
+    search — собственный подбор для стратегий 'grid' и 'random' вместо GridSearchCV/RandomizedSearchCV:
+    search(x, y, candidates, monitor, time_budget, n_jobs, backend) -> (результат с best_score_, итоговая модель).
+    """
+
+    def __init__(self, label: str, factory, params: dict, distributions,
+                 final_params: dict | None = None, search_kwargs: dict | None = None, search=None):
+        self.label = label
+        self.factory = factory
+        self.params = params
+        self._distributions = distributions
+        self.final_params = final_params
+        self.search_kwargs = search_kwargs or {}
+        self.search = search
+
+    @property
+    def distributions(self) -> dict:
+        return self._distributions() if callable(self._distributions) else self._distributions
+
+
+def _knn():
+    from sklearn.neighbors import KNeighborsClassifier
+    return KNeighborsClassifier()
+
+
+def _knn_distributions():
+    from scipy.stats import randint
+    return {'n_neighbors': randint(2, 16), 'weights': ['uniform', 'distance']}
+
+
+def _knn_search(x, y, candidates, monitor=None, time_budget=None, n_jobs=1, backend='loky'):
+    # Одно дерево на блок кросс-валидации для всех кандидатов, дерево итоговой модели сохраняется вместе с ней
+    from domain.neighbors import shared_index_search
+    return shared_index_search(
+        x, y, candidates, cv=5, monitor=monitor, time_budget=time_budget, n_jobs=n_jobs, backend=backend
+    )
+
+
+def _svm():
+    from sklearn.svm import SVC
+    return SVC()
+
+
+def _svm_distributions():
+    from scipy.stats import loguniform
+    return {'C': loguniform(1e-2, 1e2), 'kernel': ['linear', 'rbf', 'poly']}
+
+
+def _decision_tree():
+    from sklearn.tree import DecisionTreeClassifier
+    return DecisionTreeClassifier()
+
+
+def _decision_tree_distributions():
+    from scipy.stats import randint
+    return {
+        'max_depth': [None] + list(range(2, 21)),
+        'criterion': ['gini', 'entropy'],
+        'min_samples_leaf': randint(1, 10)
+    }
+
+
+def _logistic_regression():
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(max_iter=1000)
+
+
+def _logistic_regression_distributions():
+    from scipy.stats import loguniform
+    return {'C': loguniform(1e-3, 1e2), 'solver': ['lbfgs', 'liblinear']}
+
+
+def _sgd():
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+    # Без шкалы градиентный спуск плохо сходится на показаниях датчиков (сотни единиц).
+    # Шкала фиксируется при обучении: дообучение через partial_fit меняет только коэффициенты
+    return Pipeline([("scale", StandardScaler()), ("sgd", SGDClassifier(loss='log_loss', max_iter=1000, tol=1e-3))])
+
+
+def _sgd_distributions():
+    from scipy.stats import loguniform
+    return {'sgd__alpha': loguniform(1e-6, 1e-1), 'sgd__penalty': ['l2', 'l1', 'elasticnet']}
+
+
+MODEL_SPECS = {
+    "knn": ModelSpec(
+        "KNN",
+        _knn,
+        params={'n_neighbors': range(2, 8), 'weights': ['uniform', 'distance']},
+        distributions=_knn_distributions,
+        search_kwargs={'error_score': 'raise'},
+        search=_knn_search
+    ),
+    # Калибровка вероятностей (probability=True) — это внутренняя 5-кратная проверка на каждом кандидате,
+    # поэтому при подборе она отключена и включается только для итоговой модели
+    "svm": ModelSpec(
+        "SVM",
+        _svm,
+        params={'C': [0.1, 1, 10], 'kernel': ['linear', 'rbf', 'poly']},
+        distributions=_svm_distributions,
+        final_params={'probability': True},
+        search_kwargs={'error_score': 'raise'}
+    ),
+    "decision_tree": ModelSpec(
+        "Decision Tree",
+        _decision_tree,
+        params={'max_depth': [3, 5, 10, None], 'criterion': ['gini', 'entropy']},
+        distributions=_decision_tree_distributions
+    ),
+    "logistic_regression": ModelSpec(
+        "Logistic Regression",
+        _logistic_regression,
+        params={'C': [0.01, 0.1, 1, 10], 'solver': ['lbfgs', 'liblinear']},
+        distributions=_logistic_regression_distributions
+    ),
+    # Линейная модель с partial_fit: новые сеансы калибровки добавляются без переобучения (Classifier.update)
+    "sgd": ModelSpec(
+        "SGD",
+        _sgd,
+        params={'sgd__alpha': [1e-5, 1e-4, 1e-3, 1e-2], 'sgd__penalty': ['l2', 'elasticnet']},
+        distributions=_sgd_distributions
+    ),
+}
+
+
+def register_model(model_type: str, spec: ModelSpec) -> None:
+    MODEL_SPECS[model_type] = spec
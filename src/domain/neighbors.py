@@ -0,0 +1,183 @@
+import time
+
+import numpy as np
+from sklearn.model_selection import check_cv
+from sklearn.neighbors import KDTree, KNeighborsClassifier, NearestNeighbors
+
+# Строк в одном запросе к дереву: ограничивает память под массивы расстояний и индексов
+QUERY_BATCH_ROWS = 65_536
+
+# Строк из проверочного блока, на которых сравнивается скорость дерева и полного перебора
+PROBE_ROWS = 1024
+
+
+class BruteIndex:
+    """
+    Полный перебор с интерфейсом дерева. На данных с большой внутренней размерностью
+    деревья почти не отсекают ветви и проигрывают перебору блоками.
+    """
+
+    def __init__(self, x):
+        self._nn = NearestNeighbors(algorithm='brute').fit(x)
+
+    def query(self, x, k):
+        return self._nn.kneighbors(x, k)
+
+
+def choose_leaf_size(n_samples: int) -> int:
+    # Малые листья ускоряют запрос, большие — построение; на выборках от сотен тысяч строк
+    # выгоднее листья 32–64 (замерено на 10–20 признаках)
+    return int(np.clip(np.sqrt(n_samples) / 8, 16, 64))
+
+
+def build_index(x_train: np.ndarray, x_probe: np.ndarray, k: int):
+    """
+    Строит kd-дерево и сравнивает его на пробных запросах с полным перебором.
+    Возвращает индекс, algorithm для KNeighborsClassifier и размер листа.
+    """
+    leaf_size = choose_leaf_size(len(x_train))
+    tree = KDTree(x_train, leaf_size=leaf_size)
+    probe = x_probe[:PROBE_ROWS]
+
+    started = time.perf_counter()
+    tree.query(probe, k=k)
+    tree_time = time.perf_counter() - started
+
+    brute = BruteIndex(x_train)
+    started = time.perf_counter()
+    brute.query(probe, k)
+    brute_time = time.perf_counter() - started
+
+    if brute_time < tree_time:
+        return brute, 'brute', leaf_size
+    return tree, 'kd_tree', leaf_size
+
+
+def query_batched(index, x: np.ndarray, k: int):
+    distances = np.empty((len(x), k))
+    indices = np.empty((len(x), k), dtype=np.intp)
+    for start in range(0, len(x), QUERY_BATCH_ROWS):
+        stop = start + QUERY_BATCH_ROWS
+        distances[start:stop], indices[start:stop] = index.query(x[start:stop], k)
+    return distances, indices
+
+
+def vote(neighbor_codes: np.ndarray, distances: np.ndarray, n_classes: int, weights: str) -> np.ndarray:
+    """
+    Голосование соседей так же, как в KNeighborsClassifier: при весах 'distance'
+    строки с нулевым расстоянием учитывают только совпавшие точки; ничья — в пользу меньшего класса.
+    """
+    if weights == 'uniform':
+        w = np.ones_like(distances)
+    else:
+        with np.errstate(divide='ignore'):
+            w = 1.0 / distances
+        exact = np.isinf(w)
+        exact_rows = exact.any(axis=1)
+        w[exact_rows] = exact[exact_rows]
+
+    n_rows = len(neighbor_codes)
+    cells = (np.arange(n_rows)[:, None] * n_classes + neighbor_codes).ravel()
+    scores = np.bincount(cells, weights=w.ravel(), minlength=n_rows * n_classes).reshape(n_rows, n_classes)
+    return np.argmax(scores, axis=1)
+
+
+class NeighborSearchResult:
+    """
+    Результат подбора с общим индексом — те же поля, что у GridSearchCV, которые использует Classifier.
+    """
+
+    def __init__(self, candidates: list[dict], scores: np.ndarray):
+        self.cv_results_ = {
+            'params': candidates,
+            'mean_test_score': scores,
+            'rank_test_score': np.argsort(np.argsort(-scores)) + 1,
+        }
+        best = int(np.argmax(scores))
+        self.best_index_ = best
+        self.best_params_ = candidates[best]
+        self.best_score_ = float(scores[best])
+
+
+def fold_scores(index, x_train_codes: np.ndarray, x_test: np.ndarray, expected: np.ndarray, candidates: list[dict],
+                n_classes: int, k: int) -> np.ndarray:
+    """Доля верных ответов каждого кандидата на одном блоке: один запрос с наибольшим k на всех."""
+    distances, indices = query_batched(index, x_test, k)
+    neighbor_codes = x_train_codes[indices]
+    scores = np.empty(len(candidates))
+    for i, candidate in enumerate(candidates):
+        n = min(candidate['n_neighbors'], k)
+        predicted = vote(neighbor_codes[:, :n], distances[:, :n], n_classes, candidate.get('weights', 'uniform'))
+        scores[i] = np.mean(predicted == expected)
+    return scores
+
+
+def _evaluate_fold(x, codes, train_idx, test_idx, candidates, n_classes, k, algorithm, leaf_size):
+    # Выполняется в процессе или потоке joblib: индекс блока строится на месте
+    index = BruteIndex(x[train_idx]) if algorithm == 'brute' else KDTree(x[train_idx], leaf_size=leaf_size)
+    return fold_scores(index, codes[train_idx], x[test_idx], codes[test_idx], candidates, n_classes, k)
+
+
+def shared_index_search(x: np.ndarray, y: np.ndarray, candidates: list[dict], cv=5,
+                        monitor=None, time_budget: float | None = None, n_jobs: int = 1, backend: str = 'loky'):
+    """
+    Подбор n_neighbors и weights для KNN: в каждом блоке кросс-валидации индекс строится один раз,
+    и один пакетный запрос с наибольшим k обслуживает всех кандидатов —
+    вместо отдельного обучения и запроса для каждой пары (кандидат, блок).
+    Блоки после первого обрабатываются параллельно порциями по n_jobs (joblib, backend 'loky' или 'threading');
+    между порциями проверяются отмена и лимит времени.
+    Возвращает NeighborSearchResult и итоговую модель, обученную на всей выборке.
+    """
+    from joblib import Parallel, delayed, effective_n_jobs
+
+    classes, codes = np.unique(y, return_inverse=True)
+    cv = check_cv(cv, y, classifier=True)
+    splits = list(cv.split(x, codes))
+    max_k = max(candidate['n_neighbors'] for candidate in candidates)
+    # -1 и None раскрываются в число процессов, чтобы порции были по размеру пула
+    n_jobs = effective_n_jobs(n_jobs)
+
+    if monitor is not None:
+        monitor.candidates_added(len(candidates), len(splits))
+    deadline = time.monotonic() + time_budget if time_budget is not None else None
+
+    # Способ поиска выбирается замером на первом блоке и затем используется везде, включая итоговую модель
+    train_idx, test_idx = splits[0]
+    k = min(max_k, len(train_idx))
+    index, algorithm, leaf_size = build_index(x[train_idx], x[test_idx], k)
+    correct = fold_scores(index, codes[train_idx], x[test_idx], codes[test_idx], candidates, len(classes), k)
+    del index
+    tested = 1
+    if monitor is not None:
+        monitor.folds_evaluated(len(candidates))
+
+    rest = splits[1:]
+    with Parallel(n_jobs=n_jobs, backend=backend) as parallel:
+        for start in range(0, len(rest), n_jobs):
+            if monitor is not None:
+                monitor.check_cancelled()
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            portion = rest[start:start + n_jobs]
+            results = parallel(
+                delayed(_evaluate_fold)(
+                    x, codes, train_idx, test_idx, candidates, len(classes),
+                    min(max_k, len(train_idx)), algorithm, leaf_size
+                )
+                for train_idx, test_idx in portion
+            )
+            # Доля верных ответов усредняется по блокам, как scoring='accuracy' в GridSearchCV
+            for scores in results:
+                correct += scores
+                tested += 1
+                if monitor is not None:
+                    monitor.folds_evaluated(len(candidates))
+
+    if monitor is not None:
+        monitor.candidates_evaluated(len(candidates), 0)
+    result = NeighborSearchResult(candidates, correct / max(tested, 1))
+    if monitor is not None:
+        monitor.set_stage("Обучение итоговой модели")
+    model = KNeighborsClassifier(algorithm=algorithm, leaf_size=leaf_size, **result.best_params_).fit(x, y)
+    return result, model
+
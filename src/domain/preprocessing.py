@@ -0,0 +1,153 @@
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+
+from domain.models import HUMIDITY_COLUMN, TEMPERATURE_COLUMN
+
+
+def sensor_columns(feature_names) -> np.ndarray:
+    """Номера столбцов датчиков: все признаки, кроме влажности и температуры."""
+    return np.array(
+        [i for i, name in enumerate(feature_names) if name not in (HUMIDITY_COLUMN, TEMPERATURE_COLUMN)], dtype=np.intp
+    )
+
+
+class SensorPreprocessor(TransformerMixin, BaseEstimator):
+    """
+    Предобработка показаний датчиков, полностью на массивах NumPy:
+    вычитание базовой линии, компенсация влажности и температуры и стандартизация.
+    Стоит первым шагом Pipeline, который перебирается при подборе параметров, поэтому на каждом
+    блоке кросс-валидации обучается только по его обучающей части.
+    Столбцы x сверх feature_names (признаки окна из add_rolling_features) только стандартизируются.
+    """
+
+    def __init__(self, feature_names=None, standardize: bool = True, baseline_quantile: float | None = None,
+                 compensate_environment: bool = False):
+        """
+        feature_names — имена столбцов x: по ним находятся влажность и температура;
+        baseline_quantile — квантиль показаний датчика, принимаемый за базовую линию (например, 0.05);
+        compensate_environment — вычесть линейную зависимость датчиков от влажности и температуры.
+        """
+        self.feature_names = feature_names
+        self.standardize = standardize
+        self.baseline_quantile = baseline_quantile
+        self.compensate_environment = compensate_environment
+
+    def fit(self, x, y=None):
+        self._fit_transform(np.asarray(x))
+        return self
+
+    def fit_transform(self, x, y=None, **fit_params):
+        return self._fit_transform(np.asarray(x))
+
+    def transform(self, x):
+        x = np.asarray(x)
+        if x.shape[1] != self.n_features_in_:
+            raise ValueError(f"Ожидалось признаков: {self.n_features_in_}, получено: {x.shape[1]}")
+        out = self._sensor_features(x)
+        if self.standardize:
+            out -= self.mean_
+            out /= self.scale_
+        return out
+
+    def _fit_transform(self, x):
+        self.n_features_in_ = x.shape[1]
+        names = list(self.feature_names) if self.feature_names is not None else [str(i) for i in range(x.shape[1])]
+        if len(names) > x.shape[1]:
+            raise ValueError("Число имён признаков больше числа столбцов")
+        self.n_named_ = len(names)
+
+        environment = [i for i, name in enumerate(names) if name in (HUMIDITY_COLUMN, TEMPERATURE_COLUMN)]
+        self.environment_ = np.array(environment, dtype=np.intp)
+        self.sensors_ = np.array([i for i in range(len(names)) if i not in environment], dtype=np.intp)
+
+        sensors = x[:, self.sensors_]
+        self.baseline_ = (
+            np.quantile(sensors, self.baseline_quantile, axis=0) if self.baseline_quantile is not None
+            else np.zeros(len(self.sensors_))
+        )
+
+        self.coef_ = None
+        if self.compensate_environment and len(self.environment_):
+            # МНК сразу для всех датчиков: отклик = a + b·влажность + c·температура
+            env = x[:, self.environment_]
+            design = np.column_stack([np.ones(len(env)), env - env.mean(axis=0)])
+            solution, *_ = np.linalg.lstsq(design, sensors - self.baseline_, rcond=None)
+            self.env_mean_ = env.mean(axis=0)
+            self.coef_ = solution[1:]
+
+        out = self._sensor_features(x)
+        if self.standardize:
+            self.mean_ = out.mean(axis=0)
+            scale = out.std(axis=0)
+            scale[scale == 0] = 1.0
+            self.scale_ = scale
+            out -= self.mean_
+            out /= self.scale_
+        return out
+
+    def _sensor_features(self, x):
+        sensors = x[:, self.sensors_] - self.baseline_
+        if self.coef_ is not None:
+            sensors -= (x[:, self.environment_] - self.env_mean_) @ self.coef_
+
+        columns = [sensors, x[:, self.environment_]]
+        if self.n_named_ < x.shape[1]:
+            columns.append(x[:, self.n_named_:])
+        return np.ascontiguousarray(np.hstack(columns), dtype=np.result_type(x.dtype, np.float32))
+
+
+class RollingWindow:
+    """
+    Признаки окна для одного файла или потока, читаемого частями: последние window-1 строк
+    переносятся в следующую часть, поэтому результат не зависит от разбиения на части.
+    """
+
+    def __init__(self, window: int, columns):
+        self.window = window
+        self.columns = np.asarray(columns, dtype=np.intp)
+        self._history = None
+
+    def transform(self, x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x)
+        values = x[:, self.columns]
+        skip = 0
+        if self._history is not None:
+            skip = len(self._history)
+            values = np.vstack([self._history, values])
+        mean, std = rolling_mean_std(values, self.window)
+        self._history = values[max(0, len(values) - self.window + 1):].copy()
+        return np.hstack([x, mean[skip:], std[skip:]])
+
+
+def add_rolling_features(x: np.ndarray, window: int, columns, segments: np.ndarray | None = None) -> np.ndarray:
+    """
+    Дописывает к x скользящие среднее и разброс столбцов columns. segments — номер файла каждой строки
+    (строки одного файла идут подряд): окно начинается заново в каждом файле и не захватывает соседние.
+    """
+    values = x[:, np.asarray(columns, dtype=np.intp)]
+    starts = None
+    if segments is not None and len(segments):
+        first = np.flatnonzero(np.r_[True, segments[1:] != segments[:-1]])
+        starts = np.repeat(first, np.diff(np.r_[first, len(segments)]))
+    mean, std = rolling_mean_std(values, window, starts)
+    return np.hstack([x, mean, std])
+
+
+def rolling_mean_std(values: np.ndarray, window: int, starts: np.ndarray | None = None):
+    """
+    Скользящие среднее и стандартное отклонение по window предыдущим строкам (включая текущую)
+    через накопленные суммы: O(n) независимо от длины окна. Первые строки считаются по неполному окну.
+    starts — номер первой строки сегмента для каждой строки: окно не выходит за начало сегмента.
+    """
+    n = len(values)
+    cumsum = np.zeros((n + 1, values.shape[1]))
+    cumsq = np.zeros((n + 1, values.shape[1]))
+    np.cumsum(values, axis=0, out=cumsum[1:])
+    np.cumsum(values * values, axis=0, out=cumsq[1:])
+
+    end = np.arange(1, n + 1)
+    start = np.maximum(end - window, 0 if starts is None else starts)
+    count = (end - start)[:, None]
+    mean = (cumsum[end] - cumsum[start]) / count
+    var = (cumsq[end] - cumsq[start]) / count - mean * mean
+    return mean, np.sqrt(np.maximum(var, 0))
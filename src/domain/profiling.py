@@ -0,0 +1,141 @@
+import cProfile
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_DEBUG_DIR = os.path.join(os.path.expanduser("~"), ".enose", "debug")
+
+
+def current_rss_mb() -> float | None:
+    """
+    Резидентная память процесса, МБ. psutil используется, если установлен;
+    без него — /proc в Linux, иначе None.
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class StageProfiler:
+    """
+    Счётчики по этапам: число вызовов, суммарное и последнее время, изменение памяти процесса.
+    В режиме отладки каждый замер пишется строкой JSON в журнал, а операции,
+    обёрнутые в profile(), сохраняются дампами cProfile.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.log_path = None
+        self.profile_dir = None
+        self._lock = threading.Lock()
+
+    def enable_debug(self, debug_dir: str | None = DEFAULT_DEBUG_DIR) -> None:
+        """
+        debug_dir — папка для журнала timings.jsonl и дампов *.prof; None выключает отладку.
+        """
+        if debug_dir is None:
+            self.log_path = self.profile_dir = None
+            return
+        os.makedirs(debug_dir, exist_ok=True)
+        self.log_path = os.path.join(debug_dir, "timings.jsonl")
+        self.profile_dir = debug_dir
+
+    @property
+    def debug(self) -> bool:
+        return self.log_path is not None
+
+    @contextmanager
+    def stage(self, name: str, **details):
+        rss_before = current_rss_mb()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            rss_after = current_rss_mb()
+            rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+            self._record(name, seconds, rss_after, rss_delta, details)
+
+    @contextmanager
+    def profile(self, name: str):
+        """
+        Крупная операция (обучение, классификация файла): замер этапа и,
+        в режиме отладки, дамп cProfile для её потока.
+        """
+        if self.profile_dir is None:
+            with self.stage(name):
+                yield
+            return
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            with self.stage(name):
+                yield
+        finally:
+            profile.disable()
+            stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+            safe_name = "".join(ch if ch.isalnum() else "_" for ch in name)
+            try:
+                profile.dump_stats(os.path.join(self.profile_dir, f"{safe_name}-{stamp}.prof"))
+            except OSError:
+                pass
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {name: dict(stats) for name, stats in self.stages.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages.clear()
+
+    def report_lines(self) -> list[str]:
+        lines = []
+        for name, stats in self.snapshot().items():
+            line = f"{name}: {stats['last_seconds'] * 1000:.0f} мс"
+            if stats["calls"] > 1:
+                line += f" (вызовов {stats['calls']}, всего {stats['total_seconds']:.2f} с)"
+            if stats["rss_delta_mb"] is not None:
+                line += f", память {stats['rss_delta_mb']:+.1f} МБ"
+            lines.append(line)
+        return lines
+
+    def _record(self, name, seconds, rss_mb, rss_delta_mb, details) -> None:
+        with self._lock:
+            stats = self.stages.setdefault(name, {"calls": 0, "total_seconds": 0.0})
+            stats["calls"] += 1
+            stats["total_seconds"] += seconds
+            stats["last_seconds"] = seconds
+            stats["rss_mb"] = rss_mb
+            stats["rss_delta_mb"] = rss_delta_mb
+
+        if self.log_path is not None:
+            entry = {
+                "time": datetime.datetime.now().isoformat(timespec="milliseconds"),
+                "stage": name,
+                "seconds": round(seconds, 6),
+                "rss_mb": round(rss_mb, 1) if rss_mb is not None else None,
+                "rss_delta_mb": round(rss_delta_mb, 1) if rss_delta_mb is not None else None,
+                "thread": threading.current_thread().name,
+                **details,
+            }
+            try:
+                with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            except OSError as e:
+                print(f"Не удалось записать журнал замеров: {e}", file=sys.stderr)
+
+
+# Общий счётчик приложения: этапы разбора, обучения и классификации пишутся сюда
+profiler = StageProfiler()
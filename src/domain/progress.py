@@ -0,0 +1,92 @@
+import threading
+import time
+
+
+class TrainingCancelled(Exception):
+    pass
+
+
+class TrainingMonitor:
+    """
+    Прогресс обучения: разобранные файлы, обученные фолды, оставшиеся кандидаты и оценка времени.
+    Обучение идёт в фоновом потоке, а callback получает снимок состояния (словарь) после каждого шага.
+    Отмена проверяется между шагами, поэтому поиск останавливается без порчи текущей модели.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+        self.stage = ""
+        self.files_total = 0
+        self.files_done = 0
+        self.candidates_total = 0
+        self.candidates_done = 0
+        self.folds_total = 0
+        self.folds_done = 0
+        self._search_started = None
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        if self.cancelled:
+            raise TrainingCancelled("Обучение отменено")
+
+    def set_stage(self, stage: str) -> None:
+        self.stage = stage
+        self._notify()
+
+    def file_parsed(self, done: int, total: int) -> None:
+        # Вызывается из FileParser: отмена во время разбора прерывает загрузку
+        self.check_cancelled()
+        with self._lock:
+            self.files_done, self.files_total = done, total
+        self._notify()
+
+    def candidates_added(self, n_candidates: int, n_splits: int) -> None:
+        with self._lock:
+            if self._search_started is None:
+                self._search_started = time.monotonic()
+            self.candidates_total += n_candidates
+            self.folds_total += n_candidates * n_splits
+        self._notify()
+
+    def candidates_evaluated(self, n_candidates: int, n_splits: int) -> None:
+        with self._lock:
+            self.candidates_done += n_candidates
+            self.folds_done += n_candidates * n_splits
+        self._notify()
+
+    def folds_evaluated(self, n_folds: int) -> None:
+        # Для поиска, который оценивает всех кандидатов на одном блоке сразу (см. domain.neighbors)
+        with self._lock:
+            self.folds_done += n_folds
+        self._notify()
+
+    def eta(self) -> float | None:
+        if not self.folds_done or self._search_started is None:
+            return None
+        elapsed = time.monotonic() - self._search_started
+        return elapsed / self.folds_done * (self.folds_total - self.folds_done)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "stage": self.stage,
+                "files_done": self.files_done,
+                "files_total": self.files_total,
+                "candidates_left": self.candidates_total - self.candidates_done,
+                "folds_done": self.folds_done,
+                "folds_total": self.folds_total,
+                "eta": self.eta(),
+            }
+
+    def _notify(self) -> None:
+        if self.callback is not None:
+            self.callback(self.snapshot())
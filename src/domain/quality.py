@@ -0,0 +1,159 @@
+import numpy as np
+
+
+class QualityReport:
+    """
+    Итог проверки строк: маска пригодных строк и счётчики по столбцам.
+    Строка отбрасывается, если в каком-либо признаке пропуск (или нечисловое значение)
+    либо значение вне допустимого диапазона. Значения ровно на границе диапазона
+    (насыщение датчика) не отбрасываются, а только подсчитываются.
+    columns — имена проверенных столбцов.
+    """
+
+    def __init__(self, valid: np.ndarray, nan_counts: dict, out_of_range: dict, saturated: dict, columns=()):
+        self.valid = valid
+        self.nan_counts = nan_counts
+        self.out_of_range = out_of_range
+        self.saturated = saturated
+        self.columns = tuple(columns)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QualityReport":
+        """
+        Сводка из to_dict (метаданные модели): только счётчики, маска строк не сохраняется,
+        поэтому valid — None.
+        """
+        report = cls(None, dict(data.get("nan", {})), dict(data.get("out_of_range", {})), dict(data.get("saturated", {})))
+        report._counts = (int(data.get("rows", 0)), int(data.get("dropped", 0)))
+        return report
+
+    @property
+    def rows(self) -> int:
+        if self.valid is None:
+            return self._counts[0]
+        return len(self.valid)
+
+    @property
+    def kept(self) -> int:
+        if self.valid is None:
+            return self._counts[0] - self._counts[1]
+        return int(np.count_nonzero(self.valid))
+
+    @property
+    def dropped(self) -> int:
+        return self.rows - self.kept
+
+    def covering(self, columns) -> "QualityReport":
+        """
+        Отчёт, в котором проверены и столбцы из columns (пары имя, массив), не проверенные здесь:
+        в них ищутся только пропуски, маска строк сужается. Если все уже проверены — сам отчёт.
+        """
+        extra = check_quality(
+            ((name, values) for name, values in columns if name not in self.columns), rows=self.rows
+        )
+        if not extra.columns:
+            return self
+        return QualityReport(
+            self.valid & extra.valid, {**self.nan_counts, **extra.nan_counts}, self.out_of_range, self.saturated,
+            columns=self.columns + extra.columns
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "dropped": self.dropped,
+            "nan": dict(self.nan_counts),
+            "out_of_range": dict(self.out_of_range),
+            "saturated": dict(self.saturated),
+        }
+
+    def summary_lines(self) -> list[str]:
+        lines = [dropped_summary(self.rows, self.dropped)]
+        for title, counts in (("Пропуски и нечисловые значения", self.nan_counts),
+                              ("Вне допустимого диапазона", self.out_of_range),
+                              ("На границе диапазона (насыщение)", self.saturated)):
+            if counts:
+                lines.append(f"{title}: " + ", ".join(f"{name} — {count}" for name, count in counts.items()))
+        return lines
+
+
+def dropped_summary(rows: int, dropped: int) -> str:
+    share = 100 * dropped / rows if rows else 0.0
+    return f"Строк: {rows}, отброшено: {dropped} ({share:.1f}%)"
+
+
+def check_quality(columns, value_ranges: dict | None = None, rows: int | None = None) -> QualityReport:
+    """
+    Один проход по каждому столбцу признаков. columns — пары (имя, одномерный числовой массив);
+    value_ranges — {имя: (минимум, максимум)}, None в границе — без ограничения с этой стороны.
+    rows — число строк, если столбцов нет.
+    """
+    value_ranges = value_ranges or {}
+    valid = None
+    nan_counts, out_of_range, saturated = {}, {}, {}
+    checked = []
+
+    for name, values in columns:
+        checked.append(name)
+        values = np.asarray(values)
+        bad = np.isnan(values)
+        if valid is None:
+            valid = np.ones(len(values), dtype=bool)
+        count = int(np.count_nonzero(bad))
+        if count:
+            nan_counts[name] = count
+
+        bounds = value_ranges.get(name)
+        if bounds is not None:
+            low, high = bounds
+            # Сравнения с NaN ложны, поэтому пропуски не попадают в счётчики диапазона
+            outside = np.zeros(len(values), dtype=bool)
+            at_edge = np.zeros(len(values), dtype=bool)
+            if low is not None:
+                outside |= values < low
+                at_edge |= values == low
+            if high is not None:
+                outside |= values > high
+                at_edge |= values == high
+            if outside.any():
+                out_of_range[name] = int(np.count_nonzero(outside))
+                bad |= outside
+            if at_edge.any():
+                saturated[name] = int(np.count_nonzero(at_edge))
+
+        valid &= ~bad
+
+    if valid is None:
+        valid = np.ones(rows or 0, dtype=bool)
+    return QualityReport(valid, nan_counts, out_of_range, saturated, columns=checked)
+
+
+def parse_value_ranges(text: str) -> dict:
+    """
+    'Влажность=0..100; Температура=-40..85; Датчик1=..4095' → {'Влажность': (0.0, 100.0), ...}.
+    Пустая граница — без ограничения с этой стороны.
+    """
+    ranges = {}
+    for part in text.split(";"):
+        part = part.strip()
+        if not part:
+            continue
+        name, sep, bounds = part.partition("=")
+        low, dots, high = bounds.partition("..")
+        if not sep or not dots or not name.strip():
+            raise ValueError(f"Диапазон задаётся как 'Столбец=мин..макс': {part}")
+        try:
+            low = float(low.replace(",", ".")) if low.strip() else None
+            high = float(high.replace(",", ".")) if high.strip() else None
+        except ValueError:
+            raise ValueError(f"Границы диапазона должны быть числами: {part}")
+        if low is not None and high is not None and low > high:
+            raise ValueError(f"Нижняя граница больше верхней: {part}")
+        ranges[name.strip()] = (low, high)
+    return ranges
+
+
+def format_value_ranges(ranges: dict) -> str:
+    def bound(value):
+        return "" if value is None else f"{value:g}"
+    return "; ".join(f"{name}={bound(low)}..{bound(high)}" for name, (low, high) in ranges.items())
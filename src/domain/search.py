@@ -0,0 +1,80 @@
+import time
+
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import GridSearchCV, RandomizedSearchCV, HalvingGridSearchCV, check_cv
+
+
+class MonitoredSearchMixin:
+    """
+    Разбивает кандидатов поиска на порции по числу параллельных задач:
+    после каждой порции сообщает о прогрессе, проверяет отмену и лимит времени.
+    """
+
+    monitor = None
+    time_budget = None
+
+    def _run_search(self, evaluate_candidates):
+        if self.monitor is None and self.time_budget is None:
+            return super()._run_search(evaluate_candidates)
+
+        n_splits = check_cv(self.cv).get_n_splits()
+        step = max(1, self.n_jobs or 1)
+        deadline = time.monotonic() + self.time_budget if self.time_budget is not None else None
+
+        def monitored(candidate_params, cv=None, more_results=None):
+            candidate_params = list(candidate_params)
+            if self.monitor is not None:
+                self.monitor.candidates_added(len(candidate_params), n_splits)
+
+            results = None
+            for start in range(0, len(candidate_params), step):
+                # По истечении лимита оставшихся кандидатов не проверяем, лучший выбирается из уже оценённых
+                if results is not None and deadline is not None and time.monotonic() > deadline:
+                    break
+                if self.monitor is not None:
+                    self.monitor.check_cancelled()
+                chunk = candidate_params[start:start + step]
+                chunk_more = {key: values[start:start + step] for key, values in more_results.items()} if more_results else None
+                results = evaluate_candidates(chunk, cv, chunk_more)
+                if self.monitor is not None:
+                    self.monitor.candidates_evaluated(len(chunk), n_splits)
+            return results
+
+        return super()._run_search(monitored)
+
+
+class MonitoredGridSearchCV(MonitoredSearchMixin, GridSearchCV):
+    pass
+
+
+class MonitoredRandomizedSearchCV(MonitoredSearchMixin, RandomizedSearchCV):
+    pass
+
+
+class MonitoredHalvingGridSearchCV(MonitoredSearchMixin, HalvingGridSearchCV):
+    # Каждая итерация деления отбирает лучших из всех кандидатов предыдущей, поэтому прервать её по времени нельзя:
+    # экономия достигается тем, что первые итерации обучаются на малой доле данных
+    time_budget = None
+
+
+def make_search(strategy: str, estimator, params: dict, distributions: dict, n_iter: int = 10,
+                time_budget: float | None = None, monitor=None, random_state=None, **kwargs):
+    """
+    random_state задаёт выбор кандидатов случайного поиска и подвыборки последовательного деления:
+    с одним и тем же значением подбор воспроизводится от запуска к запуску.
+    """
+    if strategy == 'grid':
+        searcher = MonitoredGridSearchCV(estimator, param_grid=params, **kwargs)
+        searcher.time_budget = time_budget
+    elif strategy == 'random':
+        searcher = MonitoredRandomizedSearchCV(estimator, param_distributions=distributions, n_iter=n_iter,
+                                               random_state=random_state, **kwargs)
+        searcher.time_budget = time_budget
+    elif strategy == 'halving':
+        kwargs.pop('pre_dispatch', None)
+        searcher = MonitoredHalvingGridSearchCV(estimator, param_grid=params, factor=3,
+                                                 random_state=random_state, **kwargs)
+    else:
+        raise ValueError(f"Неизвестная стратегия подбора: {strategy}")
+    searcher.monitor = monitor
+    return searcher
@@ -0,0 +1,63 @@
+import numpy as np
+
+
+class SlidingWindow:
+    """
+    Статистика по последним size классифицированным строкам: голоса и средние вероятности.
+    Кольцевой буфер обновляется за время, пропорциональное размеру новой порции,
+    а не размеру окна.
+    """
+
+    def __init__(self, classes, size: int = 1000):
+        if size < 1:
+            raise ValueError("Размер окна должен быть положительным")
+        self.classes = np.asarray(classes)
+        self.size = size
+        self.rows = 0
+        self.total_rows = 0
+        self.votes = np.zeros(len(self.classes), dtype=np.int64)
+        self._codes = np.zeros(size, dtype=np.int64)
+        self._probs = None
+        self._proba_sum = np.zeros(len(self.classes))
+        self._pos = 0
+
+    def update(self, preds, probs=None) -> None:
+        codes = np.searchsorted(self.classes, preds)
+        self.total_rows += len(codes)
+        if len(codes) > self.size:
+            codes = codes[-self.size:]
+            probs = probs[-self.size:] if probs is not None else None
+        n = len(codes)
+        if n == 0:
+            return
+
+        if probs is not None and self._probs is None:
+            self._probs = np.zeros((self.size, len(self.classes)))
+
+        slots = (self._pos + np.arange(n)) % self.size
+        # Пустые ячейки идут сразу за позицией записи, за ними — самые старые строки окна
+        free = self.size - self.rows
+        if n > free:
+            evicted = slots[free:]
+            self.votes -= np.bincount(self._codes[evicted], minlength=len(self.classes))
+            if self._probs is not None:
+                self._proba_sum -= self._probs[evicted].sum(axis=0)
+
+        self._codes[slots] = codes
+        self.votes += np.bincount(codes, minlength=len(self.classes))
+        if probs is not None:
+            self._probs[slots] = probs
+            self._proba_sum += probs.sum(axis=0)
+
+        self._pos = (self._pos + n) % self.size
+        self.rows = min(self.size, self.rows + n)
+
+    @property
+    def majority_class(self):
+        return self.classes[np.argmax(self.votes)] if self.rows else None
+
+    @property
+    def avg_proba(self):
+        if self._probs is None or not self.rows:
+            return None
+        return np.round(np.clip(self._proba_sum / self.rows, 0, 1), 3)
@@ -1,5 +1,22 @@
 from tkinter import ttk, filedialog
 import os
+import queue
+import threading
+
+from gui.virtualtable import VirtualTable
+
+# Файлы добавляются в список пачками: одна вставка в таблицу и одно уведомление владельца на пачку
+FILE_BATCH_SIZE = 500
+
+# Период приёма пачек от фонового потока, мс
+FILE_POLL_MS = 100
+
+FILE_COLUMNS = {
+    "name": ("Файл", 200, "w"),
+    "type": ("Тип", 80, "center"),
+    "size": ("Размер", 80, "center"),
+}
+
 
 class FileListPanel(ttk.Frame):
     def __init__(self, parent, files_owner, *args, **kwargs):
@@ -9,31 +26,18 @@ class FileListPanel(ttk.Frame):
         self.files = []
         self.files_owner = files_owner
 
+        # Множество путей для проверки повторов за O(1); номер поколения отбрасывает пачки,
+        # пришедшие от поиска, запущенного до очистки списка
+        self._known = set()
+        self._generation = 0
+        self._batches = queue.Queue()
+        self._scans = 0
+
         self.tree_frame = ttk.Frame(self)
         self.tree_frame.pack(fill="both", expand=True, padx=5, pady=5)
 
-        self.tree = ttk.Treeview(
-            self.tree_frame,
-            columns=("name", "type", "size"),
-            show="headings",
-            selectmode="browse",
-            height=self.MAX_VISIBLE_ROWS
-        )
-        self.tree.heading("name", text="Файл")
-        self.tree.heading("type", text="Тип")
-        self.tree.heading("size", text="Размер")
-        self.tree.column("name", anchor="w", width=200)
-        self.tree.column("type", anchor="center", width=80)
-        self.tree.column("size", anchor="center", width=80)
-
-        self.scrollbar = ttk.Scrollbar(self.tree_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=self.scrollbar.set)
-
-        self.tree.grid(row=0, column=0, sticky="nsew")
-        self.scrollbar.grid(row=0, column=1, sticky="ns")
-
-        self.tree_frame.columnconfigure(0, weight=1)
-        self.tree_frame.rowconfigure(0, weight=1)
+        self.table = VirtualTable(self.tree_frame, FILE_COLUMNS, height=self.MAX_VISIBLE_ROWS, selectable=True)
+        self.table.pack(fill="both", expand=True)
 
         btn_frame = ttk.Frame(self)
         btn_frame.pack(fill="x", pady=5)
@@ -45,54 +49,125 @@ class FileListPanel(ttk.Frame):
         add_btn.pack(side="left", padx=(0, 5))
 
         del_btn = ttk.Button(left_btns, text="–", width=3, command=self.remove_selected)
-        del_btn.pack(side="left")
+        del_btn.pack(side="left", padx=(0, 5))
+
+        dir_btn = ttk.Button(left_btns, text="Папка", command=self.add_directory)
+        dir_btn.pack(side="left")
 
         clear_btn = ttk.Button(btn_frame, text="Очистить", command=self.remove_all)
         clear_btn.pack(side="right", padx=(5, 0))
 
-        self.update_scrollbar_visibility()
-
-    def update_scrollbar_visibility(self):
-        row_count = len(self.tree.get_children())
-        if row_count > self.MAX_VISIBLE_ROWS:
-            self.scrollbar.grid()
-        else:
-            self.scrollbar.grid_remove()
+        self.status_label = ttk.Label(btn_frame, text="")
+        self.status_label.pack(side="right", padx=(5, 0))
 
     def add_file(self):
         file_paths = filedialog.askopenfilenames(filetypes=[("Файлы CSV", "*.csv"), ("Все файлы", "*.*")])
-        for file_path in file_paths:
-            if file_path and file_path not in self.files:
-                name = os.path.basename(file_path)
-                file_type = os.path.splitext(file_path)[1].lstrip('.').lower() or "неизвестно"
-                size = format_size(os.path.getsize(file_path))
-                self.files.append(file_path)
-                self.tree.insert("", "end", values=(name, file_type, size))
-                self.files_list_updated()
-        self.update_scrollbar_visibility()
+        if file_paths:
+            self.add_paths(file_paths)
+
+    def add_directory(self):
+        directory = filedialog.askdirectory(title="Папка с файлами CSV (с вложенными папками)")
+        if directory:
+            self.add_paths([], directories=[directory])
+
+    def add_paths(self, file_paths, directories=()):
+        """
+        Добавляет файлы и все CSV из папок (рекурсивно). Обход папок и размеры файлов собираются
+        в фоновом потоке, список пополняется пачками по FILE_BATCH_SIZE.
+        """
+        if self._scans == 0:
+            self.after(FILE_POLL_MS, self.poll_batches)
+        self._scans += 1
+        self.status_label.config(text="Поиск файлов...")
+        threading.Thread(
+            target=self.scan_worker, args=(list(file_paths), list(directories), self._generation), daemon=True
+        ).start()
+
+    def scan_worker(self, file_paths, directories, generation):
+        # Выполняется в фоновом потоке: окно не трогает, только кладёт пачки в очередь
+        batch = []
+        try:
+            for path in iter_csv_paths(file_paths, directories):
+                try:
+                    size = format_size(os.path.getsize(path))
+                except OSError:
+                    continue
+                file_type = os.path.splitext(path)[1].lstrip('.').lower() or "неизвестно"
+                batch.append((path, (os.path.basename(path), file_type, size)))
+                if len(batch) >= FILE_BATCH_SIZE:
+                    self._batches.put((generation, batch))
+                    batch = []
+        finally:
+            self._batches.put((generation, batch))
+            self._batches.put((generation, None))
+
+    def poll_batches(self):
+        added = False
+        while True:
+            try:
+                generation, batch = self._batches.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                self._scans -= 1
+                continue
+            if generation != self._generation:
+                continue
+
+            rows = []
+            for path, row in batch:
+                key = os.path.normcase(path)
+                if key not in self._known:
+                    self._known.add(key)
+                    self.files.append(path)
+                    rows.append(row)
+            if rows:
+                self.table.append(rows)
+                added = True
+
+        if added:
+            self.files_list_updated()
+        if self._scans > 0:
+            self.after(FILE_POLL_MS, self.poll_batches)
+        else:
+            self.status_label.config(text=f"Файлов: {len(self.files)}" if self.files else "")
 
     def remove_selected(self):
-        selected_item = self.tree.selection()
-        if selected_item:
-            index = self.tree.index(selected_item[0])
-            self.tree.delete(selected_item[0])
+        index = self.table.selected
+        if index is not None and index < len(self.files):
+            self.table.delete(index)
+            self._known.discard(os.path.normcase(self.files[index]))
             del self.files[index]
             self.files_list_updated()
-        self.update_scrollbar_visibility()
-    
+
     def remove_all(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self._generation += 1
+        self.table.clear()
         self.files.clear()
+        self._known.clear()
         self.files_list_updated()
-        self.update_scrollbar_visibility()
 
     def get_files(self):
         return self.files
-    
+
     def files_list_updated(self):
+        if self._scans == 0:
+            self.status_label.config(text=f"Файлов: {len(self.files)}" if self.files else "")
         self.files_owner.set_selected_files(self.files)
 
+
+def iter_csv_paths(file_paths, directories):
+    """Абсолютные пути: сначала выбранные файлы, затем CSV из папок и вложенных папок по алфавиту."""
+    for path in file_paths:
+        yield os.path.abspath(path)
+    for directory in directories:
+        for root, dirs, names in os.walk(directory):
+            dirs.sort()
+            for name in sorted(names):
+                if name.lower().endswith(".csv"):
+                    yield os.path.abspath(os.path.join(root, name))
+
+
 def format_size(bytes_size: int) -> str:
     for unit in ['Б', 'КБ', 'МБ', 'ГБ', 'ТБ']:
         if bytes_size < 1024:
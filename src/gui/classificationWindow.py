@@ -1,14 +1,54 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from tkinter import ttk
-import joblib
 import csv
-from matplotlib.backends import _backend_tk
-_backend_tk.Show._mainloop = False
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import os
+import queue
 import sys
-import re
+import threading
+import time
+
+from domain.profiling import profiler
+from domain.quality import dropped_summary
+from infrastructure.modelstore import save_classifier
+
+# Файлы больше этого размера классифицируются потоково, частями
+STREAMING_THRESHOLD = 50 * 1024 * 1024
+STREAMING_CHUNK_ROWS = 100_000
+
+# Слежение за дописываемым файлом: период обновления окна и размер скользящего окна в строках
+FOLLOW_POLL_MS = 250
+FOLLOW_WINDOW_ROWS = 1000
+
+# Пакетная классификация: период обновления таблицы результатов, мс
+BATCH_POLL_MS = 200
+
+# Столбцы таблицы пакетной классификации: заголовок, ширина, выравнивание
+BATCH_COLUMNS = {
+    "file": ("Файл", 200, "w"),
+    "class": ("Класс", 140, "w"),
+    "confidence": ("Уверенность", 90, "center"),
+    "rows": ("Строк", 70, "center"),
+    "dropped": ("Отброшено", 80, "center"),
+    "seconds": ("Время, с", 70, "center"),
+}
+
+
+# Диаграмма перерисовывается не чаще одного раза за этот интервал; промежуточные результаты пропускаются
+CHART_MIN_INTERVAL_MS = 500
+
+# Больше классов на диаграмме не показывается: остальные объединяются в "Другое"
+CHART_MAX_CLASSES = 10
+
+
+def load_matplotlib():
+    # matplotlib импортируется при построении первой диаграммы. Figure создаётся без pyplot:
+    # он не попадает в глобальный список фигур и освобождается вместе с окном
+    from matplotlib import colormaps
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    return Figure, FigureCanvasTkAgg, list(colormaps["Pastel1"].colors)
+
 
 class ClassificationWindow(tk.Toplevel):
     def __init__(self, master):
@@ -36,24 +76,44 @@ class ClassificationWindow(tk.Toplevel):
         btn_save = tk.Button(buttons_frame, text="Сохранить классификатор", command=self.save_model)
         btn_save.grid(row=0, column=0, sticky="ew", padx=(0, 5))
 
-        btn_load = tk.Button(buttons_frame, text="Загрузить данные для классификации", command=self.load_data_for_classification)
-        btn_load.grid(row=0, column=1, sticky="ew", padx=(5, 0))
+        self.btn_load = tk.Button(
+            buttons_frame, text="Загрузить данные для классификации", command=self.load_data_for_classification
+        )
+        self.btn_load.grid(row=0, column=1, sticky="ew", padx=(5, 0))
+
+        self.btn_follow = tk.Button(buttons_frame, text="Следить за файлом", command=self.toggle_follow)
+        self.btn_follow.grid(row=1, column=0, sticky="ew", padx=(0, 5), pady=(5, 0))
+
+        self.btn_batch = tk.Button(buttons_frame, text="Классифицировать много файлов", command=self.toggle_batch)
+        self.btn_batch.grid(row=1, column=1, sticky="ew", padx=(5, 0), pady=(5, 0))
+
+        # Фоновая работа окна ('file', 'follow', 'batch'): пока она идёт, другие запуски недоступны (см. set_running)
+        self.running = None
+
+        # Потоковая классификация большого файла в фоновом потоке
+        self.stream_stop = None
+
+        # Фоновое слежение за файлом: поток классифицирует новые строки и передаёт окну статистику через очередь
+        self.follow_stop = None
+
+        # Пакетная классификация: результаты по файлам (словари classify_file), событие остановки потока
+        # и номер запуска — сообщения прежних запусков по нему отбрасываются
+        self.batch_stop = None
+        self.batch_run = 0
+        self.batch_results = []
+        self.batch_order = {}
 
         # Контейнер для сменного содержимого
         self.content_wrapper = tk.Frame(self)
         self.content_wrapper.pack(fill="both", expand=True, padx=10, pady=10)
 
+        # Сводка проверки качества последнего классифицированного файла (см. set_quality)
+        self.last_quality = None
+
         # Панель информации о модели
         self.model_info_panel = tk.Text(self.content_wrapper, height=10, wrap="word", bg="#f0f0f0", bd=0, font=("Arial", 10))
         self.model_info_panel.tag_configure("bold", font=("Arial", 10, "bold"))
-        self.model_info_panel.insert("end", "Информация о классификаторе:\n\n", "bold")
-        self.model_info_panel.insert("end", "Классификатор:\n", "bold")
-        self.model_info_panel.insert("end", f"{self.active_classifier}\n\n")
-        self.model_info_panel.insert("end", "Столбцы признаков:\n", "bold")
-        self.model_info_panel.insert("end", f"{', '.join(self.feature_names)}\n\n")
-        self.model_info_panel.insert("end", "Целевой столбец:\n", "bold")
-        self.model_info_panel.insert("end", f"{self.target_column}\n")
-        self.model_info_panel.config(state="disabled")
+        self.fill_model_info()
         self.model_info_panel.pack(fill="both", expand=True)
 
         self.add_class_list()
@@ -73,19 +133,84 @@ class ClassificationWindow(tk.Toplevel):
         self.result_text.tag_configure("center", justify="center")
         self.result_text.pack(fill="x", padx=10, pady=5)
 
+        # Сколько строк последнего файла отброшено проверкой качества (пропуски, значения вне диапазонов)
+        self.quality_label = tk.Label(self.canvas_frame, text="", font=("Arial", 10))
+        self.quality_label.pack(after=self.result_text)
+
+        # Похожие классы (air_001, air_002) можно показать на диаграмме одной группой
+        self.merge_similar = tk.BooleanVar(value=False)
+        self.merge_check = tk.Checkbutton(
+            self.canvas_frame, text="Объединить похожие классы", variable=self.merge_similar, command=self.redraw_result
+        )
+        self.last_result = None
+
+        # Диаграмма: одна фигура и один холст на всё время жизни окна, при новом результате обновляются на месте
+        self.figure = None
         self.canvas = None
+        self.chart_wedges = None
+        self.chart_labels = None
+        self.chart_pending = None
+        self.chart_after_id = None
+        self.chart_drawn_at = 0.0
         self.canvas_frame.pack_forget()
 
+        # Таблица пакетной классификации: в Treeview только видимые строки, поэтому сотни файлов не тормозят окно
+        from gui.virtualtable import VirtualTable
+        self.batch_frame = tk.Frame(self.content_wrapper)
+        self.batch_status = tk.Label(self.batch_frame, text="", font=("Arial", 10), anchor="w")
+        self.batch_status.pack(fill="x")
+        self.batch_table = VirtualTable(
+            self.batch_frame, BATCH_COLUMNS, row_tag=lambda row: "error" if str(row[1]).startswith("Ошибка:") else None
+        )
+        self.batch_table.tag_configure("error", foreground="red")
+        self.batch_table.pack(fill="both", expand=True)
+
         self.bottom_frame = tk.Frame(self)
         self.bottom_frame.pack(fill="x", side="bottom", padx=10, pady=10)
 
         back_btn = tk.Button(self.bottom_frame, text="Назад", command=self.go_back)
         back_btn.pack(side="left", anchor="w")
 
+        info_btn = tk.Button(self.bottom_frame, text="Сведения и замеры", command=self.show_model_info)
+        info_btn.pack(side="left", anchor="w", padx=(5, 0))
+
         if self.has_conflict_labels:
             self.after(100, lambda: messagebox.showwarning("Предупреждение", "Найдены похожие классы!"))
             # messagebox.showwarning("Предупреждение", "Были использованы обучающие данные с разных устройств.")
 
+    def fill_model_info(self):
+        self.model_info_panel.config(state="normal")
+        self.model_info_panel.delete("1.0", "end")
+        self.model_info_panel.insert("end", "Информация о классификаторе:\n\n", "bold")
+        self.model_info_panel.insert("end", "Классификатор:\n", "bold")
+        self.model_info_panel.insert("end", f"{self.active_classifier}\n\n")
+        self.model_info_panel.insert("end", "Столбцы признаков:\n", "bold")
+        self.model_info_panel.insert("end", f"{', '.join(self.feature_names)}\n\n")
+        self.model_info_panel.insert("end", "Целевой столбец:\n", "bold")
+        self.model_info_panel.insert("end", f"{self.target_column}\n")
+
+        training_quality = self.master.classifier.training_quality
+        if training_quality is not None:
+            self.model_info_panel.insert("end", "\nПроверка данных обучения:\n", "bold")
+            self.model_info_panel.insert("end", "\n".join(training_quality.summary_lines()) + "\n")
+        if self.last_quality is not None:
+            self.model_info_panel.insert("end", "\nПроверка последнего файла:\n", "bold")
+            self.model_info_panel.insert("end", "\n".join(self.last_quality[0]) + "\n")
+
+        # Время и память по этапам разбора, обучения и классификации (последний вызов каждого этапа)
+        timings = profiler.report_lines()
+        if timings:
+            self.model_info_panel.insert("end", "\nЗамеры:\n", "bold")
+            self.model_info_panel.insert("end", "\n".join(timings) + "\n")
+        self.model_info_panel.config(state="disabled")
+
+    def show_model_info(self):
+        self.fill_model_info()
+        self.canvas_frame.pack_forget()
+        self.batch_frame.pack_forget()
+        self.model_info_panel.pack(fill="both", expand=True)
+        self.class_list.pack(fill="x", padx=5, pady=(5, 0))
+
     def add_class_list(self):
         if hasattr(self, "class_list") and self.class_list.winfo_exists():
             self.class_list.destroy()
@@ -105,12 +230,12 @@ class ClassificationWindow(tk.Toplevel):
         self.class_list.heading("class", text="Классы в обучающей выборке")
         self.class_list.column("class", anchor="w")
 
+        label_index = self.master.classifier.label_index
         class_labels = list(getattr(self.active_classifier, "classes_", []))
-        self.has_conflict_labels = False
+        self.has_conflict_labels = label_index is not None and label_index.has_conflicts
         for i, label in enumerate(class_labels):
-            if has_similar_label(label, class_labels):
+            if self.has_conflict_labels and label_index.has_similar(label):
                 tag = "conflict"
-                self.has_conflict_labels = True
             else:
                 tag = "even" if i % 2 == 0 else "odd"
             self.class_list.insert("", "end", values=(label,), tags=(tag,))
@@ -127,10 +252,33 @@ class ClassificationWindow(tk.Toplevel):
         self.master.deiconify()
 
     def on_close(self):
-        if self.canvas:
+        self.stop_streaming()
+        self.stop_follow()
+        self.stop_batch()
+        self.release_chart()
+        self.go_back()
+
+    def destroy(self):
+        # Окно уничтожается главным окном при открытии нового: фоновые потоки и фигура освобождаются вместе с ним
+        self.stop_streaming()
+        self.stop_follow()
+        self.stop_batch()
+        self.release_chart()
+        super().destroy()
+
+    def release_chart(self):
+        if self.chart_after_id is not None:
+            self.after_cancel(self.chart_after_id)
+            self.chart_after_id = None
+        self.chart_pending = None
+        if self.canvas is not None:
             self.canvas.get_tk_widget().destroy()
             self.canvas = None
-        self.go_back()
+        if self.figure is not None:
+            self.figure.clear()
+            self.figure = None
+        self.chart_wedges = None
+        self.chart_labels = None
     
     def export_result(self):
         if not hasattr(self, "labels") or not hasattr(self, "percentages"):
@@ -160,138 +308,502 @@ class ClassificationWindow(tk.Toplevel):
                 title="Сохранить классификатор"
             )
             if path:
-                joblib.dump({
-                    "model": self.master.classifier.model,
-                    "features": self.master.classifier.feature_names,
-                    "target": self.master.classifier.target_name
-                }, path)
+                save_classifier(self.master.classifier, path, file_parser=self.file_parser)
+                self.master.model_path = path
+
+    def set_running(self, kind):
+        """
+        kind — текущая фоновая работа ('file', 'follow', 'batch') или None. Кнопки других запусков
+        недоступны, пока работа не завершится; кнопка слежения или пакета остаётся для остановки.
+        """
+        self.running = kind
+        for button, owner in ((self.btn_load, "file"), (self.btn_follow, "follow"), (self.btn_batch, "batch")):
+            enabled = kind is None or (kind == owner and owner != "file")
+            button.config(state="normal" if enabled else "disabled")
 
     def load_data_for_classification(self):
+        if self.running is not None:
+            return
         file_path = filedialog.askopenfilename(filetypes=[("Файлы CSV", "*.csv"), ("Все файлы", "*.*")])
         if not file_path:
             return
 
+        self.set_quality(None)
         try:
-            df = self.file_parser.load_single_csv(file_path)
-            clf = self.master.classifier
+            if os.path.getsize(file_path) > STREAMING_THRESHOLD:
+                self.classify_streaming(file_path)
+                return
+            with profiler.profile("Классификация файла"):
+                df = self.file_parser.load_dataset([file_path], snapshot=False)
+                quality = self.file_parser.check_quality(df, self.master.classifier.feature_names)
+                majority_class, avg_proba, all_preds, all_probs = self.master.classifier.classify_batch(
+                    df, quality=quality
+                )
+            self.set_quality((quality.summary_lines(), quality.dropped))
 
-            majority_class, avg_proba, all_preds, all_probs = clf.classify_batch(df)
+            self.show_result(majority_class, avg_proba)
+            self.fill_model_info()
 
-            # Удалить старую диаграмму (если есть)
-            if self.canvas:
-                self.canvas.get_tk_widget().destroy()
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Ошибка при классификации:\n{e}")
 
-            # Круговая диаграмма
-            class_labels = list(clf.model.classes_)
-            percentages = avg_proba * 100
+    def classify_streaming(self, file_path):
+        # Большой файл читается частями в фоновом потоке, промежуточный результат показывается по мере обработки
+        self.model_info_panel.pack_forget()
+        self.class_list.pack_forget()
+        self.batch_frame.pack_forget()
+        self.canvas_frame.pack(fill="both", expand=True)
+        self.set_result_text(f"Классификация: {os.path.basename(file_path)}")
+
+        self.stream_stop = threading.Event()
+        results = queue.Queue()
+        threading.Thread(target=self.stream_worker, args=(file_path, self.stream_stop, results), daemon=True).start()
+        self.set_running("file")
+        self.after(FOLLOW_POLL_MS, self.poll_streaming, results)
+
+    def stop_streaming(self):
+        if self.stream_stop is not None:
+            self.stream_stop.set()
+            self.stream_stop = None
+
+    def stream_worker(self, file_path, stop, results):
+        # Маски частей не накапливаются, для сводки достаточно счётчиков строк
+        totals = {"rows": 0, "dropped": 0}
+
+        def check_quality(chunk):
+            report = self.file_parser.check_quality(chunk, self.master.classifier.feature_names)
+            totals["rows"] += report.rows
+            totals["dropped"] += report.dropped
+            return report
 
-            # Убираем классы с 0%
-            filtered = [(label, p) for label, p in zip(class_labels, percentages) if p > 0]
-            if not filtered:
-                raise ValueError("Все вероятности равны 0 — невозможно построить диаграмму.")
+        try:
+            with profiler.profile("Классификация файла"):
+                chunks = self.file_parser.iter_csv_chunks(file_path, chunksize=STREAMING_CHUNK_ROWS)
+                for majority_class, avg_proba, votes, total_rows in self.master.classifier.classify_chunks(
+                    chunks, quality_check=check_quality
+                ):
+                    results.put(("progress", (majority_class, avg_proba, total_rows)))
+                    if stop.is_set():
+                        return
+            results.put(("done", (majority_class, avg_proba, totals["rows"], totals["dropped"])))
+        except Exception as e:
+            results.put(("error", f"Ошибка при классификации:\n{e}"))
+        finally:
+            results.put(("stopped", None))
+
+    def poll_streaming(self, results):
+        # Из накопившихся промежуточных результатов показываем только последний
+        latest, done, stopped, error = None, None, False, None
+        while True:
+            try:
+                kind, payload = results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                latest = payload
+            elif kind == "done":
+                done = payload
+            elif kind == "error":
+                error = payload
+            else:
+                stopped = True
 
-            filtered_labels, filtered_percentages = zip(*filtered)
+        if not self.winfo_exists():
+            return
+        if latest is not None:
+            majority_class, avg_proba, total_rows = latest
+            self.set_result_text(f"Обработано строк: {total_rows} — {majority_class} ({max(avg_proba) * 100:1.1f}%)")
+        if not stopped:
+            self.after(FOLLOW_POLL_MS, self.poll_streaming, results)
+            return
 
-            # Создаём круговую диаграмму
-            fig, ax = plt.subplots(figsize=(5, 3))
-            base_colors = list(plt.cm.Pastel1.colors)
+        self.stream_stop = None
+        self.set_running(None)
+        if error is not None:
+            messagebox.showerror("Ошибка", error)
+        elif done is not None:
+            majority_class, avg_proba, rows, dropped = done
+            self.set_quality(([dropped_summary(rows, dropped)], dropped))
+            self.show_result(majority_class, avg_proba)
+            self.fill_model_info()
+
+    def set_quality(self, quality):
+        """quality — (строки сводки проверки, число отброшенных строк) или None."""
+        self.last_quality = quality
+        if quality is None:
+            self.quality_label.config(text="")
+        else:
+            lines, dropped = quality
+            self.quality_label.config(text=lines[0], fg="red" if dropped else "gray")
+
+    def toggle_follow(self):
+        if self.follow_stop is not None:
+            self.stop_follow()
+            return
+        if self.running is not None:
+            return
 
-            labels = list(filtered_labels)
-            percentages = list(filtered_percentages)
+        file_path = filedialog.askopenfilename(filetypes=[("Файлы CSV", "*.csv"), ("Все файлы", "*.*")])
+        if not file_path:
+            return
 
-            self.labels = labels
-            self.percentages = percentages
+        # У каждого запуска своя очередь: сообщения остановленного потока не попадут в новый
+        self.follow_stop = threading.Event()
+        results = queue.Queue()
+        threading.Thread(target=self.follow_worker, args=(file_path, self.follow_stop, results), daemon=True).start()
+        self.btn_follow.config(text="Остановить слежение")
+        self.set_running("follow")
+        self.set_quality(None)
+        self.model_info_panel.pack_forget()
+        self.class_list.pack_forget()
+        self.batch_frame.pack_forget()
+        self.canvas_frame.pack(fill="both", expand=True)
+        self.set_result_text(f"Ожидание данных: {os.path.basename(file_path)}")
+        self.after(FOLLOW_POLL_MS, self.poll_follow, results)
+
+    def stop_follow(self):
+        if self.follow_stop is not None:
+            self.follow_stop.set()
+            self.follow_stop = None
+            # Новый запуск доступен, когда поток сообщит об остановке (см. poll_follow)
+            self.btn_follow.config(text="Остановка...", state="disabled")
+
+    def follow_worker(self, file_path, stop, results):
+        from infrastructure.follow import CsvFollower
 
-            # Если классов больше 10 → объединяем остальные в "Другое"
-            if len(labels) > 10:
-                main_labels = labels[:9]
-                main_percentages = percentages[:9]
+        try:
+            feature_names = self.master.classifier.feature_names
+            with CsvFollower(self.file_parser, file_path) as follower:
+                windows = self.master.classifier.classify_window(
+                    follower.follow(stop), window_rows=FOLLOW_WINDOW_ROWS,
+                    quality_check=lambda chunk: self.file_parser.check_quality(chunk, feature_names)
+                )
+                for window in windows:
+                    results.put(("window", (window.majority_class, window.avg_proba, window.rows, window.total_rows)))
+        except Exception as e:
+            results.put(("error", f"Ошибка при классификации:\n{e}"))
+        finally:
+            results.put(("stopped", None))
+
+    def poll_follow(self, results):
+        # Из накопившихся обновлений показываем только последнее
+        latest, stopped, error = None, False, None
+        while True:
+            try:
+                kind, payload = results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "window":
+                latest = payload
+            elif kind == "error":
+                error = payload
+            else:
+                stopped = True
+
+        if latest is not None and self.winfo_exists():
+            majority_class, avg_proba, rows, total_rows = latest
+            if avg_proba is not None:
+                self.show_result(majority_class, avg_proba)
+            confidence = f" ({max(avg_proba) * 100:1.1f}%)" if avg_proba is not None else ""
+            self.set_result_text(f"Последние {rows} из {total_rows} строк: {majority_class}{confidence}")
+
+        if error is not None:
+            self.stop_follow()
+            messagebox.showerror("Ошибка", error)
+        if not stopped:
+            self.after(FOLLOW_POLL_MS, self.poll_follow, results)
+        elif self.winfo_exists():
+            self.follow_stop = None
+            self.btn_follow.config(text="Следить за файлом")
+            self.set_running(None)
+
+    def toggle_batch(self):
+        if self.batch_stop is not None:
+            self.stop_batch()
+            return
+        if self.running is not None:
+            return
 
-                other_percentage = sum(percentages[9:])
-                if other_percentage > 0:
-                    main_labels.append("Другое")
-                    main_percentages.append(other_percentage)
+        file_paths = filedialog.askopenfilenames(filetypes=[("Файлы CSV", "*.csv"), ("Все файлы", "*.*")])
+        if not file_paths:
+            return
 
-                labels = main_labels
-                percentages = main_percentages
+        self.batch_run += 1
+        self.batch_results = []
+        self.batch_order = {path: i for i, path in enumerate(file_paths)}
+        self.batch_table.clear()
+
+        # Как у слежения: своя очередь у каждого запуска
+        self.batch_stop = threading.Event()
+        results = queue.Queue()
+        threading.Thread(target=self.batch_worker, args=(list(file_paths), self.batch_stop, results), daemon=True).start()
+        self.btn_batch.config(text="Остановить классификацию")
+        self.set_running("batch")
+        self.model_info_panel.pack_forget()
+        self.class_list.pack_forget()
+        self.canvas_frame.pack_forget()
+        self.batch_frame.pack(fill="both", expand=True)
+        self.batch_status.config(text=f"Файлов: {len(file_paths)}, обработано: 0")
+        self.after(BATCH_POLL_MS, self.poll_batch, results, len(file_paths), self.batch_run)
+
+    def stop_batch(self):
+        if self.batch_stop is not None:
+            self.batch_stop.set()
+            self.batch_stop = None
+            # Как у слежения: новый запуск доступен, когда поток сообщит об остановке (см. poll_batch)
+            self.btn_batch.config(text="Остановка...", state="disabled")
+
+    def batch_worker(self, file_paths, stop, results):
+        # Файлы разбираются и классифицируются в пуле потоков: чтение и predict большей частью отпускают GIL,
+        # а модель и настройки разбора не копируются в дочерние процессы
+        from infrastructure.batch import iter_classify_files
 
-            # Подбираем цвета
-            colors = base_colors[:len(labels)]
-            if "Другое" in labels:
-                colors.append("#F7EAA0")
+        try:
+            with profiler.stage("Пакетная классификация", files=len(file_paths)):
+                for result in iter_classify_files(
+                    self.file_parser, self.master.classifier, file_paths, max_workers=self.file_parser.max_workers
+                ):
+                    results.put(("result", result))
+                    if stop.is_set():
+                        break
+        except Exception as e:
+            results.put(("error", f"Ошибка при классификации:\n{e}"))
+        finally:
+            results.put(("stopped", None))
 
-            # Если много классов (более 2), используем легенду
-            if len(labels) > 2:
-                wedges, _ = ax.pie(
-                    percentages,
-                    startangle=90,
-                    colors=colors,
-                    textprops={"fontsize": 10}
-                )
-                ax.legend(wedges, labels, title="Классы", loc="center left", bbox_to_anchor=(1.0, 0.5))
+    def poll_batch(self, results, total, run):
+        if run != self.batch_run:
+            # Опрос прежнего запуска: его результаты не смешиваются с текущими
+            return
+
+        # Все накопившиеся результаты добавляются в таблицу одним обновлением
+        rows, stopped, error = [], False, None
+        while True:
+            try:
+                kind, payload = results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "result":
+                self.batch_results.append(payload)
+                rows.append(batch_row(payload))
+            elif kind == "error":
+                error = payload
             else:
-                ax.pie(
-                    percentages,
-                    labels=labels,
-                    autopct="%1.1f%%",
-                    startangle=90,
-                    colors=colors,
-                    textprops={"fontsize": 10}
-                )
+                stopped = True
 
-            ax.axis("equal")
-            fig.tight_layout()
+        if not self.winfo_exists():
+            return
+        if rows:
+            self.batch_table.append(rows)
+        failed = sum(1 for result in self.batch_results if result["error"])
+        status = f"Файлов: {total}, обработано: {len(self.batch_results)}"
+        if failed:
+            status += f", с ошибкой: {failed}"
+        self.batch_status.config(text=status)
+
+        if error is not None:
+            messagebox.showerror("Ошибка", error)
+        if not stopped:
+            self.after(BATCH_POLL_MS, self.poll_batch, results, total, run)
+            return
+
+        self.batch_stop = None
+        self.btn_batch.config(text="Классифицировать много файлов")
+        self.set_running(None)
+        self.fill_model_info()
+        if not hasattr(self, "batch_export_btn") or not self.batch_export_btn.winfo_exists():
+            self.batch_export_btn = tk.Button(
+                self.bottom_frame,
+                text="Экспортировать таблицу",
+                command=self.export_batch_results
+            )
+            self.batch_export_btn.pack(side="right", anchor="e", padx=(5, 0))
+
+    def export_batch_results(self):
+        if not self.batch_results:
+            messagebox.showwarning("Предупреждение", "Нет данных для экспорта.")
+            return
+
+        path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV файлы", "*.csv")],
+            title="Сохранить результаты пакетной классификации"
+        )
+        if path:
+            from infrastructure.batch import write_results
+            # Файлы в CSV — в порядке выбора, а не в порядке готовности
+            ordered = sorted(self.batch_results, key=lambda result: self.batch_order.get(result["file"], 0))
+            try:
+                write_results(ordered, path)
+            except Exception as e:
+                messagebox.showerror("Ошибка", f"Не удалось сохранить файл:\n{e}")
 
-            self.canvas = FigureCanvasTkAgg(fig, master=self.canvas_frame)
-            self.canvas.draw()
+    def set_result_text(self, text):
+        self.result_text.config(state="normal")
+        self.result_text.delete("1.0", tk.END)
+        self.result_text.insert("1.0", text, "bold")
+        self.result_text.tag_add("center", "1.0", "end")
+        self.result_text.config(state="disabled")
+
+    def show_result(self, majority_class, avg_proba):
+        clf = self.master.classifier
+        self.last_result = (majority_class, avg_proba)
+
+        # Убираем классы с 0%
+        class_labels = list(clf.model.classes_)
+        percentages = avg_proba * 100
+        filtered = [(label, p) for label, p in zip(class_labels, percentages) if p > 0]
+        if not filtered:
+            raise ValueError("Все вероятности равны 0 — невозможно построить диаграмму.")
+
+        filtered_labels, filtered_percentages = zip(*filtered)
+        self.labels = list(filtered_labels)
+        self.percentages = list(filtered_percentages)
+
+        share = max(filtered_percentages)
+        if clf.label_index is not None and clf.label_index.has_conflicts:
+            self.merge_check.pack(after=self.result_text)
+            if self.merge_similar.get():
+                majority_class = clf.label_index.group_of(majority_class)
+                self.labels, self.percentages = clf.label_index.merge(self.labels, self.percentages)
+                # Доля самой группы, а не наибольшая из долей: после объединения это могут быть разные группы
+                if majority_class in self.labels:
+                    share = self.percentages[self.labels.index(majority_class)]
+        else:
+            self.merge_check.pack_forget()
+
+        # Обновляем текст
+        self.set_result_text(f"Результат: {majority_class} ({share:1.1f}%)")
+
+        # Скрываем info, показываем результат
+        self.model_info_panel.pack_forget()
+        self.class_list.pack_forget()
+        self.batch_frame.pack_forget()
+        self.canvas_frame.pack(fill="both", expand=True)
+
+        self.request_chart(self.labels, self.percentages)
+
+        # Добавляем кнопку экспорта
+        if not hasattr(self, "export_btn") or not self.export_btn.winfo_exists():
+            self.export_btn = tk.Button(
+                self.bottom_frame,
+                text="Экспортировать результаты",
+                command=self.export_result
+            )
+            self.export_btn.pack(side="right", anchor="e")
+
+    def redraw_result(self):
+        if self.last_result is not None:
+            self.show_result(*self.last_result)
+
+    def request_chart(self, labels, percentages):
+        """
+        Диаграмма рисуется сразу, если с прошлой отрисовки прошло не меньше CHART_MIN_INTERVAL_MS,
+        иначе — по таймеру, и тогда рисуется только последний результат.
+        """
+        self.chart_pending = (labels, percentages)
+        if self.chart_after_id is not None:
+            return
+        wait_ms = CHART_MIN_INTERVAL_MS - (time.monotonic() - self.chart_drawn_at) * 1000
+        if wait_ms <= 0:
+            self.draw_pending_chart()
+        else:
+            self.chart_after_id = self.after(int(wait_ms), self.draw_pending_chart)
+
+    def draw_pending_chart(self):
+        self.chart_after_id = None
+        if self.chart_pending is None:
+            return
+        labels, percentages = self.chart_pending
+        self.chart_pending = None
+        with profiler.stage("Окно: диаграмма"):
+            self.draw_chart(labels, percentages)
+        self.chart_drawn_at = time.monotonic()
+
+    def draw_chart(self, labels, percentages):
+        labels, percentages = merge_small_classes(labels, percentages)
+
+        if self.figure is None:
+            Figure, FigureCanvasTkAgg, self.chart_colors = load_matplotlib()
+            self.figure = Figure(figsize=(5, 3))
+            self.figure.add_subplot()
+            self.canvas = FigureCanvasTkAgg(self.figure, master=self.canvas_frame)
             self.canvas.get_tk_widget().pack()
             self.restore_icon()
 
-            # Обновляем текст
-            self.result_text.config(state="normal")
-            self.result_text.delete("1.0", tk.END)
-            self.result_text.tag_configure("center", justify='center')
-            self.result_text.tag_configure("bold", font=("Arial", 14, "bold"))
-
-            self.result_text.insert("1.0", f"Результат: {majority_class} ({max(filtered_percentages):1.1f}%)", "bold")
-            self.result_text.tag_add("center", "1.0", "end")
-            self.result_text.config(state="disabled")
-
-            # Скрываем info, показываем результат
-            self.model_info_panel.pack_forget()
-            self.class_list.pack_forget()
-            self.canvas_frame.pack(fill="both", expand=True)
-
-            # Добавляем кнопку экспорта
-            if not hasattr(self, "export_btn") or not self.export_btn.winfo_exists():
-                self.export_btn = tk.Button(
-                    self.bottom_frame,
-                    text="Экспортировать результаты",
-                    command=self.export_result
-                )
-                self.export_btn.pack(side="right", anchor="e")
+        # Те же классы с легендой — меняются только углы секторов, оси и легенда не строятся заново
+        if labels == self.chart_labels and self.chart_wedges is not None:
+            update_wedges(self.chart_wedges, percentages)
+            self.canvas.draw_idle()
+            return
 
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Ошибка при классификации:\n{e}")
+        ax = self.figure.axes[0]
+        ax.clear()
+
+        # Подбираем цвета
+        colors = self.chart_colors[:len(labels)]
+        if "Другое" in labels:
+            colors.append("#F7EAA0")
+
+        # Если много классов (более 2), используем легенду
+        if len(labels) > 2:
+            wedges, _ = ax.pie(
+                percentages,
+                startangle=90,
+                colors=colors,
+                textprops={"fontsize": 10}
+            )
+            ax.legend(wedges, labels, title="Классы", loc="center left", bbox_to_anchor=(1.0, 0.5))
+            self.chart_wedges = wedges
+        else:
+            # Подписи с процентами проще построить заново, чем переставлять
+            ax.pie(
+                percentages,
+                labels=labels,
+                autopct="%1.1f%%",
+                startangle=90,
+                colors=colors,
+                textprops={"fontsize": 10}
+            )
+            self.chart_wedges = None
+
+        ax.axis("equal")
+        self.figure.tight_layout()
+        self.chart_labels = labels
+        self.canvas.draw_idle()
 
     def restore_icon(self):
         if sys.platform == "darwin":
             self.master.set_icon()
 
-def has_similar_label(label, class_labels):
-    """
-    Проверяет, есть ли среди class_labels другие элементы с таким же префиксом,
-    как у label, но с числовыми суффиксами.
-    Пример: label='air_001', class_labels=['air_001', 'air_002', 'ethanol'] → True
-    """
-    match = re.match(r"^(.*)_\d+$", label)
-    if not match:
-        return False
-
-    prefix = match.group(1)
-    similar = [
-        other for other in class_labels
-        if other != label and re.fullmatch(f"{re.escape(prefix)}_\\d+", other)
-    ]
-
-    return len(similar) > 0
+def merge_small_classes(labels, percentages):
+    # Если классов больше CHART_MAX_CLASSES → объединяем остальные в "Другое"
+    labels, percentages = list(labels), list(percentages)
+    if len(labels) > CHART_MAX_CLASSES:
+        other_percentage = sum(percentages[CHART_MAX_CLASSES - 1:])
+        labels = labels[:CHART_MAX_CLASSES - 1]
+        percentages = percentages[:CHART_MAX_CLASSES - 1]
+        if other_percentage > 0:
+            labels.append("Другое")
+            percentages.append(other_percentage)
+    return labels, percentages
+
+
+def update_wedges(wedges, percentages):
+    # Те же углы, что у ax.pie(startangle=90): секторы против часовой стрелки от вертикали
+    total = sum(percentages)
+    theta = 90.0
+    for wedge, value in zip(wedges, percentages):
+        sweep = 360.0 * value / total
+        wedge.set_theta1(theta)
+        wedge.set_theta2(theta + sweep)
+        theta += sweep
+
+
+def batch_row(result):
+    # Строка таблицы по результату classify_file; у файла с ошибкой вместо класса — текст ошибки
+    if result["error"]:
+        return (os.path.basename(result["file"]), f"Ошибка: {result['error']}", "", "", "", f"{result['seconds']:.2f}")
+    confidence = f"{result['confidence'] * 100:.1f}%" if result["confidence"] is not None else ""
+    return (os.path.basename(result["file"]), result["class"], confidence, result["rows"], result["dropped"],
+            f"{result['seconds']:.2f}")
@@ -1,12 +1,33 @@
 import os
+import queue
+import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from gui.browser import FileListPanel
-import joblib
 
-from gui.classificationWindow import ClassificationWindow
-from domain.calc import Classifier
-from infrastructure.fileparser import FileParser
+from domain.models import MODEL_SPECS, DEFAULT_FEATURE_COLUMNS, DEFAULT_TARGET_COLUMN, DEFAULT_VALUE_RANGES
+from domain.profiling import profiler, DEFAULT_DEBUG_DIR
+from domain.progress import TrainingMonitor, TrainingCancelled
+from domain.quality import parse_value_ranges, format_value_ranges
+
+# pandas, sklearn и matplotlib импортируются при первом использовании (см. file_parser, classifier,
+# load_classifier и open_classification_window), чтобы главное окно появлялось сразу
+
+# Способы распараллеливания подбора гиперпараметров (подпись -> бэкенд joblib)
+SEARCH_BACKENDS = {"Процессы": "loky", "Потоки": "threading"}
+
+# Стратегии подбора гиперпараметров (подпись -> стратегия Classifier)
+SEARCH_STRATEGIES = {
+    "Полный перебор": "grid",
+    "Случайный поиск": "random",
+    "Последовательное деление": "halving",
+}
+
+# Модели в настройках (подпись -> тип для Classifier.train)
+MODEL_TYPES = {spec.label: model_type for model_type, spec in MODEL_SPECS.items()}
+
+# Период опроса фонового обучения, мс
+TRAINING_POLL_MS = 100
 
 
 class MainGui(tk.Tk):
@@ -14,14 +35,27 @@ class MainGui(tk.Tk):
         super().__init__()
         
         self.train_data = None
-        self.file_parser = FileParser()
+        self.train_quality = None
+        self._file_parser = None
+
+        # Допустимые диапазоны признаков: строки вне них не участвуют в обучении и классификации
+        self.value_ranges = dict(DEFAULT_VALUE_RANGES)
 
         self.active_classifier = None
         self.feature_names = []
         self.target_name = None
         
-        self.classifier = Classifier()
+        self._classifier = None
         self.loaded_files = []
+
+        # Файл, из которого загружена или в который сохранена текущая модель: дообучение обновляет его на месте
+        self.model_path = None
+
+        # Фоновое обучение: поток, наблюдатель и очередь сообщений для окна
+        self.training_thread = None
+        self.training_monitor = None
+        self.training_queue = queue.Queue()
+
         self.title("Enose")
         self.geometry("400x600")
 
@@ -74,6 +108,20 @@ class MainGui(tk.Tk):
 
         self.switch_tab("Главная")
     
+    @property
+    def file_parser(self):
+        if self._file_parser is None:
+            from infrastructure.fileparser import FileParser
+            self._file_parser = FileParser()
+        return self._file_parser
+
+    @property
+    def classifier(self):
+        if self._classifier is None:
+            from domain.calc import Classifier
+            self._classifier = Classifier()
+        return self._classifier
+
     def set_icon(self):
         icon_path = os.path.join(os.path.dirname(__file__), "..", "assets", "iconlogo.png")
         icon_path = os.path.abspath(icon_path)
@@ -120,6 +168,25 @@ class MainGui(tk.Tk):
         self.train_btn = ttk.Button(buttons_frame, text="Обучить модель", command=self.train_model, state="disabled")
         self.train_btn.grid(row=2, column=1, sticky="ew")
 
+        # Дообучить загруженную или обученную модель на новых файлах (без подбора параметров)
+        self.update_btn = ttk.Button(buttons_frame, text="Дообучить модель", command=self.update_model, state="disabled")
+        self.update_btn.grid(row=3, column=0, columnspan=2, sticky="ew", pady=(5, 0))
+
+        # Прогресс фонового обучения (скрыт, пока обучение не идёт)
+        self.training_frame = ttk.Frame(buttons_frame)
+        self.training_frame.grid(row=4, column=0, columnspan=2, sticky="ew", pady=(10, 0))
+        self.training_frame.grid_columnconfigure(0, weight=1)
+
+        self.training_progress = ttk.Progressbar(self.training_frame, mode="determinate", maximum=100)
+        self.training_progress.grid(row=0, column=0, sticky="ew", padx=(0, 5))
+
+        self.cancel_train_btn = ttk.Button(self.training_frame, text="Отмена", command=self.cancel_training)
+        self.cancel_train_btn.grid(row=0, column=1, sticky="e")
+
+        self.training_status = tk.Label(self.training_frame, text="", font=("Arial", 9), anchor="w")
+        self.training_status.grid(row=1, column=0, columnspan=2, sticky="w")
+        self.training_frame.grid_remove()
+
         # Заголовок и список файлов
         self.descr_label = tk.Label(
             frame,
@@ -155,6 +222,7 @@ class MainGui(tk.Tk):
             self.goto_classifier_btn.grid()
         else:
             self.goto_classifier_btn.grid_remove()
+        self.set_selected_files(self.loaded_files)
 
     def show_browser(self):
         self.descr_label.config(text="📂 Загруженные файлы")
@@ -164,10 +232,12 @@ class MainGui(tk.Tk):
     
     def set_selected_files(self, selected_files):
         self.loaded_files = selected_files
-        if len(selected_files) > 0:
+        if len(selected_files) > 0 and self.training_thread is None:
             self.train_btn.config(state="normal")
         else:
             self.train_btn.config(state="disabled")
+        can_update = len(selected_files) > 0 and self.training_thread is None and self.active_classifier is not None
+        self.update_btn.config(state="normal" if can_update else "disabled")
 
     def load_classifier(self):
         path = filedialog.askopenfilename(
@@ -176,12 +246,12 @@ class MainGui(tk.Tk):
         )
         if path:
             try:
-                data = joblib.load(path)
-                self.active_classifier = data["model"]
-                self.feature_names = data.get("features", [])
-                self.target_name = data.get("target", "Неизвестно")
-
-                self.classifier.set_model(self.active_classifier, self.feature_names, self.target_name)
+                from infrastructure.modelstore import load_classifier
+                loaded = load_classifier(path, classifier=self.classifier)
+                self.model_path = path
+                self.active_classifier = loaded.model
+                self.feature_names = loaded.feature_names
+                self.target_name = loaded.target_name
 
                 self.file_list_panel.pack_forget()
                 self.model_info_panel.pack(fill="both", expand=True)
@@ -199,6 +269,18 @@ class MainGui(tk.Tk):
                 self.model_info_panel.insert("end", "Целевой столбец:\n", "bold")
                 self.model_info_panel.insert("end", f"{self.target_name}\n")
 
+                metadata = loaded.metadata
+                if metadata:
+                    self.model_info_panel.insert("end", "\nСохранено:\n", "bold")
+                    self.model_info_panel.insert("end", f"{metadata.get('created', '')}, scikit-learn {metadata.get('sklearn_version', '?')}\n")
+                    if metadata.get("best_score") is not None:
+                        self.model_info_panel.insert("end", "Точность на кросс-валидации:\n", "bold")
+                        self.model_info_panel.insert("end", f"{metadata['best_score']}\n")
+                    if metadata.get("updates"):
+                        last = metadata["updates"][-1]
+                        self.model_info_panel.insert("end", "Дообучений:\n", "bold")
+                        self.model_info_panel.insert("end", f"{len(metadata['updates'])}, последнее {last['time']} (+{last['rows']} строк)\n")
+
                 self.model_info_panel.config(state="disabled")
 
                 self.update_classifier_buttons()
@@ -255,7 +337,7 @@ class MainGui(tk.Tk):
         model_label = tk.Label(form_frame, text="Используемая модель:")
         model_label.grid(row=2, column=0, sticky="w", padx=(0, 10), pady=5)
         self.selected_model = tk.StringVar(value="KNN")
-        model_options = ["KNN", "SVM", "Decision Tree", "Logistic Regression"]
+        model_options = list(MODEL_TYPES)
         model_selector = ttk.Combobox(
             form_frame,
             values=model_options,
@@ -268,8 +350,8 @@ class MainGui(tk.Tk):
         model_selector.bind("<<ComboboxSelected>>", on_change)
 
         # Признаки
-        self.feature_columns = tk.StringVar(value="Датчик1,Датчик2,Датчик3,Датчик4,Датчик5,Датчик6,Датчик7,Датчик8,Влажность,Температура")
-        self.target_column = tk.StringVar(value="Материал")
+        self.feature_columns = tk.StringVar(value=','.join(DEFAULT_FEATURE_COLUMNS))
+        self.target_column = tk.StringVar(value=DEFAULT_TARGET_COLUMN)
 
         features_label = tk.Label(form_frame, text="Столбцы признаков:")
         features_label.grid(row=3, column=0, sticky="nw", padx=(0, 10), pady=5)
@@ -285,6 +367,117 @@ class MainGui(tk.Tk):
         target_entry.grid(row=4, column=1, sticky="w", pady=5)
         target_entry.bind("<KeyRelease>", on_change)
 
+        # Параллельный подбор гиперпараметров
+        self.search_jobs = tk.StringVar(value=str(os.cpu_count() or 1))
+        self.search_backend = tk.StringVar(value="Процессы")
+        self.search_memory_mb = tk.StringVar(value="")
+
+        jobs_label = tk.Label(form_frame, text="Параллельных задач:")
+        jobs_label.grid(row=5, column=0, sticky="w", padx=(0, 10), pady=5)
+        jobs_selector = ttk.Spinbox(
+            form_frame,
+            from_=1,
+            to=os.cpu_count() or 1,
+            textvariable=self.search_jobs,
+            state="readonly",
+            width=17,
+            command=on_change
+        )
+        jobs_selector.grid(row=5, column=1, sticky="w", pady=5)
+
+        backend_label = tk.Label(form_frame, text="Параллелизм:")
+        backend_label.grid(row=6, column=0, sticky="w", padx=(0, 10), pady=5)
+        backend_selector = ttk.Combobox(
+            form_frame,
+            values=list(SEARCH_BACKENDS),
+            textvariable=self.search_backend,
+            state="readonly",
+            width=17,
+            takefocus=0
+        )
+        backend_selector.grid(row=6, column=1, sticky="w", pady=5)
+        backend_selector.bind("<<ComboboxSelected>>", on_change)
+
+        memory_label = tk.Label(form_frame, text="Лимит памяти, МБ:")
+        memory_label.grid(row=7, column=0, sticky="w", padx=(0, 10), pady=5)
+        memory_entry = tk.Entry(form_frame, textvariable=self.search_memory_mb, width=25)
+        memory_entry.grid(row=7, column=1, sticky="w", pady=5)
+        memory_entry.bind("<KeyRelease>", on_change)
+
+        # Стратегия подбора гиперпараметров и её бюджет
+        self.search_strategy = tk.StringVar(value=next(iter(SEARCH_STRATEGIES)))
+        self.search_n_iter = tk.StringVar(value="10")
+        self.search_time_budget = tk.StringVar(value="")
+
+        strategy_label = tk.Label(form_frame, text="Стратегия подбора:")
+        strategy_label.grid(row=8, column=0, sticky="w", padx=(0, 10), pady=5)
+        strategy_selector = ttk.Combobox(
+            form_frame,
+            values=list(SEARCH_STRATEGIES),
+            textvariable=self.search_strategy,
+            state="readonly",
+            width=17,
+            takefocus=0
+        )
+        strategy_selector.grid(row=8, column=1, sticky="w", pady=5)
+        strategy_selector.bind("<<ComboboxSelected>>", on_change)
+
+        n_iter_label = tk.Label(form_frame, text="Кандидатов (случайный):")
+        n_iter_label.grid(row=9, column=0, sticky="w", padx=(0, 10), pady=5)
+        n_iter_entry = tk.Entry(form_frame, textvariable=self.search_n_iter, width=25)
+        n_iter_entry.grid(row=9, column=1, sticky="w", pady=5)
+        n_iter_entry.bind("<KeyRelease>", on_change)
+
+        time_budget_label = tk.Label(form_frame, text="Лимит времени, с:")
+        time_budget_label.grid(row=10, column=0, sticky="w", padx=(0, 10), pady=5)
+        time_budget_entry = tk.Entry(form_frame, textvariable=self.search_time_budget, width=25)
+        time_budget_entry.grid(row=10, column=1, sticky="w", pady=5)
+        time_budget_entry.bind("<KeyRelease>", on_change)
+
+        # Предобработка показаний датчиков
+        self.prep_standardize = tk.BooleanVar(value=False)
+        self.prep_baseline = tk.StringVar(value="")
+        self.prep_compensate = tk.BooleanVar(value=False)
+        self.prep_window = tk.StringVar(value="0")
+
+        standardize_check = ttk.Checkbutton(
+            form_frame, text="Стандартизация признаков", variable=self.prep_standardize, command=on_change
+        )
+        standardize_check.grid(row=11, column=0, columnspan=2, sticky="w", pady=5)
+
+        compensate_check = ttk.Checkbutton(
+            form_frame, text="Компенсация влажности и температуры", variable=self.prep_compensate, command=on_change
+        )
+        compensate_check.grid(row=12, column=0, columnspan=2, sticky="w", pady=5)
+
+        baseline_label = tk.Label(form_frame, text="Базовая линия (квантиль):")
+        baseline_label.grid(row=13, column=0, sticky="w", padx=(0, 10), pady=5)
+        baseline_entry = tk.Entry(form_frame, textvariable=self.prep_baseline, width=25)
+        baseline_entry.grid(row=13, column=1, sticky="w", pady=5)
+        baseline_entry.bind("<KeyRelease>", on_change)
+
+        window_label = tk.Label(form_frame, text="Скользящее окно, строк:")
+        window_label.grid(row=14, column=0, sticky="w", padx=(0, 10), pady=5)
+        window_entry = tk.Entry(form_frame, textvariable=self.prep_window, width=25)
+        window_entry.grid(row=14, column=1, sticky="w", pady=5)
+        window_entry.bind("<KeyRelease>", on_change)
+
+        # Допустимые диапазоны признаков, например "Влажность=0..100; Температура=-40..85"
+        ranges_var = tk.StringVar(value=format_value_ranges(self.value_ranges))
+        ranges_label = tk.Label(form_frame, text="Допустимые диапазоны:")
+        ranges_label.grid(row=15, column=0, sticky="w", padx=(0, 10), pady=5)
+        ranges_entry = tk.Entry(form_frame, textvariable=ranges_var, width=25)
+        ranges_entry.grid(row=15, column=1, sticky="w", pady=5)
+        ranges_entry.bind("<KeyRelease>", on_change)
+
+        # Режим отладки: журнал замеров и дампы cProfile в DEFAULT_DEBUG_DIR
+        self.debug_mode = tk.BooleanVar(value=profiler.debug)
+        debug_check = ttk.Checkbutton(
+            form_frame, text=f"Режим отладки (замеры и профиль в {DEFAULT_DEBUG_DIR})",
+            variable=self.debug_mode, command=on_change
+        )
+        debug_check.grid(row=16, column=0, columnspan=2, sticky="w", pady=5)
+
         # Кнопка "Применить"
         def apply_settings():
             features = features_text.get("1.0", "end").strip()
@@ -302,82 +495,275 @@ class MainGui(tk.Tk):
                 messagebox.showwarning("Предупреждение", "Некорректный формат в поле признаков.")
                 return
 
+            memory_limit = self.search_memory_mb.get().strip()
+            if memory_limit and not (memory_limit.isdigit() and int(memory_limit) > 0):
+                messagebox.showwarning("Предупреждение", "Лимит памяти должен быть положительным целым числом.")
+                return
+
+            n_iter = self.search_n_iter.get().strip()
+            if not (n_iter.isdigit() and int(n_iter) > 0):
+                messagebox.showwarning("Предупреждение", "Число кандидатов должно быть положительным целым числом.")
+                return
+
+            time_budget = self.search_time_budget.get().strip()
+            if time_budget and not (time_budget.isdigit() and int(time_budget) > 0):
+                messagebox.showwarning("Предупреждение", "Лимит времени должен быть положительным целым числом.")
+                return
+
+            baseline = self.prep_baseline.get().strip().replace(',', '.')
+            try:
+                if baseline and not 0 <= float(baseline) <= 1:
+                    raise ValueError
+            except ValueError:
+                messagebox.showwarning("Предупреждение", "Квантиль базовой линии должен быть числом от 0 до 1.")
+                return
+
+            window = self.prep_window.get().strip()
+            if window and not window.isdigit():
+                messagebox.showwarning("Предупреждение", "Длина окна должна быть неотрицательным целым числом.")
+                return
+
+            try:
+                value_ranges = parse_value_ranges(ranges_var.get())
+            except ValueError as e:
+                messagebox.showwarning("Предупреждение", f"Допустимые диапазоны (Столбец=мин..макс через ';'):\n{e}")
+                return
+
+            try:
+                profiler.enable_debug(DEFAULT_DEBUG_DIR if self.debug_mode.get() else None)
+            except OSError as e:
+                messagebox.showwarning("Предупреждение", f"Не удалось включить режим отладки:\n{e}")
+                return
+
             self.feature_columns.set(','.join(feature_list))
             self.target_column.set(target)
+            self.value_ranges = value_ranges
 
             # messagebox.showinfo("Успех", "Настройки успешно применены.")
             apply_btn.config(state="disabled")
 
         apply_btn = ttk.Button(form_frame, text="Применить", command=apply_settings, state="disabled")
-        apply_btn.grid(row=5, column=1, sticky="e", pady=(10, 0))
+        apply_btn.grid(row=17, column=1, sticky="e", pady=(10, 0))
 
         label_footer = tk.Label(frame, text="© Лаборатория наноматериалов, 2025", font=("Arial", 10))
         label_footer.grid(row=99, column=0, sticky="s", pady=10)
 
     def train_model(self):
+        if self.training_thread is not None:
+            return
+
+        model_name = self.selected_model.get()
+        model_type = MODEL_TYPES.get(model_name)
+        if model_type is None:
+            messagebox.showwarning("Модель", f"Неизвестная модель: {model_name}")
+            return
+
+        # Настройки читаются в главном потоке: Tk-переменные нельзя трогать из фонового
+        self.configure_file_parser()
+
+        memory_limit = self.search_memory_mb.get().strip()
+        self.classifier.set_search_params(
+            n_jobs=int(self.search_jobs.get()),
+            backend=SEARCH_BACKENDS[self.search_backend.get()],
+            max_memory_mb=int(memory_limit) if memory_limit.isdigit() else None
+        )
+
+        n_iter = self.search_n_iter.get().strip()
+        time_budget = self.search_time_budget.get().strip()
+        self.classifier.set_search_strategy(
+            strategy=SEARCH_STRATEGIES[self.search_strategy.get()],
+            n_iter=int(n_iter) if n_iter.isdigit() else 10,
+            time_budget=int(time_budget) if time_budget.isdigit() else None
+        )
+
+        baseline = self.prep_baseline.get().strip().replace(',', '.')
+        window = self.prep_window.get().strip()
         try:
-            self.file_parser.set_file_params(
-                sep=self.csv_delimiter.get(),
-                decimal=self.csv_decimal.get()
+            self.classifier.set_preprocessing(
+                standardize=self.prep_standardize.get(),
+                baseline_quantile=float(baseline) if baseline else None,
+                compensate_environment=self.prep_compensate.get(),
+                window=int(window) if window.isdigit() else 0
             )
-            self.file_parser.set_columns(
-                self.feature_columns.get().split(','), self.target_column.get()
+        except ValueError as e:
+            messagebox.showwarning("Предупреждение", f"Неверные настройки предобработки:\n{e}")
+            return
+
+        feature_columns = [col.strip() for col in self.feature_columns.get().split(',')]
+        target_column = self.target_column.get().strip()
+
+        self.training_monitor = TrainingMonitor(callback=lambda state: self.training_queue.put(("progress", state)))
+        self.classifier.set_monitor(self.training_monitor)
+
+        # Замеры в окне классификации относятся к этому обучению
+        profiler.reset()
+        self.show_training_progress()
+        self.training_thread = threading.Thread(
+            target=self.training_worker,
+            args=(model_type, feature_columns, target_column, list(self.loaded_files)),
+            daemon=True
+        )
+        self.training_thread.start()
+        self.after(TRAINING_POLL_MS, self.poll_training)
+
+    def update_model(self):
+        if self.training_thread is not None or self.active_classifier is None:
+            return
+
+        self.configure_file_parser()
+        self.training_monitor = TrainingMonitor(callback=lambda state: self.training_queue.put(("progress", state)))
+        self.classifier.set_monitor(self.training_monitor)
+
+        profiler.reset()
+        self.show_training_progress()
+        self.training_thread = threading.Thread(
+            target=self.update_worker,
+            args=(list(self.loaded_files), self.model_path),
+            daemon=True
+        )
+        self.training_thread.start()
+        self.after(TRAINING_POLL_MS, self.poll_training)
+
+    def update_worker(self, file_paths, model_path):
+        # Выполняется в фоновом потоке, как training_worker
+        from infrastructure.updates import update_from_files
+        try:
+            self.training_monitor.set_stage("Загрузка файлов")
+            mode, new_files = update_from_files(
+                self.file_parser, self.classifier, file_paths, progress=self.training_monitor.file_parsed
             )
-            self.train_data = self.file_parser.load_multiple_csvs(self.loaded_files)
-
-            model_name = self.selected_model.get()
-            if model_name == "KNN":
-                self.train_with("knn")
-            elif model_name == "SVM":
-                self.train_with("svm")
-            elif model_name == "Decision Tree":
-                self.train_with("decision_tree")
-            elif model_name == "Logistic Regression":
-                self.train_with("logistic_regression")
-            else:
-                messagebox.showwarning("Модель", f"Неизвестная модель: {model_name}")
+            if model_path:
+                from infrastructure.modelstore import save_classifier
+                self.training_monitor.set_stage("Сохранение модели")
+                save_classifier(self.classifier, model_path, file_parser=self.file_parser)
+            self.training_queue.put(("updated", (self.classifier.model, mode, len(new_files), model_path)))
+        except TrainingCancelled:
+            self.training_queue.put(("cancelled", None))
+        except Exception as e:
+            self.training_queue.put(("error", f"Не удалось дообучить модель:\n{e}"))
 
+    def training_worker(self, model_type, feature_columns, target_column, file_paths):
+        # Выполняется в фоновом потоке: с окном общается только через очередь
+        try:
+            self.training_monitor.set_stage("Загрузка файлов")
+            with profiler.stage("Загрузка файлов", files=len(file_paths)):
+                self.train_data = self.file_parser.load_dataset(file_paths, progress=self.training_monitor.file_parsed)
+                self.train_quality = self.file_parser.check_quality(self.train_data, feature_columns)
+        except TrainingCancelled:
+            self.training_queue.put(("cancelled", None))
+            return
         except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить файлы:\n{e}")
+            self.training_queue.put(("error", f"Не удалось загрузить файлы:\n{e}"))
+            return
 
+        try:
+            model = self.train_with(model_type, feature_columns, target_column)
+            self.classifier.set_training_files(file_paths)
+            self.training_queue.put(("done", model))
+        except TrainingCancelled:
+            self.training_queue.put(("cancelled", None))
+        except Exception as e:
+            self.training_queue.put(("error", f"Не удалось обучить модель:\n{str(e)}"))
 
-    def train_with(self, model_type):
+    def train_with(self, model_type, feature_columns, target_column):
         if self.train_data is None:
-            messagebox.showerror("Ошибка", "Не заданы данные для обучения.")
-            return
+            raise ValueError("Не заданы данные для обучения.")
 
-        try:
-            feature_columns = [col.strip() for col in self.feature_columns.get().split(',')]
-            target_column = self.target_column.get().strip()
-
-            if model_type == "knn":
-                model = self.classifier.train_knn(self.train_data, feature_columns, target_column)
-            elif model_type == "svm":
-                model = self.classifier.train_svm(self.train_data, feature_columns, target_column)
-            elif model_type == "decision_tree":
-                model = self.classifier.train_decision_tree(self.train_data, feature_columns, target_column)
-            elif model_type == "logistic_regression":
-                model = self.classifier.train_logistic_regression(self.train_data, feature_columns, target_column)
+        return self.classifier.train(model_type, self.train_data, feature_columns, target_column, quality=self.train_quality)
+
+    def poll_training(self):
+        finished = None
+        while True:
+            try:
+                kind, payload = self.training_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                self.update_training_progress(payload)
             else:
-                raise ValueError(f"Неподдерживаемый тип модели: {model_type}")
+                finished = (kind, payload)
 
-            self.active_classifier = model
+        if finished is None:
+            self.after(TRAINING_POLL_MS, self.poll_training)
+            return
+
+        self.training_thread = None
+        self.classifier.set_monitor(None)
+        self.hide_training_progress()
+
+        kind, payload = finished
+        if kind == "done":
+            # Новая модель ещё не сохранена: дообучение не должно перезаписать прежний файл
+            self.model_path = None
+            self.active_classifier = payload
             self.feature_names = self.classifier.feature_names
             self.target_name = self.classifier.target_name
-
+            self.update_classifier_buttons()
+            self.open_classification_window()
+        elif kind == "updated":
+            from domain.incremental import UPDATE_MODES
+            model, mode, n_files, model_path = payload
+            self.active_classifier = model
+            text = f"Новых файлов: {n_files}\nСпособ: {UPDATE_MODES[mode]}"
+            if self.classifier.training_quality is not None:
+                text += "\n" + "\n".join(self.classifier.training_quality.summary_lines())
+            text += f"\nМодель сохранена в {model_path}" if model_path else "\nМодель не сохранена в файл"
+            messagebox.showinfo("Дообучение", text)
+            self.update_classifier_buttons()
             self.open_classification_window()
+        elif kind == "error":
+            messagebox.showerror("Ошибка", payload)
+
+    def cancel_training(self):
+        if self.training_monitor is not None:
+            self.training_monitor.cancel()
+            self.cancel_train_btn.config(state="disabled")
+            self.training_status.config(text="Отмена...")
+
+    def show_training_progress(self):
+        self.train_btn.config(state="disabled")
+        self.update_btn.config(state="disabled")
+        self.load_model_btn.config(state="disabled")
+        self.cancel_train_btn.config(state="normal")
+        self.training_progress.config(value=0)
+        self.training_status.config(text="Подготовка...")
+        self.training_frame.grid()
+
+    def hide_training_progress(self):
+        self.training_frame.grid_remove()
+        self.load_model_btn.config(state="normal")
+        self.set_selected_files(self.loaded_files)
+
+    def update_training_progress(self, state):
+        if state["folds_total"]:
+            self.training_progress.config(value=100 * state["folds_done"] / state["folds_total"])
+            text = f"Фолды: {state['folds_done']}/{state['folds_total']}, кандидатов осталось: {state['candidates_left']}"
+            if state["eta"] is not None:
+                text += f", ~{int(state['eta'])} с"
+        elif state["files_total"]:
+            self.training_progress.config(value=100 * state["files_done"] / state["files_total"])
+            text = f"Файлы: {state['files_done']}/{state['files_total']}"
+        else:
+            text = state["stage"]
+        if not self.training_monitor.cancelled:
+            self.training_status.config(text=text)
 
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось обучить модель:\n{str(e)}")
-    
-    def open_classification_window(self):
+    def configure_file_parser(self):
         self.file_parser.set_file_params(
             sep=self.csv_delimiter.get(),
             decimal=self.csv_decimal.get()
         )
         self.file_parser.set_columns(
-                self.feature_columns.get().split(','), self.target_column.get()
+            self.feature_columns.get().split(','), self.target_column.get()
         )
+        self.file_parser.set_value_ranges(self.value_ranges)
+
+    def open_classification_window(self):
+        self.configure_file_parser()
+        from gui.classificationWindow import ClassificationWindow
+        # Прежнее окно скрыто, а не закрыто: уничтожаем его, чтобы не копились окна с диаграммами
+        if getattr(self, "classification_window", None) is not None and self.classification_window.winfo_exists():
+            self.classification_window.destroy()
         self.withdraw()
         self.classification_window = ClassificationWindow(self)
 
@@ -0,0 +1,131 @@
+from tkinter import ttk
+
+# Высота строки и заголовка по умолчанию, пока в таблице нет строк, по которым их можно измерить
+DEFAULT_ROW_HEIGHT = 20
+DEFAULT_HEADING_HEIGHT = 24
+
+
+class VirtualTable(ttk.Frame):
+    """
+    Таблица для десятков тысяч строк: данные хранятся в списке, а в Treeview живут только
+    видимые строки. Прокрутка переписывает значения этих строк, поэтому время обновления
+    не зависит от общего числа строк.
+    """
+
+    def __init__(self, parent, columns: dict, row_tag=None, height: int = 10, selectable: bool = False, *args, **kwargs):
+        """
+        columns — {идентификатор: (заголовок, ширина, выравнивание)};
+        row_tag — функция строка -> тег Treeview (или None) для подсветки строк;
+        selectable — можно выбрать одну строку, её номер в rows — в selected.
+        """
+        super().__init__(parent, *args, **kwargs)
+        self.rows = []
+        self.row_tag = row_tag
+        self.first = 0
+        self.visible = height
+        self.selectable = selectable
+        self.selected = None
+
+        self.tree = ttk.Treeview(
+            self, columns=tuple(columns), show="headings", selectmode="browse" if selectable else "none", height=height
+        )
+        for column, (heading, width, anchor) in columns.items():
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor=anchor)
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda _: self.scroll_to(self.first - 3))
+        self.tree.bind("<Button-5>", lambda _: self.scroll_to(self.first + 3))
+        if selectable:
+            self.tree.bind("<<TreeviewSelect>>", self.on_select)
+
+    def tag_configure(self, tag: str, **options) -> None:
+        self.tree.tag_configure(tag, **options)
+
+    def append(self, rows: list[tuple]) -> None:
+        # Если список был прокручен до конца, он остаётся в конце и показывает новые строки
+        at_end = self.first + self.visible >= len(self.rows)
+        self.rows.extend(rows)
+        if at_end:
+            self.first = max(0, len(self.rows) - self.visible)
+        self.refresh()
+
+    def clear(self) -> None:
+        self.rows = []
+        self.first = 0
+        self.selected = None
+        self.refresh()
+
+    def delete(self, index: int) -> None:
+        del self.rows[index]
+        if self.selected is not None and self.selected >= index:
+            self.selected = self.selected - 1 if self.selected > index else None
+        self.first = max(0, min(self.first, len(self.rows) - self.visible))
+        self.refresh()
+
+    def scroll_to(self, first: int) -> None:
+        first = max(0, min(int(first), len(self.rows) - self.visible))
+        if first != self.first:
+            self.first = first
+            self.refresh()
+
+    def refresh(self) -> None:
+        shown = self.rows[self.first:self.first + self.visible]
+        items = self.tree.get_children()
+        if len(items) > len(shown):
+            self.tree.delete(*items[len(shown):])
+            items = items[:len(shown)]
+        for _ in range(len(shown) - len(items)):
+            self.tree.insert("", "end")
+        for item, row in zip(self.tree.get_children(), shown):
+            tag = self.row_tag(row) if self.row_tag is not None else None
+            self.tree.item(item, values=row, tags=(tag,) if tag else ())
+
+        # Выделение привязано к строке данных, а не к элементу Treeview, который при прокрутке показывает другие строки
+        if self.selectable:
+            items = self.tree.get_children()
+            position = self.selected - self.first if self.selected is not None else -1
+            if 0 <= position < len(items):
+                self.tree.selection_set(items[position])
+            elif self.tree.selection():
+                self.tree.selection_remove(self.tree.selection())
+
+        if self.rows:
+            self.scrollbar.set(self.first / len(self.rows), min(1.0, (self.first + self.visible) / len(self.rows)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def on_select(self, _event):
+        items = self.tree.selection()
+        if items:
+            self.selected = self.first + self.tree.index(items[0])
+
+    def on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self.scroll_to(float(args[0]) * len(self.rows))
+        elif action == "scroll":
+            step = self.visible if args[1] == "pages" else 1
+            self.scroll_to(self.first + int(args[0]) * step)
+
+    def on_mousewheel(self, event):
+        # Windows и macOS: delta кратна 120 (Windows) или 1 (macOS) на одно деление колеса
+        units = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll_to(self.first - 3 * units)
+
+    def on_resize(self, event):
+        # Сколько строк помещается в окне: высоты заголовка и строки берутся по первой строке таблицы
+        items = self.tree.get_children()
+        bbox = self.tree.bbox(items[0]) if items else None
+        heading, row_height = (bbox[1], bbox[3]) if bbox else (DEFAULT_HEADING_HEIGHT, DEFAULT_ROW_HEIGHT)
+        visible = max(1, (event.height - heading) // max(row_height, 1))
+        if visible != self.visible:
+            self.visible = visible
+            self.first = max(0, min(self.first, len(self.rows) - self.visible))
+            self.refresh()
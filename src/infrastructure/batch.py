@@ -0,0 +1,89 @@
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+from domain.calc import Classifier
+from infrastructure.fileparser import FileParser
+
+# Состояние процесса-исполнителя: парсер и модель передаются один раз при запуске процесса
+_worker_state = {}
+
+
+def classify_file(file_parser: FileParser, classifier: Classifier, file_path: str, with_proba: bool = True) -> dict:
+    """
+    Классифицирует один файл целиком. Ошибка не прерывает пакетную обработку,
+    а возвращается в поле "error".
+    """
+    started = time.perf_counter()
+    result = {"file": file_path, "class": None, "confidence": None, "rows": 0, "dropped": 0, "seconds": 0.0, "error": None}
+    try:
+        # Файл не кэшируется в парсере: при пакетной обработке тысяч файлов кэш только расходует память
+        df = file_parser.parse_csv(file_path)
+        quality = file_parser.check_quality(df, classifier.feature_names)
+        result["dropped"] = quality.dropped
+        majority_class, avg_proba, preds, probs = classifier.classify_batch(df, with_proba, quality)
+        result["class"] = str(majority_class)
+        result["confidence"] = float(avg_proba.max()) if avg_proba is not None else float((preds == majority_class).mean())
+        result["rows"] = len(preds)
+    except Exception as e:
+        result["error"] = str(e)
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def iter_classify_files(file_parser: FileParser, classifier: Classifier, file_paths: list[str],
+                        max_workers: int | None = None, use_processes: bool = False, with_proba: bool = True):
+    """Классифицирует файлы параллельно и возвращает результаты по мере готовности."""
+    workers = min(max_workers or os.cpu_count() or 1, len(file_paths)) or 1
+    if workers == 1:
+        for path in file_paths:
+            yield classify_file(file_parser, classifier, path, with_proba)
+        return
+
+    if use_processes:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(file_parser, classifier))
+        task, args = _classify_in_worker, ()
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+        task, args = classify_file, (file_parser, classifier)
+
+    with executor:
+        futures = [executor.submit(task, *args, path, with_proba) for path in file_paths]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def write_results(results: list[dict], output: str | None) -> None:
+    """Результаты classify_file в CSV (cp1251, ';'); без output — в консоль."""
+    f = open(output, "w", newline="", encoding="1251") if output else sys.stdout
+    try:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["Файл", "Класс", "Уверенность", "Строк", "Отброшено строк", "Время, с", "Ошибка"])
+        for result in results:
+            writer.writerow([
+                result["file"],
+                result["class"] or "",
+                f"{result['confidence'] * 100:.2f}%" if result["confidence"] is not None else "",
+                result["rows"],
+                result["dropped"],
+                f"{result['seconds']:.3f}",
+                result["error"] or ""
+            ])
+    finally:
+        if output:
+            f.close()
+
+
+def _init_worker(file_parser: FileParser, classifier: Classifier) -> None:
+    _worker_state["file_parser"] = file_parser
+    _worker_state["classifier"] = classifier
+
+
+def _classify_in_worker(file_path: str, with_proba: bool) -> dict:
+    return classify_file(_worker_state["file_parser"], _worker_state["classifier"], file_path, with_proba)
@@ -0,0 +1,178 @@
+import codecs
+import json
+import os
+import threading
+
+from chardet.universaldetector import UniversalDetector
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".enose", "encodings.json")
+
+# Байты кириллицы в cp1251: прописные А-Я, строчные а-я, Ё и ё
+_CP1251_UPPER = bytes(range(0xC0, 0xE0)) + b'\xa8'
+_CP1251_LOWER = bytes(range(0xE0, 0x100)) + b'\xb8'
+_ASCII = bytes(range(0x80))
+
+
+class EncodingDetector:
+    """
+    Определяет кодировку CSV-файла по ограниченному фрагменту в начале файла.
+    Результаты запоминаются для каждого файла и для каждой папки и сохраняются на диск,
+    поэтому файлы одного прибора из одной папки распознаются почти мгновенно.
+    """
+
+    SAMPLE_SIZE = 64 * 1024
+    CHUNK_SIZE = 4 * 1024
+    MIN_CONFIDENCE = 0.6
+    FALLBACK_ENCODING = 'cp1251'
+
+    # Кандидаты для повторного определения по всему файлу; latin-1 декодирует любые байты
+    REDETECT_ENCODINGS = ('utf-8', 'cp1251', 'cp866', 'koi8-r', 'latin-1')
+    READ_BLOCK_SIZE = 1024 * 1024
+
+    def __init__(self, cache_path: str | None = DEFAULT_CACHE_PATH):
+        self.cache_path = cache_path
+        self._files = {}
+        self._dirs = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def detect(self, file_path: str, raw_data: bytes) -> str:
+        file_path = os.path.abspath(file_path)
+        directory = os.path.dirname(file_path)
+        stat = os.stat(file_path)
+
+        with self._lock:
+            entry = self._files.get(file_path)
+            dir_encoding = self._dirs.get(directory)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2]
+
+        encoding = self.detect_bytes(raw_data, hint=dir_encoding)
+        self.remember(file_path, [stat.st_mtime_ns, stat.st_size, encoding])
+        return encoding
+
+    def redetect(self, file_path: str, failed: str, raw_data: bytes | None = None) -> str:
+        """
+        Кодировка, определённая по началу файла, не подошла дальше по файлу (UnicodeDecodeError).
+        Кандидаты проверяются по всему содержимому: raw_data или файлу, читаемому блоками.
+        """
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        encoding = self.REDETECT_ENCODINGS[-1]
+        for candidate in self.REDETECT_ENCODINGS:
+            if candidate != failed and self._decodes_file(file_path, candidate, raw_data):
+                encoding = candidate
+                break
+        self.remember(file_path, [stat.st_mtime_ns, stat.st_size, encoding])
+        return encoding
+
+    def remember(self, file_path: str, entry: list) -> None:
+        """Запоминает кодировку файла и его папки; entry — [mtime, размер, кодировка]."""
+        file_path = os.path.abspath(file_path)
+        with self._lock:
+            if self._files.get(file_path) != entry:
+                self._files[file_path] = list(entry)
+                self._dirs[os.path.dirname(file_path)] = entry[2]
+                self._dirty = True
+
+    def detect_bytes(self, raw_data: bytes, is_complete: bool | None = None, hint: str | None = None) -> str:
+        """
+        Определение по одним байтам, без кэша: для потоков и растущих файлов.
+        hint — кодировка, которую стоит проверить до полного анализа.
+        """
+        sample = raw_data[:self.SAMPLE_SIZE]
+        if is_complete is None:
+            is_complete = len(raw_data) <= self.SAMPLE_SIZE
+
+        encoding = self._fast_path(sample, is_complete)
+        if encoding is None and hint and _decodes(sample, hint, is_complete):
+            encoding = hint
+        if encoding is None:
+            encoding = self._detect_incremental(sample, is_complete)
+        return encoding
+
+    def save(self) -> None:
+        if not self.cache_path or not self._dirty:
+            return
+        with self._lock:
+            data = {"files": self._files, "dirs": self._dirs}
+            self._dirty = False
+        # Кэш вспомогательный: ошибки записи не должны мешать загрузке данных
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+
+    def _load(self) -> None:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                data = json.load(f)
+            self._files = dict(data.get("files", {}))
+            self._dirs = dict(data.get("dirs", {}))
+        except (OSError, ValueError):
+            self._files, self._dirs = {}, {}
+
+    def _fast_path(self, sample: bytes, is_complete: bool) -> str | None:
+        if sample.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        if _decodes(sample, 'utf-8', is_complete):
+            return 'utf-8'
+
+        # Все не-ASCII байты — кириллица cp1251, и строчных букв больше, чем прописных
+        non_ascii = sample.translate(None, _ASCII)
+        lower = len(non_ascii) - len(non_ascii.translate(None, _CP1251_LOWER))
+        upper = len(non_ascii) - len(non_ascii.translate(None, _CP1251_UPPER))
+        if non_ascii and lower + upper == len(non_ascii) and lower > upper:
+            return 'cp1251'
+        return None
+
+    def _decodes_file(self, file_path: str, encoding: str, raw_data: bytes | None) -> bool:
+        if raw_data is not None:
+            return _decodes(raw_data, encoding, True)
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)(errors='strict')
+            with open(file_path, 'rb') as f:
+                while block := f.read(self.READ_BLOCK_SIZE):
+                    decoder.decode(block)
+            decoder.decode(b'', final=True)
+            return True
+        except (UnicodeDecodeError, LookupError):
+            return False
+
+    def _detect_incremental(self, sample: bytes, is_complete: bool) -> str:
+        detector = UniversalDetector()
+        for start in range(0, len(sample), self.CHUNK_SIZE):
+            detector.feed(sample[start:start + self.CHUNK_SIZE])
+            if detector.done:
+                break
+        result = detector.close()
+
+        encoding = result.get('encoding')
+        if encoding and result.get('confidence', 0) >= self.MIN_CONFIDENCE and _decodes(sample, encoding, is_complete):
+            return encoding
+        return self.FALLBACK_ENCODING
+
+
+def _decodes(sample: bytes, encoding: str, is_complete: bool) -> bool:
+    # Фрагмент может обрываться посреди многобайтового символа, поэтому декодируем инкрементально
+    try:
+        codecs.getincrementaldecoder(encoding)(errors='strict').decode(sample, final=is_complete)
+        return True
+    except (UnicodeDecodeError, LookupError):
+        return False
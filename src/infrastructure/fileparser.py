@@ -1,5 +1,21 @@
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
 import pandas as pd
-import chardet
+from pandas.api.types import union_categoricals
+
+from domain.models import DEFAULT_VALUE_RANGES
+from domain.profiling import profiler
+from domain.quality import QualityReport, check_quality
+from infrastructure.encoding import EncodingDetector
 
 class FileParser:
     def __init__(self):
@@ -8,6 +24,43 @@ class FileParser:
         self.feature_names = list()
         self.target_name = ''
 
+        # Признаки читаются сразу в числа, целевой столбец — в категориальный тип
+        self.float_dtype = 'float64'
+        self.csv_engine = 'c'
+
+        # Допустимые диапазоны признаков для проверки качества строк: {столбец: (минимум, максимум)}
+        self.value_ranges = dict(DEFAULT_VALUE_RANGES)
+
+        # Параллельная загрузка файлов
+        self.max_workers = os.cpu_count() or 1
+
+        self.encoding_detector = EncodingDetector()
+
+        # Бинарные снимки объединённых данных (признаки + целевой столбец)
+        self.snapshot_dir = os.path.join(os.path.expanduser("~"), ".enose", "snapshots")
+        self.max_snapshots = 8
+        self._last_dataset = None
+
+        # Кэш разобранных файлов: путь -> (mtime, размер, параметры разбора, DataFrame, байты);
+        # сверх max_cache_mb вытесняются давно не использованные файлы, но не файлы текущей загрузки
+        self.max_cache_mb = 1024
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._cache_lock = threading.Lock()
+
+    def __getstate__(self):
+        # Для пула процессов пакетной классификации передаём только параметры разбора, без кэша
+        state = self.__dict__.copy()
+        state['_cache'] = OrderedDict()
+        state['_cache_bytes'] = 0
+        state['_last_dataset'] = None
+        del state['_cache_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._cache_lock = threading.Lock()
+
     def set_file_params(self, sep: str, decimal: str) -> None:
         self.csv_delimiter = sep
         self.csv_decimal = decimal
@@ -15,44 +68,363 @@ class FileParser:
     def set_columns(self, x: list[str], y: str) -> None:
         self.feature_names = x
         self.target_name = y
-        
+
+    def set_number_format(self, float_dtype: str = 'float64', engine: str = 'c') -> None:
+        self.float_dtype = float_dtype
+        self.csv_engine = engine
+
+    def set_value_ranges(self, value_ranges: dict) -> None:
+        self.value_ranges = dict(value_ranges)
+
+    def set_parallel_params(self, max_workers: int) -> None:
+        self.max_workers = max(1, int(max_workers))
+
+    def parse_settings(self) -> tuple:
+        return (self.csv_delimiter, self.csv_decimal, tuple(self.feature_names), self.target_name, self.float_dtype)
+
+    def clear_cache(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+
     def load_single_csv(self, file_path) -> pd.DataFrame:
+        df = self._get_cached(file_path)
+        if df is None:
+            df = self.parse_csv(file_path)
+            self._put_cached(file_path, df)
+            self.encoding_detector.save()
+        # Поверхностная копия, чтобы вызывающий код не портил кэш (например, переименованием столбцов)
+        return df.copy(deep=False)
+
+    def parse_csv(self, file_path) -> pd.DataFrame:
+        df = self.read_csv_auto_encoding(file_path)
+
+        with profiler.stage("Разбор: преобразование чисел"):
+            return self._convert_columns(df)
+
+    def check_quality(self, df: pd.DataFrame, feature_names: list[str] | None = None) -> QualityReport:
+        """
+        Проверка разобранных данных за один проход по каждому признаку: маска пригодных строк,
+        пропуски, значения вне value_ranges и на их границе. Столбцы уже числовые,
+        поэтому массивы берутся из DataFrame без копирования. Маску принимают
+        Classifier.train и Classifier.classify_batch (параметр quality).
+        feature_names — признаки модели, если они отличаются от признаков разбора (по умолчанию self.feature_names).
+        """
+        with profiler.stage("Разбор: проверка качества", rows=len(df)):
+            columns = {str(col).strip(): col for col in df.columns}
+            features = []
+            for name in feature_names if feature_names is not None else self.feature_names:
+                if name not in columns:
+                    continue
+                column = df[columns[name]]
+                if not pd.api.types.is_numeric_dtype(column):
+                    column = pd.to_numeric(column, errors='coerce')
+                # float32 и float64 — без копирования; целые (в том числе с pd.NA) — в float с NaN
+                if isinstance(column.dtype, np.dtype) and column.dtype.kind == 'f':
+                    values = column.to_numpy()
+                else:
+                    values = column.to_numpy(dtype=float, na_value=np.nan)
+                features.append((name, values))
+            return check_quality(features, self.value_ranges, rows=len(df))
+
+    def iter_csv_chunks(self, file_path, chunksize: int = 100_000):
+        """
+        Читает файл частями по chunksize строк, не загружая его целиком в память.
+        Кодировка определяется по фрагменту в начале файла.
+        """
+        with open(file_path, 'rb') as f:
+            sample = f.read(self.encoding_detector.SAMPLE_SIZE + 1)
+        encoding = self.encoding_detector.detect(file_path, sample)
+        self.encoding_detector.save()
+
+        # Типы признаков не задаём: если десятичный знак не совпадёт с настройкой,
+        # столбец придёт строками и будет преобразован так же, как в parse_csv
+        rows = 0
         try:
-            df = self.read_csv_auto_encoding(file_path)
-        except Exception as e:
-            print("Ошибка:", e)
+            for chunk in self._read_chunks(file_path, encoding, chunksize):
+                rows += len(chunk)
+                yield chunk
+        except UnicodeDecodeError:
+            # Кодировка определена по началу файла и не подошла дальше: продолжаем с той же строки
+            encoding = self.encoding_detector.redetect(file_path, encoding)
+            self.encoding_detector.save()
+            yield from self._read_chunks(file_path, encoding, chunksize, skip_rows=rows)
 
-        # Преобразуем все числовые признаки
-        for col in self.feature_names:
-            if col in df.columns:
-                df[col] = df[col].str.replace(',', '.').astype(float)
+    def _read_chunks(self, file_path, encoding: str, chunksize: int, skip_rows: int = 0):
+        reader = pd.read_csv(
+            file_path, encoding=encoding, sep=self.csv_delimiter, decimal=self.csv_decimal, chunksize=chunksize,
+            skiprows=range(1, skip_rows + 1) if skip_rows else None
+        )
+        with reader:
+            for chunk in reader:
+                yield self._convert_columns(chunk)
 
-        # Привести целевой признак к строковому виду
-        if self.target_name in df.columns:
-            df[self.target_name] = df[self.target_name].astype(str).str.strip()
+    def load_multiple_csvs(self, file_paths: list[str], progress=None) -> pd.DataFrame:
+        """
+        progress(done, total) вызывается после разбора каждого файла;
+        исключение из progress (например, отмена обучения) прерывает загрузку.
+        """
+        # Разбираем только новые или изменившиеся файлы, остальные берём из кэша
+        frames = {}
+        for path in dict.fromkeys(file_paths):
+            df = self._get_cached(path)
+            if df is not None:
+                frames[path] = df
+        pending = [path for path in dict.fromkeys(file_paths) if path not in frames]
+        # Файлы этой загрузки не вытесняют друг друга: при дообучении разбирается только новый файл
+        active = {os.path.abspath(path) for path in file_paths}
+        try:
+            with profiler.stage("Разбор файлов", files=len(pending)):
+                for path, df in zip(pending, self._parse_many(pending, progress)):
+                    frames[path] = df
+                    self._put_cached(path, df, keep=active)
+        finally:
+            self.encoding_detector.save()
 
-        return df
+        with profiler.stage("Объединение таблиц"):
+            # Поверхностные копии, как в load_single_csv: изменение категорий не затрагивает кэш
+            all_dfs = [frames[path].copy(deep=False) for path in file_paths]
 
+            # Общий набор категорий, чтобы после объединения целевой столбец остался категориальным
+            targets = [df[self.target_name] for df in all_dfs if self.target_name in df.columns]
+            if targets:
+                categories = union_categoricals(targets, ignore_order=True).categories
+                for df in all_dfs:
+                    if self.target_name in df.columns:
+                        df[self.target_name] = df[self.target_name].cat.set_categories(categories)
 
-    def load_multiple_csvs(self, file_paths: list[str]) -> pd.DataFrame:
-        all_dfs = []
-        for path in file_paths:
-            df = self.load_single_csv(path)
-            all_dfs.append(df)
-        combined = pd.concat(all_dfs, ignore_index=True)
+            combined = pd.concat(all_dfs, ignore_index=True)
+            # Границы файлов: признаки скользящего окна считаются в пределах одного файла
+            combined.attrs["file_rows"] = [len(df) for df in all_dfs]
         return combined
 
+    def load_dataset(self, file_paths: list[str], progress=None, snapshot: bool = True) -> pd.DataFrame:
+        """
+        Возвращает признаки и целевой столбец набора файлов.
+        При повторном вызове с теми же файлами и настройками данные не разбираются заново,
+        а отображаются в память из бинарного снимка.
+        snapshot=False — без снимка (классификация отдельных файлов): разовые наборы
+        не вытесняют из каталога снимки обучающих выборок.
+        """
+        if not snapshot:
+            return self.load_multiple_csvs(file_paths, progress)
+
+        key = self.snapshot_key(file_paths)
+        # Тот же набор данных возвращается тем же объектом: Classifier переиспользует извлечённые из него массивы
+        if self._last_dataset is not None and self._last_dataset[0] == key:
+            return self._last_dataset[1]
+
+        snapshot_path = os.path.join(self.snapshot_dir, key)
+        with profiler.stage("Снимок: чтение"):
+            df = self._read_snapshot(snapshot_path)
+        if df is None:
+            combined = self.load_multiple_csvs(file_paths, progress)
+            with profiler.stage("Снимок: запись"):
+                df = self._write_snapshot(snapshot_path, combined)
+        self._last_dataset = (key, df)
+        return df
+
+    def snapshot_key(self, file_paths: list[str]) -> str:
+        digest = hashlib.sha256(repr(self.parse_settings()).encode('utf-8'))
+        for path in file_paths:
+            stat = os.stat(path)
+            digest.update(f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}\n".encode('utf-8'))
+        return digest.hexdigest()[:32]
+
     def read_csv_auto_encoding(self, file_path):
-        with open(file_path, 'rb') as f:
-            raw_data = f.read()
-            detected = chardet.detect(raw_data)
-            encoding = detected['encoding']
+        # Файл читается один раз: и определение кодировки, и разбор идут из одного буфера
+        with profiler.stage("Разбор: чтение файла"):
+            with open(file_path, 'rb') as f:
+                raw_data = f.read()
+        with profiler.stage("Разбор: определение кодировки"):
+            encoding = self.encoding_detector.detect(file_path, raw_data)
 
         try:
-            df = pd.read_csv(file_path, encoding=encoding, sep=self.csv_delimiter, decimal=self.csv_decimal, dtype=str)
-            return df
+            try:
+                return self._read_csv_bytes(raw_data, encoding)
+            except UnicodeDecodeError:
+                # Кодировка определена по началу файла, а дальше встретились байты другой кодировки
+                with profiler.stage("Разбор: определение кодировки"):
+                    encoding = self.encoding_detector.redetect(file_path, encoding, raw_data)
+                return self._read_csv_bytes(raw_data, encoding)
         except Exception as e:
             raise ValueError(f"Не удалось прочитать CSV-файл. Кодировка: {encoding}. Ошибка: {e}")
 
+    def _read_csv_bytes(self, raw_data: bytes, encoding: str) -> pd.DataFrame:
+        header = pd.read_csv(io.BytesIO(raw_data), encoding=encoding, sep=self.csv_delimiter, nrows=0).columns
+        options = dict(encoding=encoding, sep=self.csv_delimiter, decimal=self.csv_decimal, engine=self._engine())
+        with profiler.stage("Разбор: read_csv"):
+            try:
+                return pd.read_csv(io.BytesIO(raw_data), dtype=self.column_dtypes(header), **options)
+            except UnicodeDecodeError:
+                raise
+            except ValueError:
+                # Признаки не разбираются как числа с заданным десятичным знаком —
+                # читаем их строками, а преобразование выполнит parse_csv
+                return pd.read_csv(io.BytesIO(raw_data), dtype=self.column_dtypes(header, numeric=False), **options)
+
+    def column_dtypes(self, header, numeric: bool = True) -> dict:
+        # Сопоставление по имени без пробелов: заголовки в файлах бывают с отступами
+        features = set(self.feature_names)
+        dtypes = {}
+        for col in header:
+            name = str(col).strip()
+            if name in features:
+                dtypes[col] = self.float_dtype if numeric else str
+            elif name == self.target_name:
+                dtypes[col] = 'category'
+        return dtypes
+
+    def _engine(self) -> str:
+        if self.csv_engine == 'pyarrow' and importlib.util.find_spec('pyarrow') is None:
+            return 'c'
+        return self.csv_engine
+
+    def _convert_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Признаки, которые не удалось разобрать как числа (например, другой десятичный знак);
+        # нечисловые значения становятся NaN и учитываются проверкой качества как пропуски
+        features = set(self.feature_names)
+        for col in df.columns:
+            if str(col).strip() in features and not pd.api.types.is_numeric_dtype(df[col]):
+                values = df[col].astype(str).str.replace(',', '.')
+                df[col] = pd.to_numeric(values, errors='coerce').astype(self.float_dtype)
+
+        # Привести целевой признак к категориальному виду без лишних пробелов
+        if self.target_name in df.columns:
+            df[self.target_name] = strip_categories(df[self.target_name])
+
+        return df
+
+    def _parse_many(self, file_paths: list[str], progress=None) -> list[pd.DataFrame]:
+        total = len(file_paths)
+        workers = min(self.max_workers, total)
+        if workers <= 1:
+            results = []
+            for path in file_paths:
+                results.append(self.parse_csv(path))
+                if progress is not None:
+                    progress(len(results), total)
+            return results
+
+        # Потоки, а не процессы: read_csv большей частью отпускает GIL, а таблицы не нужно передавать обратно
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.parse_csv, path): i for i, path in enumerate(file_paths)}
+            results = [None] * total
+            try:
+                for done, future in enumerate(as_completed(futures), start=1):
+                    results[futures[future]] = future.result()
+                    if progress is not None:
+                        progress(done, total)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+            return results
+
+    def _read_snapshot(self, snapshot_path: str):
+        try:
+            with open(os.path.join(snapshot_path, "meta.json"), encoding='utf-8') as f:
+                meta = json.load(f)
+            # Признаки хранятся по столбцам: массив (признаки × строки) совпадает с внутренним
+            # представлением pandas, поэтому DataFrame строится поверх memmap без копирования
+            features = np.load(os.path.join(snapshot_path, "features.npy"), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        if "file_rows" not in meta:
+            # Снимок без границ файлов: разбираем файлы заново
+            return None
+
+        df = pd.DataFrame(features.T, columns=meta["features"], copy=False)
+        df.attrs["file_rows"] = meta["file_rows"]
+        if meta["target"] is not None:
+            codes = np.load(os.path.join(snapshot_path, "target.npy"))
+            df[meta["target"]] = pd.Categorical.from_codes(codes, categories=meta["categories"])
+        return df
+
+    def _write_snapshot(self, snapshot_path: str, combined: pd.DataFrame) -> pd.DataFrame:
+        columns = {str(col).strip(): col for col in combined.columns}
+        features = [name for name in self.feature_names if name in columns]
+        target = self.target_name if self.target_name in columns else None
+
+        x = combined[[columns[name] for name in features]].to_numpy(dtype=self.float_dtype)
+        df = pd.DataFrame(x, columns=features)
+        meta = {"features": features, "target": target, "categories": [],
+                "file_rows": list(combined.attrs.get("file_rows", [len(combined)]))}
+        df.attrs["file_rows"] = meta["file_rows"]
+        if target is not None:
+            categorical = pd.Categorical(combined[columns[target]])
+            df[target] = categorical
+            meta["categories"] = [str(c) for c in categorical.categories]
+
+        # Снимок вспомогательный: при ошибке записи просто работаем с данными в памяти
+        tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(tmp_path, exist_ok=True)
+            np.save(os.path.join(tmp_path, "features.npy"), np.ascontiguousarray(x.T))
+            if target is not None:
+                np.save(os.path.join(tmp_path, "target.npy"), categorical.codes)
+            with open(os.path.join(tmp_path, "meta.json"), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp_path, snapshot_path)
+            self._prune_snapshots()
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        return df
+
+    def _prune_snapshots(self) -> None:
+        snapshots = [
+            os.path.join(self.snapshot_dir, name) for name in os.listdir(self.snapshot_dir)
+            if not name.endswith(".tmp")
+        ]
+        snapshots.sort(key=os.path.getmtime, reverse=True)
+        for path in snapshots[self.max_snapshots:]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _get_cached(self, file_path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        with self._cache_lock:
+            entry = self._cache.get(os.path.abspath(file_path))
+            if entry is not None:
+                self._cache.move_to_end(os.path.abspath(file_path))
+        if entry is None:
+            return None
+        mtime, size, settings, df, _ = entry
+        if mtime != stat.st_mtime_ns or size != stat.st_size or settings != self.parse_settings():
+            return None
+        return df
+
+    def _put_cached(self, file_path, df: pd.DataFrame, keep=frozenset()) -> None:
+        """keep — абсолютные пути, которые не вытесняются, даже если кэш больше max_cache_mb."""
+        stat = os.stat(file_path)
+        path = os.path.abspath(file_path)
+        nbytes = int(df.memory_usage(index=True).sum())
+        with self._cache_lock:
+            previous = self._cache.pop(path, None)
+            if previous is not None:
+                self._cache_bytes -= previous[4]
+            self._cache[path] = (stat.st_mtime_ns, stat.st_size, self.parse_settings(), df, nbytes)
+            self._cache_bytes += nbytes
+
+            limit = self.max_cache_mb * 1024 * 1024
+            if self._cache_bytes > limit:
+                for old_path in [old for old in self._cache if old != path and old not in keep]:
+                    self._cache_bytes -= self._cache.pop(old_path)[4]
+                    if self._cache_bytes <= limit:
+                        break
+
 
-        
+def strip_categories(column: pd.Series) -> pd.Series:
+    if not isinstance(column.dtype, pd.CategoricalDtype):
+        column = column.astype('category')
+    # Пустые значения, как и раньше при astype(str), становятся классом 'nan'
+    if column.isna().any() and 'nan' not in column.cat.categories:
+        column = column.cat.add_categories(['nan'])
+    if column.isna().any():
+        column = column.fillna('nan')
+    categories = column.cat.categories.astype(str).str.strip()
+    if categories.is_unique:
+        return column.cat.rename_categories(categories)
+    return column.astype(str).str.strip().astype('category')
@@ -0,0 +1,136 @@
+import io
+import os
+import time
+
+import pandas as pd
+
+from infrastructure.fileparser import FileParser
+
+
+class CsvFollower:
+    """
+    Чтение растущего CSV-файла или потока (stdin, канал) по мере поступления строк.
+    Каждая строка разбирается ровно один раз: запоминается позиция в файле,
+    а незавершённая последняя строка ждёт своего окончания в буфере.
+    """
+
+    READ_SIZE = 1024 * 1024
+
+    def __init__(self, file_parser: FileParser, source, poll_interval: float = 0.5):
+        """
+        source — путь к файлу, '-' для stdin или двоичный поток с методом read1.
+        """
+        self.file_parser = file_parser
+        self.poll_interval = poll_interval
+
+        if source == '-':
+            self.path, self._stream = None, os.fdopen(os.dup(0), 'rb')
+        elif isinstance(source, (str, os.PathLike)):
+            self.path, self._stream = os.fspath(source), None
+        else:
+            self.path, self._stream = None, source
+
+        self._file = None
+        self.offset = 0
+        self._pending = b''
+        self._header = None
+        self._encoding = None
+        self.rows_read = 0
+        self.finished = False
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._stream is not None:
+            self._stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def read_new(self) -> pd.DataFrame | None:
+        """
+        Не блокирует для файлов: разбирает всё, что дописано с прошлого вызова.
+        Возвращает None, если новых полных строк нет.
+        """
+        return self._parse(self._read_available())
+
+    def follow(self, stop=None):
+        """
+        Генератор частей с новыми строками. Для файла ждёт дописывания бесконечно,
+        для потока — до его закрытия. stop — threading.Event для остановки.
+        """
+        while not self.finished and not (stop is not None and stop.is_set()):
+            df = self.read_new()
+            if df is not None:
+                yield df
+            elif self._stream is None:
+                if stop is not None:
+                    stop.wait(self.poll_interval)
+                else:
+                    time.sleep(self.poll_interval)
+
+    def _read_available(self) -> bytes:
+        if self._stream is not None:
+            # read1 возвращает то, что уже пришло, не дожидаясь заполнения буфера
+            data = self._stream.read1(self.READ_SIZE) if hasattr(self._stream, 'read1') else self._stream.read(self.READ_SIZE)
+            if not data:
+                self.finished = True
+            return data
+
+        if self._file is None:
+            try:
+                self._file = open(self.path, 'rb')
+            except FileNotFoundError:
+                return b''
+
+        size = os.fstat(self._file.fileno()).st_size
+        if size < self.offset:
+            # Файл перезаписан или усечён: начинаем заново с заголовка
+            self.offset, self._pending, self._header, self._encoding = 0, b'', None, None
+        self._file.seek(self.offset)
+        data = self._file.read(min(size - self.offset, self.READ_SIZE * 16))
+        self.offset += len(data)
+        return data
+
+    def _parse(self, data: bytes) -> pd.DataFrame | None:
+        buffer = self._pending + data
+        end = buffer.rfind(b'\n') + 1
+        if self.finished and buffer and not buffer.endswith(b'\n'):
+            # Поток закрыт: последняя строка без перевода строки тоже полная
+            buffer += b'\n'
+            end = len(buffer)
+        complete, self._pending = buffer[:end], buffer[end:]
+        if not complete:
+            return None
+
+        if self._header is None:
+            header_end = complete.index(b'\n') + 1
+            self._read_header(complete[:header_end], complete)
+            complete = complete[header_end:]
+            if not complete.strip():
+                return None
+
+        df = self._read_rows(complete)
+        self.rows_read += len(df)
+        return df if not df.empty else None
+
+    def _read_header(self, line: bytes, sample: bytes) -> None:
+        self._encoding = self.file_parser.encoding_detector.detect_bytes(sample, is_complete=True)
+        parser = self.file_parser
+        self._header = list(pd.read_csv(io.BytesIO(line), encoding=self._encoding, sep=parser.csv_delimiter, nrows=0).columns)
+
+    def _read_rows(self, data: bytes) -> pd.DataFrame:
+        parser = self.file_parser
+        options = dict(
+            encoding=self._encoding, sep=parser.csv_delimiter, decimal=parser.csv_decimal,
+            header=None, names=self._header, skip_blank_lines=True
+        )
+        try:
+            df = pd.read_csv(io.BytesIO(data), dtype=parser.column_dtypes(self._header), **options)
+        except ValueError:
+            df = pd.read_csv(io.BytesIO(data), dtype=parser.column_dtypes(self._header, numeric=False), **options)
+        return parser._convert_columns(df)
@@ -0,0 +1,118 @@
+import datetime
+import os
+
+import joblib
+
+from domain.calc import Classifier
+from domain.labels import LabelIndex
+from domain.quality import QualityReport
+
+# Формат файла модели. Версия 1 — словарь model/features/target без метаданных
+ARTIFACT_FORMAT = "enose-model"
+ARTIFACT_VERSION = 2
+
+
+def save_classifier(classifier: Classifier, path: str, file_parser=None, compress: int = 0) -> None:
+    """
+    Сохраняет модель с метаданными. По умолчанию без сжатия: массивы модели (например,
+    обучающая выборка KNN) лежат в файле как есть и при загрузке отображаются в память.
+    file_parser — FileParser, настройки разбора которого сохраняются вместе с моделью.
+    """
+    import sklearn
+
+    metadata = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "sklearn_version": sklearn.__version__,
+        "model_class": type(classifier.model).__name__,
+        "best_score": classifier.best_score,
+        "best_estimator": classifier.best_estimator_str,
+        "classes": [str(label) for label in getattr(classifier.model, "classes_", [])],
+        "parse_settings": parse_settings_dict(file_parser) if file_parser is not None else None,
+        "content_hash": joblib.hash(classifier.model),
+        "label_index": classifier.label_index.to_dict() if classifier.label_index is not None else None,
+        "training_files": list(classifier.training_files),
+        "updates": list(classifier.updates),
+        "rolling_window": classifier.rolling_window,
+        "training_quality": classifier.training_quality.to_dict() if classifier.training_quality is not None else None,
+    }
+    artifact = {
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "model": classifier.model,
+        "features": classifier.feature_names,
+        "target": classifier.target_name,
+        "metadata": metadata,
+    }
+
+    # Запись во временный файл и замена: прерванное сохранение не портит прежнюю модель
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        joblib.dump(artifact, tmp_path, compress=compress)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    classifier.metadata = metadata
+
+
+def load_classifier(path: str, classifier: Classifier | None = None, mmap_mode: str | None = 'c',
+                    verify: bool = False) -> Classifier:
+    """
+    Загружает модель нового или старого формата. Несжатые файлы открываются с mmap_mode:
+    массивы не читаются целиком, а подгружаются с диска по мере обращения.
+    По умолчанию 'c' (копирование при записи): часть оценщиков, например SVC, требует записываемых массивов.
+    verify — пересчитать хэш модели и сравнить с сохранённым.
+    """
+    if is_compressed(path):
+        mmap_mode = None
+    data = joblib.load(path, mmap_mode=mmap_mode)
+    if not isinstance(data, dict) or "model" not in data:
+        raise ValueError("Файл не содержит модель Enose")
+
+    version = data.get("version", 1)
+    if version > ARTIFACT_VERSION:
+        raise ValueError(f"Файл модели версии {version} создан более новой версией программы")
+
+    metadata = data.get("metadata", {})
+    if verify and metadata.get("content_hash"):
+        # joblib.hash различает memmap и обычный массив, поэтому хэш считается по модели, прочитанной целиком
+        model = data["model"] if mmap_mode is None else joblib.load(path)["model"]
+        if joblib.hash(model) != metadata["content_hash"]:
+            raise ValueError("Модель повреждена: хэш содержимого не совпадает с сохранённым")
+
+    if classifier is None:
+        classifier = Classifier()
+    # Группы похожих классов сохранены вместе с моделью; если классы не совпадают, индекс строится заново
+    label_index = None
+    classes = [str(label) for label in getattr(data["model"], "classes_", [])]
+    if metadata.get("label_index") and metadata["label_index"].get("labels") == classes:
+        label_index = LabelIndex.from_dict(metadata["label_index"])
+    classifier.set_model(
+        data["model"], data.get("features", []), data.get("target", "Неизвестно"), label_index,
+        rolling_window=metadata.get("rolling_window", 0)
+    )
+    classifier.best_score = metadata.get("best_score")
+    classifier.best_estimator_str = metadata.get("best_estimator") or str(data["model"])
+    classifier.training_files = list(metadata.get("training_files", []))
+    classifier.updates = list(metadata.get("updates", []))
+    # Classifier в окне программы общий: сводка прежней модели не должна остаться после загрузки
+    training_quality = metadata.get("training_quality")
+    classifier.training_quality = QualityReport.from_dict(training_quality) if training_quality else None
+    classifier.metadata = metadata
+    return classifier
+
+
+def parse_settings_dict(file_parser) -> dict:
+    return {
+        "sep": file_parser.csv_delimiter,
+        "decimal": file_parser.csv_decimal,
+        "float_dtype": file_parser.float_dtype,
+        "value_ranges": dict(file_parser.value_ranges),
+    }
+
+
+def is_compressed(path: str) -> bool:
+    # Несжатый файл joblib начинается с заголовка pickle (0x80), сжатый — с сигнатуры архиватора
+    with open(path, "rb") as f:
+        return f.read(1) != b"\x80"
@@ -0,0 +1,356 @@
+import hashlib
+import json
+import os
+import queue
+import re
+import socket
+import socketserver
+import stat
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from domain.calc import Classifier
+from infrastructure.modelstore import load_classifier
+
+
+# Идентификатор модели в запросе: имя файла без расширения, без разделителей пути
+MODEL_ID_PATTERN = re.compile(r"[\w.-]+")
+MODEL_EXTENSION = ".joblib"
+
+
+class ModelCache:
+    """
+    LRU-кэш загруженных моделей. Клиент выбирает модель по идентификатору (имени файла без
+    расширения) или по SHA-256 содержимого, но не по пути: загружаются только модели,
+    зарегистрированные при запуске (register), и файлы .joblib из разрешённой папки model_dir.
+    Ключ кэша — хэш содержимого, поэтому один файл под разными именами загружается один раз,
+    а перезаписанный файл — заново.
+    """
+
+    def __init__(self, capacity: int = 4, max_batch_rows: int = 4096, max_wait_ms: float = 5.0,
+                 model_dir: str | None = None):
+        self.capacity = max(1, capacity)
+        self.max_batch_rows = max_batch_rows
+        self.max_wait_ms = max_wait_ms
+        self.model_dir = os.path.abspath(model_dir) if model_dir else None
+        self._models = OrderedDict()
+        self._paths = {}
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def register(self, path: str) -> str:
+        """Разрешает модель из файла path и загружает её. Возвращает идентификатор для запросов."""
+        path = os.path.abspath(path)
+        model_id = os.path.splitext(os.path.basename(path))[0]
+        with self._lock:
+            known = self._paths.get(model_id)
+            if known is not None and known != path:
+                raise ValueError(f"Модель с идентификатором {model_id} уже зарегистрирована: {known}")
+            self._paths[model_id] = path
+        self.release(self.acquire(model_id))
+        return model_id
+
+    def acquire(self, model_id: str) -> "MicroBatcher":
+        """
+        Модель по идентификатору или хэшу. Вызывающий обязан вернуть её через release:
+        вытесненная из кэша модель закрывается, только когда её освободит последний пользователь.
+        """
+        path = self.resolve(model_id)
+        digest = self._file_hash(path)
+        with self._lock:
+            batcher = self._models.get(digest)
+            if batcher is not None:
+                self._models.move_to_end(digest)
+                batcher.users += 1
+                return batcher
+
+        # Загрузка вне блокировки: пока грузится одна модель, остальные запросы обслуживаются
+        batcher = MicroBatcher(load_classifier(path), self.max_batch_rows, self.max_wait_ms)
+        evicted = []
+        with self._lock:
+            existing = self._models.get(digest)
+            if existing is not None:
+                existing.users += 1
+                evicted.append(batcher)
+                batcher = existing
+            else:
+                batcher.users += 1
+                self._models[digest] = batcher
+                while len(self._models) > self.capacity:
+                    _, old = self._models.popitem(last=False)
+                    old.retired = True
+                    if old.users == 0:
+                        evicted.append(old)
+        for old in evicted:
+            old.close()
+        return batcher
+
+    def release(self, batcher: "MicroBatcher") -> None:
+        with self._lock:
+            batcher.users -= 1
+            close = batcher.retired and batcher.users == 0
+        if close:
+            batcher.close()
+
+    def resolve(self, model_id: str) -> str:
+        """Путь к файлу модели: зарегистрированной, с таким хэшем или из model_dir."""
+        model_id = str(model_id)
+        with self._lock:
+            path = self._paths.get(model_id)
+            if path is None:
+                path = next((known for known, entry in self._hashes.items() if entry[2] == model_id), None)
+        if path is None and self.model_dir and MODEL_ID_PATTERN.fullmatch(model_id):
+            candidate = os.path.join(self.model_dir, model_id + MODEL_EXTENSION)
+            if os.path.isfile(candidate):
+                path = candidate
+        if path is None:
+            raise ValueError(f"Неизвестная модель: {model_id}")
+        return path
+
+    def loaded(self) -> list[dict]:
+        with self._lock:
+            ids = {}
+            for model_id, path in self._paths.items():
+                entry = self._hashes.get(path)
+                if entry is not None:
+                    ids.setdefault(entry[2], []).append(model_id)
+            return [
+                {"hash": digest, "ids": ids.get(digest, []), "features": batcher.classifier.feature_names,
+                 "classes": batcher.classes}
+                for digest, batcher in self._models.items()
+            ]
+
+    def close(self) -> None:
+        with self._lock:
+            batchers = list(self._models.values())
+            self._models.clear()
+        for batcher in batchers:
+            batcher.close()
+
+    def _file_hash(self, path: str) -> str:
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._hashes.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        with self._lock:
+            self._hashes[path] = (stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+        return digest.hexdigest()
+
+
+class MicroBatcher:
+    """
+    Объединяет одновременные запросы к одной модели: строки из запросов, пришедших
+    в пределах max_wait_ms, склеиваются и классифицируются одним вызовом predict_proba.
+    """
+
+    def __init__(self, classifier: Classifier, max_batch_rows: int = 4096, max_wait_ms: float = 5.0):
+        self.classifier = classifier
+        self.classes = [str(label) for label in classifier.model.classes_]
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+
+        # Число обработчиков, держащих модель, и признак вытеснения из кэша (меняются под блокировкой ModelCache)
+        self.users = 0
+        self.retired = False
+
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, x: np.ndarray) -> Future:
+        future = Future()
+        # Проверка и постановка в очередь под одной блокировкой: после close() запрос не попадёт за признак конца
+        with self._close_lock:
+            if self._closed:
+                future.set_exception(RuntimeError("Модель выгружена из памяти"))
+            else:
+                self._queue.put((x, future))
+        return future
+
+    def close(self) -> None:
+        with self._close_lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(None)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            rows = len(item[0])
+            closing = False
+            while rows < self.max_batch_rows:
+                try:
+                    item = self._queue.get(timeout=self.max_wait)
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+                rows += len(item[0])
+
+            self._predict(batch)
+            if closing:
+                return
+
+    def _predict(self, batch: list) -> None:
+        # Признаки окна зависят от соседних строк: при окне строки разных запросов не склеиваются
+        groups = [[item] for item in batch] if self.classifier.rolling_window else [batch]
+        for group in groups:
+            self._predict_group(group)
+
+    def _predict_group(self, batch: list) -> None:
+        try:
+            x = self.classifier.model_input(np.vstack([x for x, _ in batch]))
+            preds, probs = self.classifier.predict(x)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        start = 0
+        for x, future in batch:
+            stop = start + len(x)
+            future.set_result((preds[start:stop], probs[start:stop] if probs is not None else None))
+            start = stop
+
+
+class ClassificationRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /classify  {"model": "идентификатор или хэш", "rows": [[...], ...]} или {"model": ..., "records": [{...}, ...]}
+    GET  /models    — загруженные модели
+    GET  /health
+    """
+
+    server_version = "EnoseServer/1.0"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/models":
+            self._send_json(200, {"models": self.server.model_cache.loaded()})
+        else:
+            self._send_json(404, {"error": "Неизвестный адрес"})
+
+    def do_POST(self):
+        if self.path != "/classify":
+            self._send_json(404, {"error": "Неизвестный адрес"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("Тело запроса должно быть объектом JSON")
+            batcher = self.server.model_cache.acquire(request["model"])
+        except (KeyError, ValueError, OSError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            try:
+                x = readings_matrix(request, batcher.classifier.feature_names)
+            except (KeyError, ValueError, TypeError) as e:
+                # TypeError — записи или строки не того типа, например число вместо объекта
+                self._send_json(400, {"error": str(e)})
+                return
+
+            try:
+                preds, probs = batcher.submit(x).result()
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+                return
+
+            self._send_json(200, classification_response(batcher.classes, preds, probs))
+        finally:
+            self.server.model_cache.release(batcher)
+
+    def address_string(self):
+        # У Unix-сокета нет адреса клиента
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        if not getattr(self.server, "quiet", False):
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def readings_matrix(request: dict, feature_names: list[str]) -> np.ndarray:
+    if "records" in request:
+        rows = [[record[name] for name in feature_names] for record in request["records"]]
+    else:
+        rows = request["rows"]
+
+    x = np.asarray(rows, dtype=np.float64)
+    if x.ndim != 2 or x.shape[0] == 0 or x.shape[1] != len(feature_names):
+        raise ValueError(f"Ожидается непустой список строк по {len(feature_names)} признакам: {feature_names}")
+    if not np.isfinite(x).all():
+        raise ValueError("Показания содержат пропуски или нечисловые значения")
+    return x
+
+
+def classification_response(classes: list[str], preds, probs) -> dict:
+    values, counts = np.unique(preds, return_counts=True)
+    response = {
+        "classes": classes,
+        "predictions": [str(label) for label in preds],
+        "majority_class": str(values[np.argmax(counts)]),
+    }
+    if probs is not None:
+        response["probabilities"] = np.round(probs, 4).tolist()
+        response["avg_proba"] = np.round(probs.mean(axis=0), 3).tolist()
+    return response
+
+
+class ClassificationServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, model_cache: ModelCache, quiet: bool = False):
+        self.model_cache = model_cache
+        self.quiet = quiet
+        super().__init__(address, ClassificationRequestHandler)
+
+
+if hasattr(socket, "AF_UNIX"):
+    class UnixClassificationServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def __init__(self, path: str, model_cache: ModelCache, quiet: bool = False):
+            self.model_cache = model_cache
+            self.quiet = quiet
+            remove_stale_socket(path)
+            super().__init__(path, ClassificationRequestHandler)
+
+
+def remove_stale_socket(path: str) -> None:
+    """Удаляет сокет, оставшийся от прежнего запуска; другой файл по этому пути не трогает."""
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise ValueError(f"Путь занят файлом, который не является сокетом: {path}")
+    os.unlink(path)
@@ -0,0 +1,44 @@
+import os
+
+from domain.calc import Classifier
+from infrastructure.fileparser import FileParser
+
+
+def new_training_files(classifier: Classifier, file_paths: list[str]) -> list[str]:
+    """Файлы из file_paths, которых ещё нет среди файлов обучения модели (пути абсолютные, без повторов)."""
+    known = set(classifier.training_files)
+    paths = dict.fromkeys(os.path.abspath(path) for path in file_paths)
+    return [path for path in paths if path not in known]
+
+
+def update_from_files(file_parser: FileParser, classifier: Classifier, file_paths: list[str],
+                      progress=None) -> tuple[str, list[str]]:
+    """
+    Дообучает модель на файлах, которых нет в classifier.training_files.
+    KNN и модели с partial_fit разбирают только новые файлы. Остальным нужны и прежние файлы:
+    их список хранится в модели, а повторный разбор обычно берётся из снимка или кэша FileParser.
+    Возвращает способ обновления и список новых файлов.
+    """
+    new_files = new_training_files(classifier, file_paths)
+    if not new_files:
+        raise ValueError("Нет новых файлов: все выбранные файлы уже использованы при обучении модели")
+
+    if classifier.updates_incrementally:
+        paths = new_files
+    else:
+        # Модель, сохранённая без списка файлов, переобучилась бы только на новых файлах и потеряла прежние данные
+        if not classifier.training_files:
+            raise ValueError(
+                "В модели нет списка файлов обучения: дообучение без прежних данных невозможно, "
+                "обучите модель заново на всех файлах"
+            )
+        missing = [path for path in classifier.training_files if not os.path.exists(path)]
+        if missing:
+            raise ValueError(f"Не найдены файлы, на которых обучалась модель: {missing}")
+        paths = classifier.training_files + new_files
+
+    # Снимок нужен только полному набору, который разбирается при каждом дообучении
+    df = file_parser.load_dataset(paths, progress=progress, snapshot=not classifier.updates_incrementally)
+    mode = classifier.update(df, quality=file_parser.check_quality(df, classifier.feature_names))
+    classifier.set_training_files(classifier.training_files + new_files)
+    return mode, new_files
@@ -0,0 +1,98 @@
+"""Проверки определения кодировок. Запуск из src: python -m pytest tests"""
+import codecs
+
+import pandas as pd
+import pytest
+
+from infrastructure.encoding import EncodingDetector
+from infrastructure.fileparser import FileParser
+
+TEXT = "Датчик1;Влажность;Класс\n1,5;40;этанол\n2,5;41;воздух\n"
+
+
+@pytest.mark.parametrize("encoding, expected", [
+    ("utf-8", "utf-8"),
+    ("cp1251", "cp1251"),
+])
+def test_fast_path(tmp_path, encoding, expected):
+    path = tmp_path / "a.csv"
+    path.write_bytes(TEXT.encode(encoding))
+    detector = EncodingDetector(cache_path=None)
+    assert detector.detect(str(path), path.read_bytes()) == expected
+
+
+def test_utf8_bom(tmp_path):
+    path = tmp_path / "a.csv"
+    path.write_bytes(codecs.BOM_UTF8 + TEXT.encode("utf-8"))
+    assert EncodingDetector(cache_path=None).detect(str(path), path.read_bytes()) == "utf-8-sig"
+
+
+@pytest.mark.parametrize("encoding", ["cp866", "koi8-r"])
+def test_other_cyrillic_encodings_decode_text(tmp_path, encoding):
+    path = tmp_path / "a.csv"
+    path.write_bytes((TEXT * 20).encode(encoding))
+    detected = EncodingDetector(cache_path=None).detect(str(path), path.read_bytes())
+    assert path.read_bytes().decode(detected) == TEXT * 20
+
+
+def test_cache_survives_restart_and_tracks_changes(tmp_path):
+    cache_path = str(tmp_path / "encodings.json")
+    path = tmp_path / "a.csv"
+    path.write_bytes(TEXT.encode("cp1251"))
+
+    detector = EncodingDetector(cache_path=cache_path)
+    detector.detect(str(path), path.read_bytes())
+    detector.save()
+
+    # Из сохранённого кэша кодировка берётся без анализа байтов
+    restored = EncodingDetector(cache_path=cache_path)
+    assert restored.detect(str(path), b"") == "cp1251"
+
+    # Изменившийся файл определяется заново
+    path.write_bytes(TEXT.encode("utf-8") + b"\n")
+    assert restored.detect(str(path), path.read_bytes()) == "utf-8"
+
+
+def late_cp1251_file(path, ascii_rows):
+    # Начало файла — только ASCII, поэтому по фрагменту определяется utf-8; кириллица — в конце
+    lines = [b"S1;Class"]
+    lines += [b"1,5;air"] * ascii_rows
+    lines += ["2,5;этанол".encode("cp1251")] * 3
+    path.write_bytes(b"\n".join(lines) + b"\n")
+    return str(path)
+
+
+def make_parser():
+    file_parser = FileParser()
+    file_parser.encoding_detector = EncodingDetector(cache_path=None)
+    file_parser.set_columns(["S1"], "Class")
+    return file_parser
+
+
+def test_redetect_after_sample(tmp_path):
+    detector = EncodingDetector(cache_path=None)
+    path = late_cp1251_file(tmp_path / "a.csv", detector.SAMPLE_SIZE // 8)
+    assert detector.redetect(path, "utf-8") == "cp1251"
+    # Повторное определение запоминается
+    assert detector.detect(path, b"") == "cp1251"
+
+
+def test_parse_redetects_encoding(tmp_path):
+    file_parser = make_parser()
+    path = late_cp1251_file(tmp_path / "a.csv", file_parser.encoding_detector.SAMPLE_SIZE // 8)
+    df = file_parser.parse_csv(path)
+    assert list(df["Class"].iloc[-3:]) == ["этанол"] * 3
+
+
+def test_chunks_resume_after_redetect(tmp_path):
+    file_parser = make_parser()
+    # Больше буфера read_csv: ошибка декодирования возникает после первых частей
+    ascii_rows = 60_000
+    path = late_cp1251_file(tmp_path / "a.csv", ascii_rows)
+
+    chunks = list(file_parser.iter_csv_chunks(path, chunksize=5_000))
+    df = pd.concat(chunks, ignore_index=True)
+    assert len(df) == ascii_rows + 3
+    assert (df["Class"].iloc[:ascii_rows] == "air").all()
+    assert list(df["Class"].iloc[-3:]) == ["этанол"] * 3
+    assert df["S1"].dtype.kind == "f"
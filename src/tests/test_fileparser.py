@@ -0,0 +1,92 @@
+"""Проверки infrastructure.fileparser. Запуск из src: python -m pytest tests"""
+import pytest
+
+from infrastructure.encoding import EncodingDetector
+from infrastructure.fileparser import FileParser
+
+
+def write_csv(path, rows, encoding="cp1251"):
+    lines = ["A;B;Класс"] + [f"{a};{b};{label}" for a, b, label in rows]
+    path.write_bytes(("\n".join(lines) + "\n").encode(encoding))
+    return str(path)
+
+
+def make_parser(max_workers=4):
+    file_parser = FileParser()
+    file_parser.encoding_detector = EncodingDetector(cache_path=None)
+    file_parser.set_columns(["A", "B"], "Класс")
+    file_parser.set_parallel_params(max_workers)
+    return file_parser
+
+
+def count_parses(file_parser):
+    calls = []
+    parse_csv = file_parser.parse_csv
+
+    def counted(path):
+        calls.append(path)
+        return parse_csv(path)
+
+    file_parser.parse_csv = counted
+    return calls
+
+
+@pytest.fixture
+def many_files(tmp_path):
+    return [
+        write_csv(tmp_path / f"f{i:03d}.csv", [(f"{i},5", i, "воздух_1" if i % 2 else "этанол")] * 3)
+        for i in range(100)
+    ]
+
+
+def test_files_parsed_once_even_over_cache_limit(many_files):
+    file_parser = make_parser()
+    file_parser.max_cache_mb = 0
+    calls = count_parses(file_parser)
+
+    df = file_parser.load_multiple_csvs(many_files)
+    assert len(calls) == 100
+    assert len(df) == 300
+    assert df.attrs["file_rows"] == [3] * 100
+    assert df["A"].iloc[3] == 1.5
+
+    # Повторная загрузка того же набора — целиком из кэша, хотя он больше лимита
+    file_parser.load_multiple_csvs(many_files)
+    assert len(calls) == 100
+
+
+def test_retrain_parses_only_new_file(many_files, tmp_path):
+    file_parser = make_parser()
+    calls = count_parses(file_parser)
+    file_parser.load_multiple_csvs(many_files)
+
+    new_file = write_csv(tmp_path / "new.csv", [("7,5", 1, "этанол")])
+    df = file_parser.load_multiple_csvs(many_files + [new_file])
+    assert calls[100:] == [new_file]
+    assert len(df) == 301
+    assert str(df["Класс"].dtype) == "category"
+
+
+def test_changed_file_is_parsed_again(tmp_path):
+    path = write_csv(tmp_path / "a.csv", [("1,0", 2, "этанол")])
+    file_parser = make_parser(max_workers=1)
+    calls = count_parses(file_parser)
+    file_parser.load_multiple_csvs([path])
+
+    write_csv(tmp_path / "a.csv", [("1,0", 2, "этанол"), ("3,0", 4, "воздух")])
+    df = file_parser.load_multiple_csvs([path])
+    assert len(calls) == 2
+    assert len(df) == 2
+
+
+def test_cache_evicts_files_outside_current_load(tmp_path):
+    first = write_csv(tmp_path / "a.csv", [("1,0", 2, "этанол")] * 100)
+    second = write_csv(tmp_path / "b.csv", [("1,0", 2, "этанол")] * 100)
+    file_parser = make_parser(max_workers=1)
+    file_parser.max_cache_mb = 0
+    calls = count_parses(file_parser)
+
+    file_parser.load_multiple_csvs([first])
+    file_parser.load_multiple_csvs([second])
+    file_parser.load_multiple_csvs([first])
+    assert calls == [first, second, first]
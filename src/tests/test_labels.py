@@ -0,0 +1,57 @@
+"""Проверки domain.labels. Запуск из src: python -m pytest tests"""
+import random
+import re
+
+import pytest
+
+from domain.labels import LabelIndex
+
+
+def has_similar_label(label, class_labels):
+    # Прежняя проверка окна классификации: перебор всех классов для каждого класса
+    match = re.match(r"^(.*)_\d+$", label)
+    if not match:
+        return False
+    prefix = match.group(1)
+    return any(
+        other != label and re.fullmatch(f"{re.escape(prefix)}_\\d+", other)
+        for other in class_labels
+    )
+
+
+def random_labels(rng, count):
+    stems = ["air", "air_1", "ethanol", "a_b", "_", "", "x.y", "co2"]
+    labels = set()
+    while len(labels) < count:
+        stem = rng.choice(stems)
+        kind = rng.random()
+        if kind < 0.5:
+            labels.add(f"{stem}_{rng.randint(0, 12):0{rng.randint(1, 3)}d}")
+        elif kind < 0.8:
+            labels.add(stem or "empty")
+        else:
+            labels.add(f"{stem}_{rng.choice(['x', '1a', '', '٣'])}")
+    return sorted(labels)
+
+
+def test_fixed_example():
+    index = LabelIndex(["air_001", "air_002", "ethanol"])
+    assert index.has_similar("air_001")
+    assert not index.has_similar("ethanol")
+    assert index.group_of("air_002") == "air"
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_has_similar_matches_pairwise_scan(seed):
+    rng = random.Random(seed)
+    labels = random_labels(rng, rng.randint(1, 15))
+    index = LabelIndex(labels)
+    for label in labels:
+        assert index.has_similar(label) == has_similar_label(label, labels), (label, labels)
+
+
+def test_merge_sums_groups():
+    index = LabelIndex(["air_001", "air_002", "ethanol"])
+    labels, values = index.merge(["air_001", "ethanol", "air_002"], [30.0, 45.0, 25.0])
+    assert labels == ["air", "ethanol"]
+    assert values == [55.0, 45.0]
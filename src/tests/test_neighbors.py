@@ -0,0 +1,51 @@
+"""Проверки domain.neighbors. Запуск из src: python -m pytest tests"""
+import numpy as np
+import pytest
+from sklearn.neighbors import KNeighborsClassifier
+
+from domain.neighbors import shared_index_search, vote
+
+
+def _sklearn_votes(x_train, y_train, x_test, n_neighbors, weights):
+    model = KNeighborsClassifier(n_neighbors=n_neighbors, weights=weights, algorithm='brute').fit(x_train, y_train)
+    # Те же соседи, что видит sklearn, — сравнивается только голосование
+    distances, indices = model.kneighbors(x_test)
+    codes = np.searchsorted(model.classes_, y_train)
+    predicted = vote(codes[indices], distances, len(model.classes_), weights)
+    expected = np.argmax(model.predict_proba(x_test), axis=1)
+    return predicted, expected
+
+
+@pytest.mark.parametrize('weights', ['uniform', 'distance'])
+@pytest.mark.parametrize('n_neighbors', [1, 2, 4, 5])
+def test_vote_matches_sklearn(weights, n_neighbors):
+    rng = np.random.default_rng(0)
+    # Целочисленная сетка даёт равные расстояния, дубликаты точек и ничьи в голосовании
+    x_train = rng.integers(0, 3, size=(60, 2)).astype(float)
+    y_train = rng.integers(0, 3, size=60)
+    x_test = np.vstack([x_train[:20], rng.integers(0, 3, size=(20, 2)).astype(float) + 0.5])
+
+    predicted, expected = _sklearn_votes(x_train, y_train, x_test, n_neighbors, weights)
+    np.testing.assert_array_equal(predicted, expected)
+
+
+def test_vote_distance_ties():
+    # Два соседа разных классов на одинаковом расстоянии: ничья в пользу меньшего класса
+    x_train = np.array([[-1.0], [1.0], [0.0], [0.0]])
+    y_train = np.array([1, 0, 2, 1])
+    x_test = np.array([[0.0], [0.25], [3.0]])
+    for n_neighbors in (2, 3, 4):
+        predicted, expected = _sklearn_votes(x_train, y_train, x_test, n_neighbors, 'distance')
+        np.testing.assert_array_equal(predicted, expected)
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_parallel_folds_match_serial(n_jobs):
+    rng = np.random.default_rng(1)
+    x = rng.normal(size=(300, 4))
+    y = (x[:, 0] + rng.normal(scale=0.5, size=300) > 0).astype(int)
+    candidates = [{'n_neighbors': k, 'weights': w} for k in (1, 5, 15) for w in ('uniform', 'distance')]
+
+    serial, _ = shared_index_search(x, y, candidates, n_jobs=1)
+    parallel, _ = shared_index_search(x, y, candidates, n_jobs=n_jobs, backend='threading')
+    np.testing.assert_allclose(parallel.cv_results_['mean_test_score'], serial.cv_results_['mean_test_score'])
@@ -0,0 +1,126 @@
+"""Проверки качества строк при разборе. Запуск из src: python -m pytest tests"""
+import numpy as np
+import pandas as pd
+
+from domain.quality import check_quality
+from infrastructure.encoding import EncodingDetector
+from infrastructure.fileparser import FileParser
+
+ROWS = [
+    ("1,5", "40", "этанол"),
+    ("err", "41", "этанол"),
+    ("", "42", "воздух"),
+    ("2,5", "150", "воздух"),
+    ("3,5", "100", "воздух"),
+    ("4,5", "43", "этанол"),
+]
+
+
+def write_csv(path, rows=ROWS):
+    lines = ["Датчик1;Влажность;Класс"] + [";".join(row) for row in rows]
+    path.write_bytes(("\n".join(lines) + "\n").encode("cp1251"))
+    return str(path)
+
+
+def make_parser():
+    file_parser = FileParser()
+    file_parser.encoding_detector = EncodingDetector(cache_path=None)
+    file_parser.set_columns(["Датчик1", "Влажность"], "Класс")
+    file_parser.set_value_ranges({"Влажность": (0, 100)})
+    return file_parser
+
+
+def test_non_numeric_values_become_missing(tmp_path):
+    file_parser = make_parser()
+    df = file_parser.parse_csv(write_csv(tmp_path / "a.csv"))
+    assert df["Датчик1"].dtype == np.float64
+    assert df["Датчик1"].isna().tolist() == [False, True, True, False, False, False]
+
+    report = file_parser.check_quality(df)
+    assert report.nan_counts == {"Датчик1": 2}
+    assert report.out_of_range == {"Влажность": 1}
+    assert report.saturated == {"Влажность": 1}
+    assert report.valid.tolist() == [True, False, False, False, True, True]
+    assert (report.rows, report.dropped) == (6, 3)
+
+
+def test_chunks_count_the_same_rows(tmp_path):
+    file_parser = make_parser()
+    path = write_csv(tmp_path / "a.csv", ROWS * 50)
+    whole = file_parser.check_quality(file_parser.parse_csv(path))
+
+    reports = [file_parser.check_quality(chunk) for chunk in file_parser.iter_csv_chunks(path, chunksize=7)]
+    assert sum(report.rows for report in reports) == whole.rows == 300
+    assert sum(report.dropped for report in reports) == whole.dropped == 150
+    assert sum(report.nan_counts.get("Датчик1", 0) for report in reports) == 100
+    np.testing.assert_array_equal(np.concatenate([report.valid for report in reports]), whole.valid)
+
+
+def test_float32_and_model_features(tmp_path):
+    file_parser = make_parser()
+    file_parser.set_number_format("float32")
+    df = file_parser.parse_csv(write_csv(tmp_path / "a.csv"))
+    assert df["Датчик1"].dtype == np.float32
+
+    # Признаки модели, отличные от признаков разбора
+    report = file_parser.check_quality(df, ["Влажность"])
+    assert report.columns == ("Влажность",)
+    assert report.dropped == 1
+
+
+def test_covering_adds_unchecked_columns():
+    a = np.array([1.0, np.nan, 3.0])
+    b = np.array([np.nan, 2.0, 3.0])
+    report = check_quality([("A", a)])
+    covered = report.covering([("A", a), ("B", b)])
+    assert covered.columns == ("A", "B")
+    assert covered.valid.tolist() == [False, False, True]
+    assert covered.nan_counts == {"A": 1, "B": 1}
+    assert report.covering([("A", a)]) is report
+
+
+def test_check_quality_without_columns():
+    report = check_quality([], rows=4)
+    assert report.valid.tolist() == [True] * 4
+    assert pd.Series(report.to_dict()["nan"]).empty
+
+
+def test_streamed_classification_matches_whole_file(tmp_path):
+    from domain.calc import Classifier
+
+    rng = np.random.default_rng(0)
+    train = pd.DataFrame({"Датчик1": rng.normal(size=200), "Влажность": rng.uniform(0, 90, size=200)})
+    train["Класс"] = np.where(train["Датчик1"] > 0, "этанол", "воздух")
+    classifier = Classifier()
+    classifier.train("knn", train, ["Датчик1", "Влажность"], "Класс")
+
+    file_parser = make_parser()
+    path = write_csv(tmp_path / "a.csv", ROWS * 50)
+    df = file_parser.parse_csv(path)
+    majority, avg_proba, preds, _ = classifier.classify_batch(df, quality=file_parser.check_quality(df))
+
+    for majority_chunks, avg_chunks, votes, rows in classifier.classify_chunks(
+        file_parser.iter_csv_chunks(path, chunksize=7), quality_check=file_parser.check_quality
+    ):
+        pass
+    assert majority_chunks == majority
+    assert votes.sum() == len(preds) == 150
+    np.testing.assert_allclose(avg_chunks, avg_proba)
+
+
+def test_training_quality_saved_with_model(tmp_path):
+    from domain.calc import Classifier
+    from infrastructure.modelstore import load_classifier, save_classifier
+
+    file_parser = make_parser()
+    df = file_parser.parse_csv(write_csv(tmp_path / "a.csv", ROWS * 5))
+    classifier = Classifier()
+    classifier.train("knn", df, ["Датчик1", "Влажность"], "Класс", quality=file_parser.check_quality(df))
+    save_classifier(classifier, str(tmp_path / "model.joblib"))
+
+    # Загрузка в тот же объект заменяет сводку обученной ранее модели
+    other = Classifier()
+    other.train("knn", df.dropna(), ["Датчик1", "Влажность"], "Класс")
+    load_classifier(str(tmp_path / "model.joblib"), other)
+    assert other.training_quality.summary_lines() == classifier.training_quality.summary_lines()
+    assert other.training_quality.to_dict() == classifier.training_quality.to_dict()
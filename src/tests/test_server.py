@@ -0,0 +1,82 @@
+"""Проверки сервера классификации. Запуск из src: python -m pytest tests"""
+import json
+import os
+import socket
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from domain.calc import Classifier
+from infrastructure import server
+from infrastructure.modelstore import save_classifier
+
+
+@pytest.fixture
+def running_server(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"A": rng.normal(size=60), "B": rng.normal(size=60)})
+    df["Класс"] = np.where(df["A"] > 0, "этанол", "воздух")
+    classifier = Classifier()
+    classifier.train("knn", df, ["A", "B"], "Класс")
+    save_classifier(classifier, str(tmp_path / "knn.joblib"))
+
+    model_cache = server.ModelCache(1, max_wait_ms=1)
+    model_cache.register(str(tmp_path / "knn.joblib"))
+    httpd = server.ClassificationServer(("127.0.0.1", 0), model_cache, quiet=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+    model_cache.close()
+
+
+def post(url, body: bytes):
+    request = urllib.request.Request(url + "/classify", data=body, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_classify(running_server):
+    status, response = post(running_server, json.dumps({"model": "knn", "rows": [[1.0, 0.0], [-1.0, 0.0]]}).encode())
+    assert status == 200
+    assert response["predictions"] == ["этанол", "воздух"]
+
+
+@pytest.mark.parametrize("body", [
+    b"[1, 2]",
+    b'"x"',
+    b"null",
+    b"not json",
+    b'{"rows": [[1, 2]]}',
+    b'{"model": "../knn", "rows": [[1, 2]]}',
+    b'{"model": "knn", "records": [1, 2]}',
+    b'{"model": "knn", "rows": [[1, "a"]]}',
+    b'{"model": "knn", "rows": [[1, 2, 3]]}',
+])
+def test_bad_requests_get_400(running_server, body):
+    status, response = post(running_server, body)
+    assert status == 400
+    assert response["error"]
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="нет Unix-сокетов")
+def test_stale_socket_removed_but_regular_file_kept(tmp_path):
+    path = str(tmp_path / "enose.sock")
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(path)
+    stale.close()
+    server.remove_stale_socket(path)
+    assert not os.path.exists(path)
+
+    regular = tmp_path / "data.csv"
+    regular.write_text("важные данные")
+    with pytest.raises(ValueError):
+        server.remove_stale_socket(str(regular))
+    assert regular.read_text() == "важные данные"